@@ -0,0 +1,850 @@
+# Eagle Strike performance benchmarks
+#
+# Usage: python benchmarks.py [collision] [pulse] [rotation] [atlas] [entities] [bullets] [text] [background] [startup] [sweep] [sfx] [achievements] [engine] [scenarios]
+#        python benchmarks.py scenarios --json results.json [--compare baseline.json]
+# Runs headless (SDL dummy drivers), prints one table per benchmark.
+import gc
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import platform
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from eagle_strike import (SpatialHash, PulseCache, RotationAtlas, SpriteAtlas, TextCache, Enemy, EntityPool, Boss, BulletEngine, TickInput, Renderer,
+                          Assets, AssetLoader, SpriteCache, SfxScheduler, AchievementTracker,
+                          headless_simulation, SCREEN_WIDTH, SCREEN_HEIGHT, MAX_ENEMY_PROJECTILES, MAX_EAGLE)
+
+
+def time_frames(fn, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+# Stand-in entity: SpatialHash only needs a .rect
+class Box:
+    __slots__ = ("rect",)
+
+    def __init__(self, rect):
+        self.rect = rect
+
+
+def random_entities(rng, count, size):
+    return [Box(pygame.Rect(rng.randint(0, SCREEN_WIDTH - size[0]), rng.randint(-100, SCREEN_HEIGHT), *size))
+            for _ in range(count)]
+
+
+# Missile/player collision pass: old nested scans vs the SpatialHash broadphase
+def bench_collision(frames=200):
+    rng = random.Random(1234)
+    print("collision pass (ms/frame)")
+    print(f"{'enemies':>8} {'asteroids':>9} {'projectiles':>11} {'missiles':>8} {'linear':>8} {'grid':>8}")
+    missiles = random_entities(rng, 90, (10, 30))
+    player = pygame.Rect(370, 780, 60, 90)
+    for count in (25, 50, 100, 200, 400, 800):
+        enemies = random_entities(rng, count, (50, 70))
+        asteroids = random_entities(rng, count // 4, (70, 70))
+        projectiles = random_entities(rng, 50, (15, 40))
+
+        def linear():
+            for m in missiles:
+                for e in enemies:
+                    if m.rect.colliderect(e.rect):
+                        break
+                for a in asteroids:
+                    if m.rect.colliderect(a.rect):
+                        break
+                for e in enemies:
+                    if ((m.rect.centerx - e.rect.centerx) ** 2 + (m.rect.centery - e.rect.centery) ** 2) < 80 * 80:
+                        pass
+            for group in (projectiles, enemies, asteroids):
+                for e in group:
+                    if player.colliderect(e.rect):
+                        break
+
+        enemy_grid = SpatialHash()
+        asteroid_grid = SpatialHash()
+        projectile_grid = SpatialHash(cell_size=64)
+
+        def grid():
+            enemy_grid.rebuild(enemies)
+            asteroid_grid.rebuild(asteroids)
+            projectile_grid.rebuild(projectiles)
+            for m in missiles:
+                enemy_grid.first_rect(m.rect)
+                asteroid_grid.first_rect(m.rect)
+                enemy_grid.query_radius(m.rect.center, 80)
+            projectile_grid.first_rect(player)
+            enemy_grid.first_rect(player)
+            asteroid_grid.first_rect(player)
+
+        print(f"{count:>8} {len(asteroids):>9} {len(projectiles):>11} {len(missiles):>8} "
+              f"{time_frames(linear, frames):>8.3f} {time_frames(grid, frames):>8.3f}")
+
+
+def sprite(rng, size):
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill((rng.randint(50, 255), rng.randint(50, 255), rng.randint(50, 255), 255))
+    return surf
+
+
+# Enemy pulse draw: per-frame smoothscale vs PulseCache lookup
+def bench_pulse(frames=120):
+    rng = random.Random(99)
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    imgs = [sprite(rng, (50, 70)) for _ in range(12)]
+    cache = PulseCache()
+    for img in imgs:
+        cache.bake(img, 0.03)
+    print(f"enemy pulse render (ms/frame), cache holds {cache.bytes_used / 1024:.0f} KB")
+    print(f"{'enemies':>8} {'smoothscale':>12} {'cached':>8}")
+    for count in (25, 50, 100, 200):
+        enemies = [(rng.choice(imgs), rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), rng.random() * math.tau)
+                   for _ in range(count)]
+        tick = [0]
+
+        def resample():
+            tick[0] += 1
+            for img, x, y, phase in enemies:
+                pulse = 1.0 + 0.03 * math.sin(tick[0] / 8 + phase)
+                scaled = pygame.transform.smoothscale(img, (int(img.get_width() * pulse), int(img.get_height() * pulse)))
+                screen.blit(scaled, scaled.get_rect(center=(x, y)))
+
+        def cached():
+            tick[0] += 1
+            for img, x, y, phase in enemies:
+                scaled = cache.frame(img, 1.0 + 0.03 * math.sin(tick[0] / 8 + phase))
+                screen.blit(scaled, (x - scaled.get_width() // 2, y - scaled.get_height() // 2))
+
+        print(f"{count:>8} {time_frames(resample, frames):>12.3f} {time_frames(cached, frames):>8.3f}")
+
+
+# Asteroid draw: per-frame transform.rotate vs RotationAtlas lookup.
+# Surfaces that did not come out of the atlas are counted as allocations.
+def bench_rotation(frames=120):
+    rng = random.Random(7)
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    imgs = [sprite(rng, (70, 70)) for _ in range(6)]
+    atlas = RotationAtlas(5)
+    for img in imgs:
+        atlas.bake(img)
+    baked = {id(frame[0]) for frames in atlas.frames.values() for frame in frames}
+    print(f"asteroid render (ms/frame, new surfaces/frame), atlas holds {atlas.bytes_used / 1024:.0f} KB")
+    print(f"{'asteroids':>9} {'rotate':>8} {'allocs':>7} {'atlas':>8} {'allocs':>7}")
+    for count in (10, 20, 40, 80):
+        asteroids = [[rng.choice(imgs), rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), 0.0, rng.uniform(-6, 6)]
+                     for _ in range(count)]
+        allocs = [0, 0]
+
+        def rotate():
+            for ast in asteroids:
+                ast[3] += ast[4]
+                rotated = pygame.transform.rotate(ast[0], ast[3])
+                allocs[0] += id(rotated) not in baked
+                screen.blit(rotated, rotated.get_rect(center=(ast[1], ast[2])))
+
+        def from_atlas():
+            for ast in asteroids:
+                ast[3] += ast[4]
+                rotated, off_x, off_y = atlas.frame(ast[0], ast[3])
+                allocs[1] += id(rotated) not in baked
+                screen.blit(rotated, (ast[1] + off_x, ast[2] + off_y))
+
+        rotate_ms = time_frames(rotate, frames)
+        atlas_ms = time_frames(from_atlas, frames)
+        print(f"{count:>9} {rotate_ms:>8.3f} {allocs[0] / frames:>7.1f} {atlas_ms:>8.3f} {allocs[1] / frames:>7.1f}")
+
+
+# Gameplay sprite draws: one surface per sprite/frame vs area blits from SpriteAtlas pages.
+# Both sides draw the same random mix of raw sprites, pulse frames and rotation frames.
+def bench_atlas(frames=300):
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sim = headless_simulation()
+    sources = Renderer.atlas_sources(sim.assets)
+    pulses = PulseCache()
+    turns = RotationAtlas(5)
+    surfaces = []
+    for name, img, pulse, rotate in sources:
+        surfaces.append(img)
+        if pulse:
+            pulses.bake(img, pulse)
+            surfaces += pulses.frames[img][2]
+        if rotate:
+            surfaces += [frame for frame, _, _ in turns.bake(img)]
+    atlas = SpriteAtlas()
+    # Same sprites on 2048-px-wide sheets, for comparison: rows a whole sheet pitch apart
+    sheet = SpriteAtlas(column=2048)
+    for i, surf in enumerate(surfaces):
+        atlas.add(str(i), surf)
+        sheet.add(str(i), surf)
+    start = time.perf_counter()
+    atlas.pack()
+    pack_ms = (time.perf_counter() - start) * 1000.0
+    sheet.pack()
+
+    print(f"sprite draws (ms/frame): {len(surfaces)} surfaces vs {len(atlas.pages)} atlas pages "
+          f"(packed in {pack_ms:.1f} ms) vs {len(sheet.pages)} wide sheets")
+    print(f"{'sprites':>8} {'surfaces':>9} {'atlas':>8} {'sheets':>8}")
+    rng = random.Random(11)
+    for count in (100, 300, 1000):
+        draws = [(rng.choice(surfaces), (rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT))) for _ in range(count)]
+
+        def separate():
+            for surf, pos in draws:
+                screen.blit(surf, pos)
+
+        def packed(regions):
+            def draw():
+                for (page, area), pos in regions:
+                    screen.blit(page, pos, area)
+            return draw
+
+        atlas_ms = time_frames(packed([(atlas.region(surf), pos) for surf, pos in draws]), frames)
+        sheet_ms = time_frames(packed([(sheet.region(surf), pos) for surf, pos in draws]), frames)
+        print(f"{count:>8} {time_frames(separate, frames):>9.3f} {atlas_ms:>8.3f} {sheet_ms:>8.3f}")
+
+
+def measure_alloc(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(kept), kept
+
+
+# Enemy storage: old ad-hoc dicts vs the __slots__ Enemy class
+def bench_entities(frames=300):
+    rng = random.Random(3)
+    img = sprite(rng, (50, 70))
+    count = 500
+    spots = [(rng.randint(80, SCREEN_WIDTH - 80), rng.randint(-50, SCREEN_HEIGHT)) for _ in range(count)]
+
+    def build_dicts():
+        return [{"rect": img.get_rect(center=pos), "img": img, "speed": 3.2, "wiggle": 0.4, "type": "grunt",
+                 "fire_timer": 0, "formation": False, "bob_phase": 1.0} for pos in spots]
+
+    def build_objects():
+        return [Enemy(img, pos, 3.2, 0.4, "grunt", 0, 1.0) for pos in spots]
+
+    dict_bytes, dicts = measure_alloc(build_dicts)
+    obj_bytes, objects = measure_alloc(build_objects)
+
+    def update_dicts():
+        for enemy in dicts:
+            if enemy.get("formation", False) and enemy["rect"].y > 200:
+                enemy["formation"] = False
+            enemy["rect"].y += enemy["speed"]
+            enemy["rect"].x += enemy["wiggle"] * 3
+            enemy["rect"].x = max(20, min(SCREEN_WIDTH - enemy["rect"].width - 20, enemy["rect"].x))
+            if enemy["rect"].top > SCREEN_HEIGHT:
+                enemy["rect"].y = -50
+
+    def update_objects():
+        for enemy in objects:
+            if enemy.formation and enemy.y > 200:
+                enemy.formation = False
+            enemy.y += enemy.speed
+            enemy.x += enemy.wiggle * 3
+            enemy.x = max(20, min(SCREEN_WIDTH - enemy.width - 20, enemy.x))
+            if enemy.y > SCREEN_HEIGHT:
+                enemy.y = -50.0
+
+    def sync_objects():
+        for enemy in objects:
+            enemy.rect
+
+    print(f"enemy storage ({count} enemies)")
+    print(f"{'':>10} {'bytes/entity':>13} {'update ms':>10}")
+    print(f"{'dict':>10} {dict_bytes:>13.0f} {time_frames(update_dicts, frames):>10.3f}")
+    print(f"{'slots':>10} {obj_bytes:>13.0f} {time_frames(update_objects, frames):>10.3f}")
+    print(f"{'rect sync':>10} {'':>13} {time_frames(sync_objects, frames):>10.3f}")
+
+    # Spawn/despawn churn: 20 enemies a frame, each living 60 frames, built fresh vs
+    # recycled through a pool
+    pool = EntityPool(Enemy)
+    batch = spots[:20]
+    alive = []
+
+    def churn_new():
+        alive.append([Enemy(img, pos, 3.2, 0.4, "grunt", 0, 1.0) for pos in batch])
+        if len(alive) > 60:
+            alive.pop(0)
+
+    def churn_pool():
+        alive.append([pool.acquire(img, pos, 3.2, 0.4, "grunt", 0, 1.0) for pos in batch])
+        if len(alive) > 60:
+            pool.release_all(alive.pop(0))
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    print()
+    print(f"spawn churn ({len(batch)} enemies/frame living 60 frames, {frames * 10} frames)")
+    print(f"{'':>10} {'ms/frame':>9} {'gc runs':>8}")
+    gc.callbacks.append(on_gc)
+    try:
+        for label, fn in (("new", churn_new), ("pooled", churn_pool)):
+            alive.clear()
+            collections[0] = 0
+            ms = time_frames(fn, frames * 10)
+            print(f"{label:>10} {ms:>9.3f} {collections[0]:>8}")
+    finally:
+        gc.callbacks.remove(on_gc)
+    print(f"pool: {pool.stats()}")
+
+
+# Removal inside update loops: `for e in lst[:]: ... lst.remove(e)` vs marking dead
+# and compacting once (Simulation.despawn/sweep). A tenth of the list dies and is
+# replaced every frame; the per-entity cost should stay flat for mark-and-sweep.
+class Mortal:
+    __slots__ = ("alive", "ttl")
+
+    def __init__(self, ttl):
+        self.alive = True
+        self.ttl = ttl
+
+
+def bench_sweep(frames=60):
+    print("removal per frame, 10% of entities die (ms/frame, us/entity)")
+    print(f"{'entities':>8} {'copy+remove':>12} {'us/ent':>7} {'mark+sweep':>11} {'us/ent':>7}")
+    for count in (250, 500, 1000, 2000, 4000):
+        rng = random.Random(count)
+
+        def populate():
+            return [Mortal(rng.randrange(10)) for _ in range(count)]
+
+        old = populate()
+
+        def copy_remove():
+            born = 0
+            for e in old[:]:
+                e.ttl -= 1
+                if e.ttl < 0:
+                    old.remove(e)
+                    born += 1
+            old.extend(Mortal(9) for _ in range(born))
+
+        new = populate()
+
+        def mark_sweep():
+            born = 0
+            for e in new:
+                e.ttl -= 1
+                if e.ttl < 0:
+                    e.alive = False
+                    born += 1
+            new[:] = [e for e in new if e.alive]
+            new.extend(Mortal(9) for _ in range(born))
+
+        old_ms = time_frames(copy_remove, frames)
+        new_ms = time_frames(mark_sweep, frames)
+        print(f"{count:>8} {old_ms:>12.3f} {old_ms * 1000 / count:>7.2f} {new_ms:>11.3f} {new_ms * 1000 / count:>7.2f}")
+
+
+# Enemy bullet engine: every emitter kind firing into a large live population
+def bench_bullets(frames=300):
+    rng = random.Random(5)
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sprites = [sprite(rng, (15, 40)) for _ in range(3)]
+    player = pygame.Rect(370, 780, 60, 90)
+    patterns = [
+        {"kind": "radial", "interval": 4, "count": 24, "speed": 1.6, "turn": 0.1},
+        {"kind": "spiral", "interval": 1, "arms": 4, "turn": 0.23, "speed": 1.8},
+        {"kind": "wave", "interval": 6, "count": 12, "width": 600, "speed": 1.5},
+        {"kind": "aimed", "interval": 3, "count": 5, "spread": 0.2, "speed": 2.0},
+        {"kind": "fan", "interval": 4, "offsets": [-75, -50, -25, 0, 25, 50, 75], "speed": 1.5},
+    ]
+    print("bullet engine (ms/frame)")
+    print(f"{'live':>6} {'emit+update':>12} {'hit test':>9} {'draw':>8} {'total':>8}")
+    for capacity in (500, 1000, 2000, 4000):
+        engine = BulletEngine(sprites, capacity, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        tick = [0]
+
+        def step():
+            tick[0] += 1
+            for spec in patterns:
+                if tick[0] % spec["interval"] == 0:
+                    engine.emit(spec, SCREEN_WIDTH // 2, 200, player.center, tick[0])
+            engine.update()
+
+        for _ in range(600):
+            step()
+        live = engine.count
+        update_ms = time_frames(step, frames)
+        hit_ms = time_frames(lambda: engine.first_hit(player), frames)
+        draw_ms = time_frames(lambda: engine.draw(screen), frames)
+        print(f"{live:>6} {update_ms:>12.3f} {hit_ms:>9.3f} {draw_ms:>8.3f} {update_ms + hit_ms + draw_ms:>8.3f}")
+
+
+# HUD text: font.render per string per frame vs TextCache (cached labels + atlas digits)
+def bench_text(frames=600):
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.font.init()
+    small = pygame.font.SysFont("arial", 12, bold=True)
+    hud = pygame.font.SysFont("arial", 16, bold=True)
+    score = pygame.font.SysFont("arial", 20, bold=True)
+    text_small, text_hud, text_score = TextCache(small), TextCache(hud), TextCache(score)
+    tick = [0]
+
+    def rendered():
+        tick[0] += 1
+        n = tick[0]
+        for font, text, color in ((hud, "x 3", (0, 255, 255)), (score, f"Score: {n * 25}", (255, 255, 255)),
+                                  (hud, "High Score: 48210", (255, 255, 100)), (small, "Input: Keyboard", (200, 200, 200)),
+                                  (small, f"FPS: {60 - n % 3}", (100, 255, 100)), (small, "BOOST", (255, 255, 255)),
+                                  (small, "EAGLE / BOMB", (255, 255, 255)), (small, "POWER-UPS:", (255, 255, 0)),
+                                  (small, f"{n // 60 % 10}s", (0, 255, 255)), (hud, "MINI-BOSS", (255, 255, 0)),
+                                  (score, f"COMBO x{n % 9} (2.0x)", (255, 255, 100))):
+            screen.blit(font.render(text, True, color), (20, 20))
+
+    def cached():
+        tick[0] += 1
+        n = tick[0]
+        text_hud.draw_label(screen, "x ", "3", (0, 255, 255), (20, 20))
+        text_score.draw_label(screen, "Score: ", str(n * 25), (255, 255, 255), (20, 20))
+        text_hud.draw_label(screen, "High Score: ", "48210", (255, 255, 100), (20, 20))
+        screen.blit(text_small.surface("Input: Keyboard", (200, 200, 200)), (20, 20))
+        text_small.draw_label(screen, "FPS: ", str(60 - n % 3), (100, 255, 100), (20, 20))
+        for label in ("BOOST", "EAGLE / BOMB"):
+            screen.blit(text_small.surface(label, (255, 255, 255)), (20, 20))
+        screen.blit(text_small.surface("POWER-UPS:", (255, 255, 0)), (20, 20))
+        text_small.draw(screen, f"{n // 60 % 10}s", (0, 255, 255), (20, 20))
+        screen.blit(text_hud.surface("MINI-BOSS", (255, 255, 0)), (20, 20))
+        text_score.draw(screen, f"COMBO x{n % 9} (2.0x)", (255, 255, 100), (20, 20))
+
+    render_ms = time_frames(rendered, frames)
+    cached_ms = time_frames(cached, frames)
+    print("HUD text (ms/frame, 11 strings)")
+    print(f"{'font.render':>12} {'TextCache':>10} {'cached strings':>15}")
+    print(f"{render_ms:>12.3f} {cached_ms:>10.3f} {len(text_small.strings) + len(text_hud.strings) + len(text_score.strings):>15}")
+
+
+# Background: star dicts + draw.circle + full-screen tint blend (and flash Surface)
+# vs the vectorized starfield with the tint folded into the fill
+def bench_background(frames=600):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sim = headless_simulation()
+    renderer = Renderer(screen, sim.assets)
+    rng = random.Random(3)
+    stars = [{'x': rng.randint(0, SCREEN_WIDTH), 'y': rng.randint(0, SCREEN_HEIGHT),
+              'speed': rng.uniform(0.8, 3.5), 'size': rng.choice([1, 2])} for _ in range(120)]
+    tint_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+
+    def loop(flash):
+        for star in stars:
+            star['y'] += star['speed']
+            if star['y'] > SCREEN_HEIGHT:
+                star['y'] = -10
+                star['x'] = rng.randint(0, SCREEN_WIDTH)
+        screen.fill((0, 0, 0))
+        if flash:
+            surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            surf.fill((255, 255, 255))
+            surf.set_alpha(128)
+            screen.blit(surf, (0, 0))
+        for star in stars:
+            intensity = 180 + int(75 * (star['speed'] / 3.5))
+            pygame.draw.circle(screen, (intensity, intensity, intensity), (int(star['x']), int(star['y'])), star['size'])
+        tint_overlay.fill((0, 100, 0, 40))
+        screen.blit(tint_overlay, (0, 0))
+
+    def vectorized():
+        renderer.update_stars(1.0)
+        renderer.draw_background(sim)
+
+    print("background (ms/frame)")
+    print(f"{'':>8} {'loop+blend':>11} {'vectorized':>11}")
+    for label, timer in (("steady", 0), ("flash", 60)):
+        sim.stage_transition_timer = timer
+        print(f"{label:>8} {time_frames(lambda: loop(timer > 0), frames):>11.3f} {time_frames(vectorized, frames):>11.3f}")
+
+
+# Sprite loading: serial decode vs the AssetLoader worker pool at a few pool sizes,
+# then cold vs warm through the on-disk sprite cache.
+# Reads the image files from the working directory (missing ones become placeholders).
+def bench_startup(rounds=5):
+    pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+    def load(workers):
+        loader = AssetLoader(workers) if workers else None
+        start = time.perf_counter()
+        Assets(loader)
+        elapsed = time.perf_counter() - start
+        if loader:
+            loader.shutdown()
+        return elapsed * 1000.0
+
+    found = sum(os.path.exists(name) for name in Assets.IMAGES)
+    print(f"startup: sprite load (ms, best of {rounds}; {found}/{len(Assets.IMAGES)} files found, {os.cpu_count()} cpus)")
+    print(f"{'workers':>8} {'ms':>9}")
+    for workers in (0, 1, 2, 4):
+        best = min(load(workers) for _ in range(rounds))
+        print(f"{workers or 'serial':>8} {best:>9.1f}")
+
+    # Sprite cache: cold builds and saves a fresh file, warm reads it back
+    path = os.path.join(tempfile.mkdtemp(), "sprite_cache.bin")
+
+    def cached(warm):
+        if not warm and os.path.exists(path):
+            os.remove(path)
+        cache = SpriteCache(path)
+        start = time.perf_counter()
+        Assets(None, cache)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        cache.save(elapsed)
+        cache.close()
+        return elapsed
+
+    cold = min(cached(False) for _ in range(rounds))
+    print(f"{'cold':>8} {cold:>9.1f}")
+    # Missing files are never cached, so without the sprites there is nothing to read back
+    if os.path.exists(path):
+        warm = min(cached(True) for _ in range(rounds))
+        print(f"{'warm':>8} {warm:>9.1f}   ({cold / warm:.1f}x, cache {os.path.getsize(path)} bytes)")
+        os.remove(path)
+    else:
+        print(f"{'warm':>8} {'skipped':>9}   (no cache file written, sprite files not found)")
+    os.rmdir(os.path.dirname(path))
+
+
+# Sound triggers during a mass kill: every explosion played on the spot (the old fixed
+# channels plus Sound.play() for the rest) vs SfxScheduler coalescing them per frame.
+def bench_sfx(frames=300):
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    pygame.mixer.set_num_channels(10)
+    rng = np.random.default_rng(5)
+
+    def noise():
+        return pygame.mixer.Sound(buffer=rng.integers(-3000, 3000, 44100 // 3 * 2, dtype=np.int16).tobytes())
+
+    sounds = {name: [noise(), noise()] for name in ("eagle_strike", "hit", "explosion", "pickup", "shoot")}
+    fixed = {"shoot": pygame.mixer.Channel(2), "explosion": pygame.mixer.Channel(3), "hit": pygame.mixer.Channel(4)}
+
+    print("sfx triggers (ms/frame, mixer play calls/frame)")
+    print(f"{'kills':>6} {'direct':>8} {'calls':>7} {'sched':>8} {'calls':>7} {'coalesced':>10} {'dropped':>8}")
+    for kills in (5, 20, 80):
+        triggers = [("shoot", 1.0), ("eagle_strike", 1.0), ("pickup", 1.0)] + [("explosion", 0.6)] * kills
+        calls = [0]
+
+        def direct():
+            for name, chance in triggers:
+                if chance < 1.0 and random.random() >= chance:
+                    continue
+                sound = random.choice(sounds[name])
+                channel = fixed.get(name)
+                if channel:
+                    channel.play(sound)
+                else:
+                    sound.play()
+                calls[0] += 1
+
+        sched = SfxScheduler(range(3, 10), {name: (prio, limit, sounds[name]) for name, prio, limit in
+                                            (("eagle_strike", 3, 1), ("hit", 3, 1), ("explosion", 2, 2),
+                                             ("pickup", 2, 2), ("shoot", 1, 1))})
+
+        def scheduled():
+            for name, chance in triggers:
+                sched.request(name, chance)
+            sched.flush()
+
+        direct_ms = time_frames(direct, frames)
+        direct_calls = calls[0] / frames
+        pygame.mixer.stop()
+        sched_ms = time_frames(scheduled, frames)
+        st = sched.stats()
+        pygame.mixer.stop()
+        print(f"{kills:>6} {direct_ms:>8.3f} {direct_calls:>7.1f} {sched_ms:>8.3f} {st['played'] / frames:>7.1f} "
+              f"{st['coalesced'] / frames:>10.1f} {st['dropped'] / frames:>8.1f}")
+
+
+# Per-kill achievement check: scanning every achievement vs the threshold tracker
+def bench_achievements(events=100000):
+    print("achievement check per kill event (us)")
+    print(f"{'achievements':>13} {'scan':>8} {'tracker':>8}")
+    for per_counter in (2, 20, 200):
+        achievements = [{"id": f"{counter}_{n}", "name": "", "desc": "", "counter": counter, "target": n * 1000}
+                        for counter in ("kills", "boss_kills", "combo", "survival", "kills_terminid")
+                        for n in range(1, per_counter + 1)]
+        values = {"kills": 0, "boss_kills": 0, "combo": 0, "survival": 0, "kills_terminid": 0}
+        unlocked = set()
+
+        def scan():
+            values["kills"] += 1
+            for ach in achievements:
+                if ach["id"] not in unlocked and values[ach["counter"]] >= ach["target"]:
+                    unlocked.add(ach["id"])
+
+        tracker = AchievementTracker(achievements, set(), [])
+
+        def threshold():
+            tracker.bump("kills")
+
+        scan_us = time_frames(scan, events // per_counter) * 1000.0
+        tracker_us = time_frames(threshold, events) * 1000.0
+        print(f"{len(achievements):>13} {scan_us:>8.3f} {tracker_us:>8.3f}")
+
+
+# Headless engine: full Simulation ticks with scripted input, no rendering
+def bench_engine(ticks=20000):
+    random.seed(11)
+    sim = headless_simulation()
+    inputs = [TickInput(move_x=-1.0 if (i // 90) % 2 else 1.0, fire=True, boost=i % 200 < 30, special=i % 600 == 0)
+              for i in range(600)]
+    games = 0
+    start = time.perf_counter()
+    for i in range(ticks):
+        sim.step(inputs[i % 600])
+        if sim.game_over:
+            games += 1
+            sim.reset()
+    elapsed = time.perf_counter() - start
+    print(f"headless engine: {ticks} ticks in {elapsed:.2f}s, {ticks / elapsed:.0f} ticks/s "
+          f"({ticks / elapsed / 60:.0f}x real time), {games} game overs")
+
+
+# Scripted stress scenarios. Each one sets up a fresh Simulation and returns a per-tick
+# function that keeps the pressure on and returns that tick's input.
+def scenario_boss_phase3(sim):
+    assets = sim.assets
+    idx = next(i for i, bt in enumerate(assets.boss_types) if bt["special"] == "spawn_minis")
+    sim.boss = Boss(assets.boss_types[idx]["normal"], (SCREEN_WIDTH // 2, 180), 10000, idx, 2.5)
+    rng = random.Random(31)
+    np_rng = np.random.default_rng(31)
+    bullets = sim.enemy_bullets
+
+    def tick(i):
+        sim.boss.phase = 3
+        sim.boss.health = max(sim.boss.health, sim.boss.max_health // 5)
+        while len(sim.mini_bosses) < 3:
+            sim.spawn_mini_boss(rng.choice(assets.mini_boss_types), (rng.randint(120, SCREEN_WIDTH - 120), 300))
+        for mini in sim.mini_bosses:
+            mini.health = max(mini.health, mini.max_health // 2 + 1)
+            mini.y = min(mini.y, 450.0)
+        missing = MAX_ENEMY_PROJECTILES - bullets.count
+        if missing > 0:
+            bullets.spawn(np_rng.uniform(20, SCREEN_WIDTH - 20, missing).astype(np.float32),
+                          np_rng.uniform(0, SCREEN_HEIGHT, missing).astype(np.float32),
+                          np_rng.uniform(-1, 1, missing).astype(np.float32),
+                          np_rng.uniform(0.5, 3, missing).astype(np.float32))
+        sim.shield_active = True
+        sim.lives = 3
+        return TickInput(move_x=math.sin(i / 40), fire=True)
+
+    return tick
+
+
+def scenario_breach_cross(sim):
+    def tick(i):
+        sim.current_event = "breach"
+        sim.event_timer = 10 ** 6
+        if i % 45 == 0:
+            sim.spawn_formation("cross")
+        sim.shield_active = True
+        sim.lives = 3
+        return TickInput(move_x=math.sin(i / 30), fire=True)
+
+    return tick
+
+
+def scenario_eagle_strike(sim):
+    img = sim.assets.terminid_imgs[0]
+
+    # Fill the screen, let it fly for half a second, then clear it with the Eagle Strike.
+    # Score and stage stay pinned so the director keeps spawning stage-one waves.
+    def tick(i):
+        sim.score = 0
+        sim.current_stage = 0
+        if i % 30 == 0:
+            for row in range(12):
+                for col in range(13):
+                    sim.enemies.append(sim.enemy_pool.acquire(img, (40 + col * 60, 20 + row * 62), 0.5, 0, "grunt", 0, 0.0))
+        strike = i % 30 == 29
+        if strike:
+            sim.eagle_meter = MAX_EAGLE
+        sim.shield_active = True
+        sim.lives = 3
+        return TickInput(fire=True, special=strike)
+
+    return tick
+
+
+def scenario_triple_rapid(sim):
+    def tick(i):
+        sim.rapid_timer = sim.triple_timer = 99.0
+        sim.shield_active = True
+        sim.lives = 3
+        return TickInput(move_x=math.sin(i / 25), move_y=math.cos(i / 50) * 0.3, fire=True)
+
+    return tick
+
+
+SCENARIOS = {
+    "boss_phase3": scenario_boss_phase3,
+    "breach_cross": scenario_breach_cross,
+    "eagle_strike": scenario_eagle_strike,
+    "triple_rapid": scenario_triple_rapid,
+}
+METRICS = ("update", "collision", "render", "total")
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_REGRESSION_MS = 0.1
+
+
+def percentile(ordered, p):
+    pos = (len(ordered) - 1) * p / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {"p50": percentile(ordered, 50), "p95": percentile(ordered, 95), "p99": percentile(ordered, 99),
+            "mean": sum(ordered) / len(ordered)}
+
+
+def run_scenario(name, frames, warmup=120):
+    random.seed(17)
+    sim = headless_simulation()
+    sim.reset(2024)
+    renderer = Renderer(pygame.display.get_surface(), sim.assets)
+    tick = SCENARIOS[name](sim)
+    samples = {metric: [] for metric in METRICS}
+    peak = {"enemies": 0, "bullets": 0, "missiles": 0}
+    pooled = 0
+    for i in range(warmup + frames):
+        if i == warmup:
+            pooled = renderer.surfaces.allocations
+        sim.step(tick(i))
+        start = time.perf_counter()
+        renderer.draw_background(sim)
+        renderer.draw_world(sim, 1.0, i * 16, i, True)
+        renderer.draw_hud(sim, 0, "Keyboard", 60)
+        render_ms = (time.perf_counter() - start) * 1000.0
+        if i < warmup:
+            continue
+        update_ms = sim.spawn_ms + sim.move_ms
+        samples["update"].append(update_ms)
+        samples["collision"].append(sim.collision_ms)
+        samples["render"].append(render_ms)
+        samples["total"].append(update_ms + sim.collision_ms + render_ms)
+        peak["enemies"] = max(peak["enemies"], len(sim.enemies))
+        peak["bullets"] = max(peak["bullets"], sim.enemy_bullets.count)
+        peak["missiles"] = max(peak["missiles"], len(sim.missiles))
+    result = {metric: summarize(values) for metric, values in samples.items()}
+    result["peak"] = peak
+    # Pool surfaces created after warmup; a steady render loop should add none
+    result["surface_allocs"] = renderer.surfaces.allocations - pooled
+    return result
+
+
+def compare_results(results, baseline, threshold):
+    print(f"vs baseline (p95 change, regression above +{threshold:.0f}%)")
+    print(f"{'scenario':>14} " + " ".join(f"{m:>16}" for m in METRICS))
+    regressions = 0
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:>14} (not in baseline)")
+            continue
+        cells = []
+        for metric in METRICS:
+            old = base[metric]["p95"]
+            new = result[metric]["p95"]
+            change = (new - old) / old * 100.0 if old > 0 else 0.0
+            regressed = change > threshold and new - old > MIN_REGRESSION_MS
+            flag = "!" if regressed else " "
+            regressions += regressed
+            cells.append(f"{old:6.2f}>{new:6.2f}{change:+4.0f}%{flag}")
+        print(f"{name:>14} " + " ".join(f"{c:>16}" for c in cells))
+    return regressions
+
+
+# Frame-time percentiles for the scripted stress scenarios (ms)
+def bench_scenarios(frames=600, json_path=None, compare_path=None, threshold=15.0):
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    results = {}
+    print(f"scenarios ({frames} frames each, ms: p50 / p95 / p99)")
+    print(f"{'scenario':>14} " + " ".join(f"{m:>20}" for m in METRICS) + "  peak enemies/bullets/missiles  surface allocs")
+    for name in SCENARIOS:
+        result = run_scenario(name, frames)
+        results[name] = result
+        cells = [f"{result[m]['p50']:5.2f}/{result[m]['p95']:5.2f}/{result[m]['p99']:5.2f}" for m in METRICS]
+        peak = result["peak"]
+        peaks = f"{peak['enemies']}/{peak['bullets']}/{peak['missiles']}"
+        print(f"{name:>14} " + " ".join(f"{c:>20}" for c in cells) + f"  {peaks:<29}  {result['surface_allocs']}")
+    if json_path:
+        report = {"frames": frames, "python": platform.python_version(), "pygame": pygame.version.ver,
+                  "numpy": np.__version__, "machine": platform.machine(), "scenarios": results}
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {json_path}")
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+        print()
+        return compare_results(results, baseline, threshold)
+    return 0
+
+
+BENCHMARKS = {
+    "collision": bench_collision,
+    "pulse": bench_pulse,
+    "rotation": bench_rotation,
+    "atlas": bench_atlas,
+    "entities": bench_entities,
+    "bullets": bench_bullets,
+    "text": bench_text,
+    "background": bench_background,
+    "startup": bench_startup,
+    "sweep": bench_sweep,
+    "sfx": bench_sfx,
+    "achievements": bench_achievements,
+    "engine": bench_engine,
+    "scenarios": bench_scenarios,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eagle Strike performance benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--frames", type=int, default=600, help="measured frames per scenario")
+    parser.add_argument("--json", metavar="PATH", help="write scenario results to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare scenario results against a stored JSON baseline")
+    parser.add_argument("--threshold", type=float, default=15.0, help="p95 slowdown in %% counted as a regression")
+    args = parser.parse_args()
+    regressions = 0
+    for name in args.names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        if name == "scenarios":
+            regressions = bench_scenarios(args.frames, args.json, args.compare, args.threshold)
+        else:
+            BENCHMARKS[name]()
+        print()
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0f}%")
+        sys.exit(1)
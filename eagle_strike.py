@@ -4,8 +4,22 @@ import random
 import json
 import os
 import logging
+import logging.handlers
 import traceback
 import math
+import mmap
+import queue
+import atexit
+import collections
+import hashlib
+import string
+import struct
+import time
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 # PyInstaller resource path fix
 def resource_path(relative_path):
@@ -16,13 +30,82 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 # Setup logging (no console output)
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(resource_path("eagle_strike_debug.log"), encoding='utf-8', mode='w')
-    ]
-)
+# The game thread only queues records, with the message merged at the call so later
+# changes to its arguments can't leak in; a QueueListener thread formats them and writes
+# the file, so disk I/O never stalls a frame. The root logger sits at LOG_LEVEL (debug
+# only with --debug-log), so debug calls on hot paths stop at its level check without
+# building a record. LogRing, also fed by the listener, keeps the latest records in
+# memory for the dump on a fatal error. main() opens the file through start_logging(),
+# so importing the module (benchmarks, tools) leaves the last game's log alone.
+LOG_FILE = resource_path("eagle_strike_debug.log")
+LOG_LEVEL = logging.DEBUG if "--debug-log" in sys.argv else logging.INFO
+LOG_RING_SIZE = 256
+LOG_QUEUE_SIZE = 10000
+
+# Drops the record when the queue is full instead of raising: nothing drains it before
+# start_logging(), and a backed-up listener must not cost the frame either
+class LogQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+# Most recent records, written out through another handler by dump()
+class LogRing(logging.Handler):
+    def __init__(self, size):
+        super().__init__()
+        self.records = collections.deque(maxlen=size)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, handler):
+        records = list(self.records)
+        handler.acquire()
+        try:
+            handler.stream.write(f"--- Last {len(records)} log records ---\n")
+            for record in records:
+                handler.stream.write(handler.format(record) + "\n")
+            handler.stream.write("--- End of recent log records ---\n")
+            handler.flush()
+        finally:
+            handler.release()
+
+# The format only uses time, level and message, so records skip process and thread lookups
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logThreads = False
+
+log_queue = queue.Queue(LOG_QUEUE_SIZE)
+log_queue_handler = LogQueueHandler(log_queue)
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_ring = LogRing(LOG_RING_SIZE)
+logging.basicConfig(level=LOG_LEVEL, handlers=[log_queue_handler])
+log_file_handler = None
+log_listener = None
+
+# Open the log file and start writing; records queued before this come out first
+def start_logging():
+    global log_file_handler, log_listener
+    if log_listener is not None:
+        return
+    log_file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8', mode='w')
+    log_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_listener = logging.handlers.QueueListener(log_queue, log_file_handler, log_ring)
+    log_listener.start()
+
+# Drain the queue into the file and stop the listener; with dump_recent the ring follows
+def stop_logging(dump_recent=False):
+    global log_listener
+    if log_listener is None:
+        return
+    log_listener.stop()
+    log_listener = None
+    if dump_recent:
+        log_ring.dump(log_file_handler)
+
+atexit.register(stop_logging)
 logging.info("=== Eagle Strike Session Started ===")
 
 # Leaderboard
@@ -45,13 +128,7 @@ def load_leaderboard():
     high_score = leaderboard[0]["score"] if leaderboard else 0
 
 def save_leaderboard():
-    global leaderboard
-    try:
-        with open(LEADERBOARD_FILE, "w") as f:
-            json.dump(leaderboard, f)
-        logging.info("Leaderboard saved")
-    except Exception as e:
-        logging.error(f"Failed to save leaderboard: {e}")
+    save_state(LEADERBOARD_FILE, [dict(entry) for entry in leaderboard], "Leaderboard")
 
 # Achievements
 ACHIEVEMENTS_FILE = resource_path("achievements.json")
@@ -70,18 +147,89 @@ def load_achievements():
         unlocked_achievements = set()
 
 def save_achievements():
+    save_state(ACHIEVEMENTS_FILE, list(unlocked_achievements), "Achievements")
+
+# Saved state files are written whole to a temp file and swapped in with os.replace,
+# so a crash mid-write leaves the previous file intact
+def write_state(path, data, label):
+    tmp_path = path + ".tmp"
     try:
-        with open(ACHIEVEMENTS_FILE, "w") as f:
-            json.dump(list(unlocked_achievements), f)
-        logging.info("Achievements saved")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        logging.info(f"{label} saved")
     except Exception as e:
-        logging.error(f"Failed to save achievements: {e}")
+        logging.error(f"Failed to save {label.lower()}: {e}")
 
-# Safe image load
-def load_image(filename, scale=None):
+# Background writer for the state files. save() takes a snapshot and marks the path
+# dirty; the worker writes the newest snapshot of each dirty path, so saves that pile
+# up while it is busy collapse into one write. flush() waits until everything queued
+# is on disk; close() flushes and stops the thread.
+class PersistenceWorker:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.dirty = {}      # path -> (data, label)
+        self.busy = False
+        self.closed = False
+        self.writes = 0
+        self.batched = 0
+        self.thread = threading.Thread(target=self.run, name="persistence", daemon=True)
+        self.thread.start()
+
+    def save(self, path, data, label):
+        with self.cond:
+            if path in self.dirty:
+                self.batched += 1
+            self.dirty[path] = (data, label)
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.dirty and not self.closed:
+                    self.cond.wait()
+                if not self.dirty:
+                    return
+                batch, self.dirty = self.dirty, {}
+                self.busy = True
+            for path, (data, label) in batch.items():
+                write_state(path, data, label)
+            with self.cond:
+                self.writes += len(batch)
+                self.busy = False
+                self.cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        with self.cond:
+            if not self.cond.wait_for(lambda: not self.dirty and not self.busy, timeout):
+                logging.warning(f"Persistence flush timed out with {len(self.dirty)} files pending")
+
+    def close(self):
+        self.flush()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout=1.0)
+        logging.info(f"Persistence: {self.writes} writes, {self.batched} saves batched into later writes")
+
+# Set by main(); without it (tools, replays) saves are written synchronously
+persistence = None
+
+def save_state(path, data, label):
+    if persistence:
+        persistence.save(path, data, label)
+    else:
+        write_state(path, data, label)
+
+# Safe image load. `decoded` is a pending decode from AssetLoader; convert_alpha and
+# scaling need the display, so they always run on the calling (main) thread.
+def load_image(filename, scale=None, decoded=None):
     path = resource_path(filename)
     try:
-        img = pygame.image.load(path).convert_alpha()
+        raw = decoded.result() if decoded is not None else pygame.image.load(path)
+        img = raw.convert_alpha()
         if scale:
             img = pygame.transform.scale(img, scale)
         logging.info(f"Loaded image: {filename}")
@@ -94,11 +242,11 @@ def load_image(filename, scale=None):
 
 # Safe sound load
 all_sfx = []
-def load_sound(filename):
+def load_sound(filename, decoded=None):
     global all_sfx
     path = resource_path(filename)
     try:
-        sound = pygame.mixer.Sound(path)
+        sound = decoded.result() if decoded is not None else pygame.mixer.Sound(path)
         logging.info(f"Loaded sound: {filename}")
         all_sfx.append(sound)
         return sound
@@ -106,6 +254,384 @@ def load_sound(filename):
         logging.warning(f"Failed to load sound {filename}: {e}")
         return None
 
+# Decodes image and sound files on a small worker pool. Files are decoded in the order
+# they were submitted; image() / sound() wait for that file and finish it on the calling
+# thread, reporting progress(done, total, filename) as each one lands.
+class AssetLoader:
+    def __init__(self, workers=4, progress=None):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset")
+        self.progress = progress
+        self.pending = {}
+        self.total = 0
+        self.done = 0
+
+    def prefetch(self, images=(), sounds=()):
+        for filename in images:
+            if ("image", filename) not in self.pending:
+                self.pending[("image", filename)] = self.pool.submit(pygame.image.load, resource_path(filename))
+        for filename in sounds:
+            if ("sound", filename) not in self.pending:
+                self.pending[("sound", filename)] = self.pool.submit(pygame.mixer.Sound, resource_path(filename))
+        self.total = self.done + len(self.pending)
+
+    def advance(self, filename):
+        self.done += 1
+        if self.progress:
+            self.progress(self.done, self.total, filename)
+
+    def image(self, filename, scale=None):
+        decoded = self.pending.pop(("image", filename), None)
+        img = load_image(filename, scale, decoded)
+        if decoded is not None:
+            self.advance(filename)
+        return img
+
+    def sound(self, filename):
+        decoded = self.pending.pop(("sound", filename), None)
+        sound = load_sound(filename, decoded)
+        if decoded is not None:
+            self.advance(filename)
+        return sound
+
+    def shutdown(self):
+        for decoded in self.pending.values():
+            decoded.cancel()
+        self.pool.shutdown(wait=False)
+
+# Background music on two reserved mixer channels, so a track change is a crossfade
+# rather than mixer.music's stop / load / play. Tracks are decoded to Sounds on a worker
+# thread: prefetch() starts on the next track early, and play() / advance() only queue a
+# start that update() carries out once the decode has landed, so the main thread never
+# waits on a file. Each start is logged with its delay and main-thread cost.
+class MusicManager:
+    def __init__(self, tracks, channels, volume=0.5, fade_ms=1500):
+        self.tracks = tracks
+        self.channels = [pygame.mixer.Channel(c) for c in channels]
+        self.volume = volume
+        self.fade_ms = fade_ms
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="music")
+        self.decoding = {}   # track index -> Future of its Sound
+        self.index = 0
+        self.active = 0      # channel index playing the current track
+        self.pending = None  # (fade_ms, time queued) of a start waiting on its decode
+        self.transitions = []
+        for channel in self.channels:
+            channel.set_volume(volume)
+
+    def decode(self, index):
+        if index not in self.decoding:
+            self.decoding[index] = self.pool.submit(pygame.mixer.Sound, resource_path(self.tracks[index]))
+        return self.decoding[index]
+
+    def prefetch(self):
+        self.decode((self.index + 1) % len(self.tracks))
+
+    # Current track from the top, cutting whatever is playing
+    def play(self):
+        for channel in self.channels:
+            channel.stop()
+        self.decode(self.index)
+        self.pending = (0, time.perf_counter())
+        self.update()
+
+    # Next track, crossfaded in over the current one
+    def advance(self):
+        self.index = (self.index + 1) % len(self.tracks)
+        for index in list(self.decoding):
+            if index not in (self.index, (self.index + 1) % len(self.tracks)):
+                self.decoding.pop(index).cancel()
+        self.decode(self.index)
+        self.pending = (self.fade_ms, time.perf_counter())
+        self.update()
+
+    def stop(self):
+        self.pending = None
+        for channel in self.channels:
+            channel.stop()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        for channel in self.channels:
+            channel.set_volume(volume)
+
+    def update(self):
+        if not self.pending or not self.decoding[self.index].done():
+            return
+        fade_ms, queued = self.pending
+        self.pending = None
+        start = time.perf_counter()
+        name = self.tracks[self.index]
+        try:
+            sound = self.decoding[self.index].result()
+        except Exception as e:
+            logging.warning(f"Failed to load music {name}: {e}")
+            return
+        old = self.channels[self.active]
+        if fade_ms:
+            old.fadeout(fade_ms)
+            self.active = 1 - self.active
+        self.channels[self.active].play(sound, loops=-1, fade_ms=fade_ms)
+        now = time.perf_counter()
+        self.transitions.append((name, (start - queued) * 1000, (now - start) * 1000))
+        msg = "Music: %s started %.1f ms after request, %.2f ms on the main thread"
+        args = (name, (start - queued) * 1000, (now - start) * 1000)
+        if fade_ms:
+            msg += ", %d ms crossfade"
+            args += (fade_ms,)
+        logging.info(msg, *args)
+
+    def shutdown(self):
+        for decoding in self.decoding.values():
+            decoding.cancel()
+        self.pool.shutdown(wait=False)
+
+    def report(self):
+        if self.transitions:
+            waits = [t[1] for t in self.transitions]
+            costs = [t[2] for t in self.transitions]
+            logging.info(f"Music: {len(self.transitions)} starts, wait max {max(waits):.1f} ms, "
+                         f"main thread max {max(costs):.2f} ms")
+
+# Sound effect voices for one frame at a time. request() only records a trigger; repeats
+# of a name within the frame coalesce into one (their chances combine), and flush() plays
+# at most `max_per_frame` of them, highest priority first. Each plays on a channel from
+# the pool: a free one, or else the oldest voice of equal or lower priority. A name at
+# its voice limit replaces its own oldest voice, as a dedicated channel used to.
+# `voices` maps name -> (priority, voice limit, variation Sounds).
+class SfxScheduler:
+    def __init__(self, channels, voices, max_per_frame=4):
+        self.channels = [pygame.mixer.Channel(c) for c in channels]
+        self.playing = [None] * len(self.channels)   # (name, priority, start frame) per channel
+        self.voices = voices
+        self.max_per_frame = max_per_frame
+        self.frame = 0
+        self.queued = {}     # name -> chance that no request this frame fires
+        self.requested = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.played = 0
+
+    def request(self, name, chance=1.0):
+        self.requested += 1
+        if name in self.queued:
+            self.coalesced += 1
+            self.queued[name] *= 1.0 - chance
+        else:
+            self.queued[name] = 1.0 - chance
+
+    def flush(self):
+        self.frame += 1
+        if not self.queued:
+            return
+        queued = sorted(self.queued.items(), key=lambda item: -self.voices[item[0]][0])
+        self.queued.clear()
+        budget = self.max_per_frame
+        for name, miss in queued:
+            priority, limit, sounds = self.voices[name]
+            if not sounds or (miss > 0.0 and random.random() < miss):
+                continue
+            if budget == 0:
+                self.dropped += 1
+                continue
+            idx = self.allocate(name, priority, limit)
+            if idx is None:
+                self.dropped += 1
+                continue
+            self.channels[idx].play(random.choice(sounds))
+            self.playing[idx] = (name, priority, self.frame)
+            self.played += 1
+            budget -= 1
+
+    # Channel for a new `name` voice, or None when every channel holds something more important
+    def allocate(self, name, priority, limit):
+        free = None
+        own = []
+        stealable = []
+        for idx, channel in enumerate(self.channels):
+            voice = self.playing[idx]
+            if voice is None or not channel.get_busy():
+                self.playing[idx] = None
+                if free is None:
+                    free = idx
+                continue
+            if voice[0] == name:
+                own.append((voice[2], idx))
+            if voice[1] <= priority:
+                stealable.append((voice[2], idx))
+        if len(own) >= limit:
+            return min(own)[1]
+        if free is not None:
+            return free
+        return min(stealable)[1] if stealable else None
+
+    def stop(self):
+        self.queued.clear()
+        for idx, channel in enumerate(self.channels):
+            channel.stop()
+            self.playing[idx] = None
+
+    def stats(self):
+        return {"requested": self.requested, "coalesced": self.coalesced,
+                "dropped": self.dropped, "played": self.played}
+
+    def report(self):
+        logging.info(f"SFX: {self.requested} requested, {self.coalesced} coalesced, "
+                     f"{self.dropped} dropped, {self.played} played on {len(self.channels)} channels")
+
+# Finished sprites (decoded, converted, scaled, masked) from earlier launches, kept in
+# one file: header, index, then raw RGBA pixels. Each entry is keyed by source file and
+# recipe (target size, mask) and carries the source file's digest, so an edited asset or
+# a changed size misses and is rebuilt. The file is memory-mapped and read lazily.
+SPRITE_CACHE_FILE = resource_path("sprite_cache.bin")
+SPRITE_CACHE_MAGIC = b"ESSC"
+SPRITE_CACHE_VERSION = 1
+SPRITE_CACHE_HEADER = "<4sBIf"   # magic, version, entry count, cold build time (ms)
+SPRITE_CACHE_ENTRY = "<H16sHHQ"  # key length, source digest, width, height, pixel offset
+
+class SpriteCache:
+    def __init__(self, path=SPRITE_CACHE_FILE):
+        self.path = path
+        self.entries = {}   # key -> (digest, width, height, offset)
+        self.digests = {}   # filename -> digest of the file on disk, or None if missing
+        self.used = {}      # key -> (digest, width, height, RGBA bytes or cached offset)
+        self.build_ms = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.file = self.map = None
+        try:
+            self.file = open(path, "rb")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.read_index()
+        except (OSError, ValueError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.warning(f"Sprite cache {path} unusable, rebuilding: {e}")
+            self.close()
+            self.entries = {}
+            self.build_ms = 0.0
+
+    def read_index(self):
+        magic, version, count, self.build_ms = struct.unpack_from(SPRITE_CACHE_HEADER, self.map)
+        if magic != SPRITE_CACHE_MAGIC or version != SPRITE_CACHE_VERSION:
+            raise ValueError("not a version 1 sprite cache")
+        pos = struct.calcsize(SPRITE_CACHE_HEADER)
+        entry_size = struct.calcsize(SPRITE_CACHE_ENTRY)
+        for _ in range(count):
+            key_len, digest, width, height, offset = struct.unpack_from(SPRITE_CACHE_ENTRY, self.map, pos)
+            pos += entry_size
+            key = self.map[pos:pos + key_len].decode("utf-8")
+            pos += key_len
+            self.entries[key] = (digest, width, height, offset)
+        for digest, width, height, offset in self.entries.values():
+            if offset + width * height * 4 > len(self.map):
+                raise ValueError("truncated sprite cache")
+
+    def digest(self, filename):
+        if filename not in self.digests:
+            try:
+                with open(resource_path(filename), "rb") as f:
+                    self.digests[filename] = hashlib.blake2b(f.read(), digest_size=16).digest()
+            except OSError:
+                self.digests[filename] = None
+        return self.digests[filename]
+
+    # True when every cached sprite built from `filename` is still current, so the
+    # file itself need not be decoded this launch
+    def covers(self, filename):
+        digest = self.digest(filename)
+        found = False
+        for key, entry in self.entries.items():
+            if key.startswith(filename + "|"):
+                if entry[0] != digest:
+                    return False
+                found = True
+        return found
+
+    # Sprite for (filename, recipe): from the cache when current, otherwise build() it
+    # and queue the result for save(). Missing files (placeholders) are never cached.
+    def sprite(self, filename, recipe, build):
+        digest = self.digest(filename)
+        if digest is None:
+            return build()
+        key = f"{filename}|{recipe}"
+        entry = self.entries.get(key)
+        if entry and entry[0] == digest:
+            _, width, height, offset = entry
+            view = memoryview(self.map)[offset:offset + width * height * 4]
+            surf = pygame.image.frombuffer(view, (width, height), "RGBA").convert_alpha()
+            view.release()
+            self.used[key] = entry
+            self.hits += 1
+            return surf
+        surf = build()
+        self.used[key] = (digest, surf.get_width(), surf.get_height(), pygame.image.tobytes(surf, "RGBA"))
+        self.misses += 1
+        return surf
+
+    # Rewrites the file when anything missed or went stale; entries not used this
+    # launch are dropped. build_ms is the sprite load time of this launch, kept as the
+    # cold baseline when nothing was served from the cache.
+    def save(self, build_ms):
+        if not self.misses and len(self.used) == len(self.entries):
+            return
+        if not self.hits:
+            self.build_ms = build_ms
+        index = bytearray()
+        blobs = []
+        offset = struct.calcsize(SPRITE_CACHE_HEADER)
+        offset += sum(struct.calcsize(SPRITE_CACHE_ENTRY) + len(key.encode("utf-8")) for key in self.used)
+        for key, (digest, width, height, pixels) in self.used.items():
+            if isinstance(pixels, int):
+                pixels = self.map[pixels:pixels + width * height * 4]
+            key_bytes = key.encode("utf-8")
+            index += struct.pack(SPRITE_CACHE_ENTRY, len(key_bytes), digest, width, height, offset)
+            index += key_bytes
+            blobs.append(pixels)
+            offset += len(pixels)
+        self.close()
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(struct.pack(SPRITE_CACHE_HEADER, SPRITE_CACHE_MAGIC, SPRITE_CACHE_VERSION,
+                                    len(self.used), self.build_ms))
+                f.write(index)
+                for pixels in blobs:
+                    f.write(pixels)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Sprite cache saved: {len(self.used)} sprites, {offset} bytes")
+        except OSError as e:
+            logging.warning(f"Failed to save sprite cache: {e}")
+
+    def close(self):
+        if self.map:
+            self.map.close()
+        if self.file:
+            self.file.close()
+        self.file = self.map = None
+
+    def report(self, load_ms):
+        state = "cold" if not self.hits else "warm" if not self.misses else "partial"
+        line = f"Sprite cache {state}: {self.hits} hits, {self.misses} misses, sprites in {load_ms:.1f} ms"
+        if self.hits and self.build_ms:
+            line += f" (cold build {self.build_ms:.1f} ms, {self.build_ms / max(load_ms, 0.001):.1f}x)"
+        logging.info(line)
+
+# Wall-clock length of each startup phase, logged as the phase ends
+class StartupTimer:
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases = []
+
+    def phase(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        logging.info(f"Startup: {name} took {(now - self.last) * 1000:.1f} ms")
+        self.last = now
+
+    def report(self):
+        total = (self.last - self.start) * 1000
+        parts = ", ".join(f"{name} {secs * 1000:.0f}" for name, secs in self.phases)
+        logging.info(f"Startup: first interactive frame after {total:.1f} ms ({parts})")
+
 # Circular mask function (only for powerups)
 def make_circular(img):
     size = img.get_size()
@@ -115,6 +641,416 @@ def make_circular(img):
     circular.blit(mask_surf, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
     return circular
 
+# Pre-baked scale frames for the enemy / mini-boss breathing pulse.
+# Each source surface gets `steps` smoothscaled frames spanning 1 +/- amplitude;
+# the renderer picks the nearest one instead of resampling every frame.
+class PulseCache:
+    def __init__(self, steps=16, max_bytes=24 * 1024 * 1024):
+        self.steps = steps
+        self.max_bytes = max_bytes
+        self.frames = {}
+        self.bytes_used = 0
+
+    # `frames` takes already-scaled frames (e.g. from a SpriteAtlas) instead of baking them
+    def bake(self, img, amplitude, frames=None):
+        if img in self.frames:
+            return
+        w, h = img.get_size()
+        sizes = []
+        for i in range(self.steps):
+            scale = 1.0 - amplitude + 2.0 * amplitude * i / (self.steps - 1)
+            sizes.append((int(w * scale), int(h * scale)))
+        cost = sum(sw * sh * img.get_bytesize() for sw, sh in sizes)
+        if self.bytes_used + cost > self.max_bytes:
+            logging.warning(f"Pulse cache budget exhausted, {w}x{h} sprite will not pulse")
+            return
+        if frames is None:
+            frames = [pygame.transform.smoothscale(img, size) for size in sizes]
+        self.frames[img] = (1.0 - amplitude, 2.0 * amplitude, frames)
+        self.bytes_used += cost
+
+    def frame(self, img, pulse):
+        entry = self.frames.get(img)
+        if entry is None:
+            return img
+        low, span, frames = entry
+        idx = int((pulse - low) / span * (self.steps - 1) + 0.5)
+        return frames[max(0, min(self.steps - 1, idx))]
+
+    def report(self):
+        count = sum(len(entry[2]) for entry in self.frames.values())
+        logging.info(f"Pulse cache: {len(self.frames)} sprites, {count} frames, {self.bytes_used / 1024:.0f} KB")
+
+# Pre-rotated sprite frames at a fixed angular step (asteroids).
+# Each frame carries the offset from the sprite centre to its top-left corner,
+# so drawing is one blit with no Surface or Rect allocation.
+class RotationAtlas:
+    def __init__(self, step_degrees=5):
+        self.step = step_degrees
+        self.count = int(round(360 / step_degrees))
+        self.frames = {}
+        self.bytes_used = 0
+
+    # `rotated` takes already-rotated frames (e.g. from a SpriteAtlas) instead of baking them
+    def bake(self, img, rotated=None):
+        frames = []
+        for i in range(self.count):
+            frame = rotated[i] if rotated else pygame.transform.rotate(img, i * self.step)
+            frames.append((frame, -(frame.get_width() // 2), -(frame.get_height() // 2)))
+            self.bytes_used += frame.get_width() * frame.get_height() * frame.get_bytesize()
+        self.frames[img] = frames
+        return frames
+
+    def frame(self, img, angle):
+        frames = self.frames.get(img)
+        if frames is None:
+            frames = self.bake(img)
+        return frames[int(round(angle / self.step)) % self.count]
+
+    def report(self):
+        logging.info(f"Rotation atlas: {len(self.frames)} sprites x {self.count} angles ({self.step} deg), {self.bytes_used / 1024:.0f} KB")
+
+# Gameplay sprites packed into a few page surfaces. Pages are columns: sprites of similar
+# width are stacked top to bottom in a page just wide enough for them, so each sprite's
+# rows stay close together in memory (the CPU blitter walks them row by row, and a wide
+# sheet would put a full sheet pitch between rows). add() queues a named sprite and
+# pack() builds the pages; after that region(surf) gives the (page, area) to draw it with
+# screen.blit(page, pos, area), sprite(name) hands out a subsurface of the page, and
+# alias() maps another surface onto a packed name. save() / load() keep the pages and
+# index on disk under a signature of everything that went in, so a later launch with
+# the same sprites skips baking and packing.
+SPRITE_ATLAS_FILE = resource_path("sprite_atlas.bin")
+SPRITE_ATLAS_MAGIC = b"ESSA"
+SPRITE_ATLAS_VERSION = 1
+SPRITE_ATLAS_HEADER = "<4sB16sHI"  # magic, version, signature, page count, entry count
+SPRITE_ATLAS_PAGE = "<HHQ"         # width, height, pixel offset
+SPRITE_ATLAS_ENTRY = "<HHHHHH"     # name length, page, x, y, width, height
+
+class SpriteAtlas:
+    def __init__(self, column=16, page_height=4096):
+        self.column = column
+        self.page_height = page_height
+        self.queued = []     # (name, surf) waiting for pack()
+        self.pages = []
+        self.handles = {}    # name -> (page, area)
+        self.by_surface = {}  # surf -> (page, area)
+
+    def add(self, name, surf):
+        self.queued.append((name, surf))
+
+    def pack(self):
+        columns = {}         # width rounded up to `column` -> surfaces, each packed once
+        seen = set()
+        for name, surf in self.queued:
+            w, h = surf.get_size()
+            if surf in seen:
+                continue
+            seen.add(surf)
+            if h > self.page_height:
+                logging.warning(f"Sprite {name} ({w}x{h}) is taller than an atlas page, left unpacked")
+                continue
+            columns.setdefault(-(-w // self.column) * self.column, []).append(surf)
+        placed = {}          # surf -> (page index, area)
+        layout = []          # [width, height] per page
+        for width, surfs in sorted(columns.items()):
+            y = self.page_height
+            for surf in surfs:
+                h = surf.get_height()
+                if y + h > self.page_height:
+                    layout.append([width, 0])
+                    y = 0
+                placed[surf] = (len(layout) - 1, pygame.Rect(0, y, surf.get_width(), h))
+                y += h
+                layout[-1][1] = y
+        self.pages = [pygame.Surface(size, pygame.SRCALPHA).convert_alpha() for size in layout]
+        for surf, (idx, rect) in placed.items():
+            # Max against the zeroed page copies every channel, alpha included, unblended
+            self.pages[idx].blit(surf, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        for name, surf in self.queued:
+            if surf in placed:
+                idx, rect = placed[surf]
+                self.handles[name] = self.by_surface[surf] = (self.pages[idx], rect)
+        self.queued = []
+
+    def alias(self, surf, name):
+        handle = self.handles.get(name)
+        if handle:
+            self.by_surface[surf] = handle
+
+    def sprite(self, name):
+        page, area = self.handles[name]
+        sub = page.subsurface(area)
+        self.by_surface[sub] = (page, area)
+        return sub
+
+    def region(self, surf):
+        return self.by_surface.get(surf) or (surf, None)
+
+    def save(self, path, signature):
+        page_index = {id(page): i for i, page in enumerate(self.pages)}
+        index = bytearray()
+        for name, (page, area) in self.handles.items():
+            name_bytes = name.encode("utf-8")
+            index += struct.pack(SPRITE_ATLAS_ENTRY, len(name_bytes), page_index[id(page)], *area)
+            index += name_bytes
+        offset = (struct.calcsize(SPRITE_ATLAS_HEADER) + len(self.pages) * struct.calcsize(SPRITE_ATLAS_PAGE)
+                  + len(index))
+        page_table = bytearray()
+        for page in self.pages:
+            page_table += struct.pack(SPRITE_ATLAS_PAGE, page.get_width(), page.get_height(), offset)
+            offset += page.get_width() * page.get_height() * 4
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(struct.pack(SPRITE_ATLAS_HEADER, SPRITE_ATLAS_MAGIC, SPRITE_ATLAS_VERSION, signature,
+                                    len(self.pages), len(self.handles)))
+                f.write(page_table)
+                f.write(index)
+                for page in self.pages:
+                    f.write(pygame.image.tobytes(page, "RGBA"))
+            os.replace(tmp_path, path)
+            logging.info(f"Sprite atlas saved: {len(self.handles)} sprites on {len(self.pages)} pages, {offset} bytes")
+        except OSError as e:
+            logging.warning(f"Failed to save sprite atlas: {e}")
+
+    # Atlas from `path`, or None when it is missing, unreadable or was packed from
+    # different sprites than `signature` describes
+    @classmethod
+    def load(cls, path, signature):
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, stored, page_count, entry_count = struct.unpack_from(SPRITE_ATLAS_HEADER, data)
+                if magic != SPRITE_ATLAS_MAGIC or version != SPRITE_ATLAS_VERSION or stored != signature:
+                    return None
+                atlas = cls()
+                pos = struct.calcsize(SPRITE_ATLAS_HEADER)
+                for _ in range(page_count):
+                    width, height, offset = struct.unpack_from(SPRITE_ATLAS_PAGE, data, pos)
+                    pos += struct.calcsize(SPRITE_ATLAS_PAGE)
+                    if offset + width * height * 4 > len(data):
+                        raise ValueError("truncated sprite atlas")
+                    view = memoryview(data)[offset:offset + width * height * 4]
+                    atlas.pages.append(pygame.image.frombuffer(view, (width, height), "RGBA").convert_alpha())
+                    view.release()
+                for _ in range(entry_count):
+                    name_len, idx, x, y, w, h = struct.unpack_from(SPRITE_ATLAS_ENTRY, data, pos)
+                    pos += struct.calcsize(SPRITE_ATLAS_ENTRY)
+                    name = data[pos:pos + name_len].decode("utf-8")
+                    pos += name_len
+                    atlas.handles[name] = (atlas.pages[idx], pygame.Rect(x, y, w, h))
+                return atlas
+        except (OSError, ValueError, IndexError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.warning(f"Sprite atlas {path} unusable, repacking: {e}")
+            return None
+
+    def report(self):
+        pixels = sum(page.get_width() * page.get_height() for page in self.pages)
+        used = sum(w * h for _, _, _, w, h in {(id(page), *area) for page, area in self.handles.values()})
+        logging.info(f"Sprite atlas: {len(self.handles)} sprites on {len(self.pages)} pages, "
+                     f"{pixels * 4 / 1024:.0f} KB, {used * 100 / max(1, pixels):.0f}% filled")
+
+# Reusable effect surfaces. filled() hands out one surface per (size, flags, colour),
+# filled once on creation, so callers must only blit it. bake_alpha() stores faded
+# copies of an image across an alpha range and faded() picks the nearest, instead of
+# copy() + set_alpha every frame. allocations counts every surface the pool created;
+# in a steady render loop it should stop moving.
+class SurfacePool:
+    def __init__(self, alpha_steps=16):
+        self.alpha_steps = alpha_steps
+        self.surfaces = {}
+        self.variants = {}
+        self.allocations = 0
+        self.hits = 0
+        self.bytes_used = 0
+
+    def filled(self, size, color, flags=0):
+        key = (size[0], size[1], flags, tuple(color))
+        surf = self.surfaces.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, flags)
+            surf.fill(color)
+            self.surfaces[key] = surf
+            self.allocations += 1
+            self.bytes_used += surf.get_pitch() * surf.get_height()
+        else:
+            self.hits += 1
+        return surf
+
+    def bake_alpha(self, img, low, high):
+        if img in self.variants:
+            return
+        frames = []
+        for i in range(self.alpha_steps):
+            faded = img.copy()
+            faded.set_alpha(low + (high - low) * i // (self.alpha_steps - 1))
+            frames.append(faded)
+            self.bytes_used += faded.get_pitch() * faded.get_height()
+        self.allocations += self.alpha_steps
+        self.variants[img] = (low, high - low, frames)
+
+    def faded(self, img, alpha):
+        entry = self.variants.get(img)
+        if entry is None:
+            self.bake_alpha(img, 0, 255)
+            entry = self.variants[img]
+        else:
+            self.hits += 1
+        low, span, frames = entry
+        idx = int((alpha - low) / span * (self.alpha_steps - 1) + 0.5)
+        return frames[max(0, min(self.alpha_steps - 1, idx))]
+
+    def report(self):
+        logging.info(f"Surface pool: {len(self.surfaces)} filled, {len(self.variants)} faded sprites, "
+                     f"{self.allocations} allocations, {self.hits} reuses, {self.bytes_used / 1024:.0f} KB")
+
+# Uniform-grid broadphase for collision queries.
+# Rebuilt once per tick; query results come back in the original list order so
+# "first hit wins" behaves exactly like the old linear scans.
+class SpatialHash:
+    def __init__(self, cell_size=96):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.items = []
+        self.index = {}
+        self.dead = set()
+
+    def clear(self):
+        self.cells.clear()
+        self.items.clear()
+        self.index.clear()
+        self.dead.clear()
+
+    def rebuild(self, items):
+        self.clear()
+        for item in items:
+            self.insert(item)
+
+    def insert(self, item):
+        idx = len(self.items)
+        self.items.append(item)
+        self.index[id(item)] = idx
+        rect = item.rect
+        cs = self.cell_size
+        cells = self.cells
+        for cx in range(rect.left // cs, (rect.right - 1) // cs + 1):
+            for cy in range(rect.top // cs, (rect.bottom - 1) // cs + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [idx]
+                else:
+                    bucket.append(idx)
+
+    def remove(self, item):
+        # Entities don't move during the collision pass, so a tombstone is enough
+        idx = self.index.get(id(item))
+        if idx is not None:
+            self.dead.add(idx)
+
+    def _candidates(self, left, top, right, bottom):
+        cs = self.cell_size
+        cells = self.cells
+        dead = self.dead
+        seen = set()
+        for cx in range(left // cs, (right - 1) // cs + 1):
+            for cy in range(top // cs, (bottom - 1) // cs + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for idx in bucket:
+                        if idx not in dead:
+                            seen.add(idx)
+        return sorted(seen)
+
+    def query_rect(self, rect):
+        items = self.items
+        return [items[i] for i in self._candidates(rect.left, rect.top, rect.right, rect.bottom)
+                if rect.colliderect(items[i].rect)]
+
+    def first_rect(self, rect):
+        hits = self.query_rect(rect)
+        return hits[0] if hits else None
+
+    def query_radius(self, center, radius):
+        cx, cy = center
+        r = int(math.ceil(radius))
+        items = self.items
+        return [items[i] for i in self._candidates(cx - r, cy - r, cx + r + 1, cy + r + 1)
+                if math.dist(center, items[i].rect.center) < radius]
+
+# Cached text for one font.
+# surface() keeps whole rendered strings (labels, names, menu text) in a bounded cache.
+# draw() composes changing text (scores, timers, counters) glyph by glyph out of a
+# per-colour atlas, so it is just blits: no font.render and no new surfaces per frame.
+class TextCache:
+    CHARSET = string.digits + string.ascii_letters + string.punctuation + " "
+
+    def __init__(self, font, max_strings=256):
+        self.font = font
+        self.max_strings = max_strings
+        self.strings = {}
+        self.atlases = {}
+        self.advance = {ch: font.size(ch)[0] for ch in self.CHARSET}
+        self.height = font.get_height()
+
+    # Whole string, rendered once per (text, colour); oldest entries are dropped first
+    def surface(self, text, color):
+        key = (text, color)
+        surf = self.strings.get(key)
+        if surf is None:
+            if len(self.strings) >= self.max_strings:
+                del self.strings[next(iter(self.strings))]
+            surf = self.font.render(text, True, color)
+            self.strings[key] = surf
+        return surf
+
+    def atlas(self, color):
+        entry = self.atlases.get(color)
+        if entry is None:
+            glyphs = [self.font.render(ch, True, color) for ch in self.CHARSET]
+            sheet = pygame.Surface((sum(g.get_width() for g in glyphs), self.height), pygame.SRCALPHA)
+            areas = {}
+            x = 0
+            for ch, glyph in zip(self.CHARSET, glyphs):
+                # RGBA_MAX onto the cleared sheet copies the glyph pixels exactly
+                sheet.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                areas[ch] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+                x += glyph.get_width()
+            entry = (sheet, areas)
+            self.atlases[color] = entry
+        return entry
+
+    def width(self, text):
+        advance = self.advance
+        total = 0
+        for ch in text:
+            if ch not in advance:
+                return self.font.size(text)[0]
+            total += advance[ch]
+        return total
+
+    # Glyph-composed text at pos (top-left); returns the drawn width
+    def draw(self, screen, text, color, pos):
+        sheet, areas = self.atlas(color)
+        for ch in text:
+            if ch not in areas:
+                surf = self.surface(text, color)
+                screen.blit(surf, pos)
+                return surf.get_width()
+        x, y = pos
+        seq = []
+        for ch in text:
+            area = areas[ch]
+            seq.append((sheet, (x, y), area))
+            x += area.width
+        screen.blits(seq, False)
+        return x - pos[0]
+
+    # Static label from the string cache followed by a glyph-composed value
+    def draw_label(self, screen, label, value, color, pos):
+        surf = self.surface(label, color)
+        screen.blit(surf, pos)
+        return surf.get_width() + self.draw(screen, value, color, (pos[0] + surf.get_width(), pos[1]))
+
 # Button class
 class Button:
     def __init__(self, rect, text, action, font):
@@ -126,6 +1062,7 @@ class Button:
         self.hover_color = (120, 120, 120)
         self.selected_color = (0, 200, 255)
         self.text_color = (255, 255, 255)
+        self.text_surf = None
 
     def draw(self, screen, is_selected=False):
         mouse_pos = pygame.mouse.get_pos()
@@ -137,608 +1074,2469 @@ class Button:
             color = self.normal_color
         pygame.draw.rect(screen, color, self.rect, border_radius=20)
         pygame.draw.rect(screen, (255, 255, 255), self.rect, 6, border_radius=20)
-        text_surf = self.font.render(self.text, True, self.text_color)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        screen.blit(text_surf, text_rect)
+        if self.text_surf is None:
+            self.text_surf = self.font.render(self.text, True, self.text_color)
+        text_rect = self.text_surf.get_rect(center=self.rect.center)
+        screen.blit(self.text_surf, text_rect)
 
     def check_click(self, pos):
         return self.rect.collidepoint(pos)
 
-def main():
-    global leaderboard, high_score
+# Entities
+# Positions are stored as floats (top-left corner) so fractional speeds
+# accumulate properly. The Rect is only synced when something asks for it
+# (collision tests, blitting) and must not be moved directly.
+# Construction goes through reset(), which is also how an EntityPool re-arms a
+# recycled instance in place, Rect included.
+class Entity:
+    __slots__ = ("x", "y", "px", "py", "_rect", "alive")
 
-    input_text = ""
+    def __init__(self, *args, **kwargs):
+        self._rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(*args, **kwargs)
 
-    try:
-        pygame.init()
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        logging.info("Pygame and mixer initialized successfully")
-    except Exception as e:
-        logging.critical(f"Pygame init failed: {e}\n{traceback.format_exc()}")
-        sys.exit(1)
-    
-    SCREEN_WIDTH = 800
-    SCREEN_HEIGHT = 900
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Eagle Strike")
-    
-    clock = pygame.time.Clock()
-    FPS = 60
-    
-    music_volume = 0.5
-    sfx_volume = 0.7
-    
-    BASE_FIRE_RATE_MS = 220
-    MAX_ENEMY_PROJECTILES = 50
-    
-    player_normal = load_image("eagle1_normal.png", (60, 90))
-    player_boost = load_image("eagle1_boost.png", (60, 90))
-    player_damaged = load_image("eagle1_damaged.png", (60, 90))
-    
-    missile_img = load_image("missle.png", (10, 30))
-    
-    terminid_imgs = [
-        load_image("terminid.png", (50, 70)),
-        load_image("terminid1.png", (50, 70)),
-        load_image("terminid2.png", (50, 70)),
-        load_image("hunter.png", (50, 70)),
-        load_image("hunter1.png", (50, 70)),
-        load_image("hunter2.png", (50, 70))
-    ]
-    
-    automaton_imgs = [
-        load_image("automaton.png", (50, 70)),
-        load_image("automaton1.png", (50, 70)),
-        load_image("automaton2.png", (50, 70))
-    ]
-    
-    illuminate_imgs = [
-        load_image("illuminate.png", (50, 70)),
-        load_image("illuminate1.png", (50, 70)),
-        load_image("illuminate2.png", (50, 70))
-    ]
-    
-    enemy_blast_imgs = [
-        load_image("enemy_blast1.png", (15, 40)),
-        load_image("enemy_blast2.png", (15, 40)),
-        load_image("enemy_blast3.png", (15, 40))
-    ]
-    
-    asteroid_imgs = [
-        load_image("aster1.png", (70, 70)),
-        load_image("aster2.png", (70, 70)),
-        load_image("aster3.png", (70, 70)),
-        load_image("aster4.png", (70, 70)),
-        load_image("aster5.png", (70, 70)),
-        load_image("aster6.png", (70, 70))
-    ]
-    
-    BOSS_SCALE = (140, 210)
-    boss_types = [
-        {
-            "name": "CHARGER",
-            "normal": load_image("boss_charger_normal.png", BOSS_SCALE),
-            "damaged": load_image("boss_charger_damaged.png", BOSS_SCALE),
-            "hp_mult": 1.0,
-            "speed_mult": 1.0,
-            "fire_pattern": "wide_spread",
-            "special": None
-        },
-        {
-            "name": "BROOD",
-            "normal": load_image("boss_brood_normal.png", BOSS_SCALE),
-            "damaged": load_image("boss_brood_damaged.png", BOSS_SCALE),
-            "hp_mult": 1.05,
-            "speed_mult": 0.9,
-            "fire_pattern": "swarm_call",
-            "special": "spawn_minis"
-        },
-        {
-            "name": "SUMMONER",
-            "normal": load_image("boss_summoner_normal.png", BOSS_SCALE),
-            "damaged": load_image("boss_summoner_damaged.png", BOSS_SCALE),
-            "hp_mult": 1.1,
-            "speed_mult": 0.8,
-            "fire_pattern": "add_waves",
-            "special": "heavy_adds"
-        },
-        {
-            "name": "FORTRESS",
-            "normal": load_image("boss_fortress_normal.png", BOSS_SCALE),
-            "damaged": load_image("boss_fortress_damaged.png", BOSS_SCALE),
-            "hp_mult": 1.2,
-            "speed_mult": 0.7,
-            "fire_pattern": "shield_beams",
-            "special": "invuln_phases"
-        }
-    ]
-    
-    # Fallback
-    fallback_normal = load_image("boss_normal.png", BOSS_SCALE)
-    fallback_damaged = load_image("boss_damaged.png", BOSS_SCALE)
-    for bt in boss_types:
-        if bt["normal"].get_width() <= 1:
-            bt["normal"] = fallback_normal
-        if bt["damaged"].get_width() <= 1:
-            bt["damaged"] = fallback_damaged
-    
-    mini_var1_normal = load_image("boss11.png", (70, 105))
-    mini_var1_damaged = load_image("boss12.png", (70, 105))
-    mini_var2_normal = load_image("boss21.png", (75, 112))
-    mini_var2_damaged = load_image("boss22.png", (75, 112))
-    mini_var3_normal = load_image("boss31.png", (65, 97))
-    mini_var3_damaged = load_image("boss32.png", (65, 97))
-    
-    mini_boss_types = [
-        {
-            "normal": mini_var1_normal,
-            "damaged": mini_var1_damaged,
-            "health_base": 300,
-            "speed": 3.8,
-            "fire_threshold_base": 110,
-            "offsets": [-20, 0, 20]
-        },
-        {
-            "normal": mini_var2_normal,
-            "damaged": mini_var2_damaged,
-            "health_base": 400,
-            "speed": 3.4,
-            "fire_threshold_base": 100,
-            "offsets": [-40, -20, 0, 20, 40]
-        },
-        {
-            "normal": mini_var3_normal,
-            "damaged": mini_var3_damaged,
-            "health_base": 350,
-            "speed": 4.2,
-            "fire_threshold_base": 110,
-            "offsets": [-25, -10, 10, 25]
-        }
-    ]
-    
-    dropship_imgs = [
-        load_image("dropship.png", (100, 150)),
-        load_image("dropship1.png", (100, 150)),
-        load_image("dropship2.png", (100, 150))
-    ]
-    
-    lives_icon = load_image("lives_icon.png", (25, 25))
-    
-    raw_powerup_imgs = {
-        "rapid": load_image("powerup_rapid.png"),
-        "shield": load_image("powerup_shield.png"),
-        "life": load_image("powerup_extra_life.png"),
-        "bomb": load_image("powerup_extra_power_bomb.png"),
-        "triple": load_image("trishot.png")
-    }
-    
-    drop_powerup_imgs = {k: make_circular(pygame.transform.scale(v, (30, 30))) for k, v in raw_powerup_imgs.items()}
-    hud_powerup_imgs = {k: make_circular(pygame.transform.scale(v, (35, 35))) for k, v in raw_powerup_imgs.items()}
-    
-    shield_overlay = load_image("shield.png", (80, 110))
-    shield_large = pygame.transform.smoothscale(shield_overlay, (int(80 * 1.3), int(110 * 1.3)))
-    
-    shoot_sounds = [load_sound("Player_shoot1.wav"), load_sound("Player_shoot2.wav")]
-    shoot_sounds = [s for s in shoot_sounds if s is not None]
-    
-    hit_sounds = [load_sound("Player_hit.wav"), load_sound("Player_hit2.wav")]
-    hit_sounds = [s for s in hit_sounds if s is not None]
-    
-    explosion_sounds = [load_sound("explosion1.wav"), load_sound("explosion2.wav")]
-    explosion_sounds = [s for s in explosion_sounds if s is not None]
-    
-    boost_sound = load_sound("boost.wav")
-    
-    eagle_strike_sound = load_sound("Eagle_strike_activation.wav")
-    
-    pickup_sounds = []
-    for i in range(1, 7):
-        s = load_sound(f"power_up{i}.wav")
-        if s:
-            pickup_sounds.append(s)
-    
-    for s in all_sfx:
-        if s:
-            s.set_volume(sfx_volume)
-    
-    music_tracks = [f"background_music{i}.wav" for i in range(1, 11)]
-    current_music_index = 0
-    
-    def load_current_music():
-        path = resource_path(music_tracks[current_music_index])
-        try:
-            pygame.mixer.music.load(path)
-            pygame.mixer.music.set_volume(music_volume)
-            pygame.mixer.music.play(-1)
-        except Exception as e:
-            logging.warning(f"Failed to load music {music_tracks[current_music_index]}: {e}")
-    
-    load_current_music()
-    
-    def cycle_music():
-        pygame.mixer.music.stop()
-        nonlocal current_music_index
-        current_music_index = (current_music_index + 1) % len(music_tracks)
-        load_current_music()
-    
-    def spawn_powerup(center_pos, force_drop=False, event_bonus=False, stage_bonus=False):
-        drop_chance = 0.2
-        if combo_count > 5:
-            drop_chance += 0.2
-        if combo_count > 10:
-            drop_chance += 0.3
-        if combo_count > 15:
-            drop_chance = 1.0
-        if event_bonus:
-            drop_chance = min(1.0, drop_chance + 0.3)
-        if stage_bonus:
-            drop_chance = min(1.0, drop_chance + 0.15)
-        if force_drop or random.random() < drop_chance:
-            types = ["rapid", "shield", "triple", "bomb", "life"]
-            ptype = random.choice(types)
-            img = drop_powerup_imgs[ptype]
-            rect = img.get_rect(center=center_pos)
-            phase = random.random() * math.tau
-            powerups.append({"rect": rect, "img": img, "type": ptype, "phase": phase})
-    
-    player_rect = player_normal.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
-    player_speed = 5.5
-    BOOST_MULTIPLIER = 1.9
-    lives = 3
-    invincibility_frames = 0
-    score = 0
-    
-    boost_meter = 100.0
-    max_boost = 100.0
-    boost_drain_rate = 25.0
-    boost_recharge_rate = 20.0
-    low_boost_threshold = 20.0
-    
-    eagle_meter = 100.0
-    max_eagle = 100.0
-    eagle_recharge_rate = 8.0
-    
-    rapid_timer = 0.0
-    triple_timer = 0.0
-    shield_active = False
-    bomb_charges = 0
-    max_bomb_charges = 3
-    last_bomb_time = 0
-    BOMB_COOLDOWN_MS = 500
-    
-    next_boss_threshold = 20000
-    boss_cooldown = 0
-    boss = None
-    
-    missiles = []
-    enemy_projectiles = []
-    enemies = []
-    asteroids = []
-    powerups = []
-    mini_bosses = []
-    dropships = []
-    
-    current_stage = 0
-    stage_transition_timer = 0
-    STAGE_MILESTONE = 15000
-    
-    current_event = None
-    event_timer = 0
-    event_duration = 1800
-    last_event_score = 0
-    event_check_timer = 0
-    
-    enemy_spawn_timer = 0
-    asteroid_spawn_timer = 0
-    formation_timer = 0
-    spawn_pause_timer = 0
-    mini_cooldown = 0
-    mini_warning_timer = 0
-    
-    MISSILE_SPEED = 14
-    ENEMY_PROJECTILE_SPEED = 5.5
-    
-    last_fire_time = 0
-    FIRE_DEADZONE = 0.3
-    
-    boss_warning_timer = 0
-    
-    stars = [{'x': random.randint(0, SCREEN_WIDTH),
-              'y': random.randint(0, SCREEN_HEIGHT),
-              'speed': random.uniform(0.8, 3.5),
-              'size': random.choice([1, 2])} for _ in range(120)]
-    
-    tint_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    
-    joystick = None
-    def init_joystick():
-        nonlocal joystick
-        if pygame.joystick.get_count() > 0:
-            try:
-                joystick = pygame.joystick.Joystick(0)
-                joystick.init()
-                logging.info(f"Controller connected: {joystick.get_name()}")
-                return True
-            except pygame.error as e:
-                logging.warning(f"Joystick init failed: {e}")
-                joystick = None
-                return False
-        return False
-    
-    init_joystick() or logging.info("No controller detected - keyboard mode")
-    
-    font_small = pygame.font.SysFont("arial", 12, bold=True)
-    font_hud = pygame.font.SysFont("arial", 16, bold=True)
-    font_score = pygame.font.SysFont("arial", 20, bold=True)
-    font_gameover = pygame.font.SysFont("arial", 50, bold=True)
-    font_menu_button = pygame.font.SysFont("arial", 36, bold=True)
-    font_title = pygame.font.SysFont("arial", 42, bold=True)
-    font_large = pygame.font.SysFont("arial", 60, bold=True)
-    
-    shoot_channel = pygame.mixer.Channel(0)
-    explosion_channel = pygame.mixer.Channel(1)
-    hit_channel = pygame.mixer.Channel(2)
-    boost_channel = pygame.mixer.Channel(3)
-    
-    current_state = "menu"
-    previous_state = "menu"
-    selected_index = 0
-    
-    button_width = 320
-    button_height = 80
-    center_x = SCREEN_WIDTH // 2 - button_width // 2
-    small_w = 60
-    small_h = 60
-    
-    CONTROLLER_SELECT = 0
-    CONTROLLER_CANCEL = 1
-    CONTROLLER_PAUSE = 9
-    
-    menu_stick_delay = 0
-    MENU_STICK_REPEAT = 10
-    
-    def change_music_volume(delta):
-        nonlocal music_volume
-        music_volume = round(max(0.0, min(1.0, music_volume + delta)), 1)
-        pygame.mixer.music.set_volume(music_volume)
-    
-    def change_sfx_volume(delta):
-        nonlocal sfx_volume
-        sfx_volume = round(max(0.0, min(1.0, sfx_volume + delta)), 1)
-        for s in all_sfx:
-            if s:
-                s.set_volume(sfx_volume)
-    
-    combo_count = 0
-    combo_timer = 0.0
-    total_kills = 0
-    boss_kills = 0
-    mini_boss_kills = 0
-    achievement_popup = None
+    def reset(self, img, center):
+        w, h = img.get_size()
+        rect = self._rect
+        rect.width = w
+        rect.height = h
+        self.x = self.px = float(center[0] - w // 2)
+        self.y = self.py = float(center[1] - h // 2)
+        self.alive = True
 
-    ACHIEVEMENTS = [
-        {"id": "kills_100", "name": "CENTURION", "desc": "Destroy 100 enemies"},
-        {"id": "kills_500", "name": "DESTROYER", "desc": "Destroy 500 enemies"},
-        {"id": "kills_1000", "name": "APOCALYPSE", "desc": "Destroy 1,000 enemies"},
-        {"id": "boss_1", "name": "FIRST STRIKE", "desc": "Defeat your first boss"},
-        {"id": "boss_5", "name": "LEGENDARY PILOT", "desc": "Defeat 5 bosses"},
-        {"id": "combo_10", "name": "CHAIN MASTER", "desc": "Reach a 10x combo"},
-        {"id": "combo_20", "name": "UNSTOPPABLE", "desc": "Reach a 20x combo"},
-    ]
+    @property
+    def rect(self):
+        rect = self._rect
+        rect.x = int(self.x)
+        rect.y = int(self.y)
+        return rect
 
-    def add_score(base_points):
-        nonlocal score, combo_count
-        multiplier = min(4.0, 1.0 + combo_count * 0.25)
+    # Top-left for rendering, interpolated between the previous and current tick
+    def draw_pos(self, alpha):
+        return (int(self.px + (self.x - self.px) * alpha), int(self.py + (self.y - self.py) * alpha))
+
+    @property
+    def width(self):
+        return self._rect.width
+
+    @property
+    def height(self):
+        return self._rect.height
+
+class Missile(Entity):
+    __slots__ = ("dx", "dy", "slot")
+
+    def reset(self, img, center, dx, dy):
+        Entity.reset(self, img, center)
+        self.dx = dx
+        self.dy = dy
+        self.slot = -1
+
+# Free list for one entity class. acquire() hands back a released instance re-armed
+# through reset() when there is one, else constructs a new one; release() takes it
+# back on despawn. Each instance must be released once, after it has left every list.
+class EntityPool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.hits += 1
+        else:
+            obj = self.cls(*args, **kwargs)
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        for obj in objs:
+            self.release(obj)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"in_use": self.in_use, "free": len(self.free), "high_water": self.high_water,
+                "hit_rate": round(self.hit_rate(), 4)}
+
+# Fixed-capacity ring of entities in spawn order (player missiles). append() is O(1)
+# and evicts the oldest entry when the ring is full; remove() clears the entity's slot
+# in O(1) and tolerates entities that are already gone. Iterating walks the ring in
+# order, skipping cleared slots, without copying, so removing while iterating is safe.
+class EntityRing:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0   # running index of the oldest slot in use
+        self.tail = 0   # running index of the next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        slots = self.slots
+        capacity = self.capacity
+        for i in range(self.head, self.tail):
+            item = slots[i % capacity]
+            if item is not None:
+                yield item
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+        self.head = self.tail = self.count = 0
+
+    # Returns the entity evicted to make room, if any
+    def append(self, item):
+        evicted = None
+        if self.tail - self.head == self.capacity:
+            idx = self.head % self.capacity
+            evicted = self.slots[idx]
+            self._release(idx)
+        idx = self.tail % self.capacity
+        self.slots[idx] = item
+        item.slot = idx
+        self.tail += 1
+        self.count += 1
+        return evicted
+
+    # True if the entity was in the ring
+    def remove(self, item):
+        idx = item.slot
+        if 0 <= idx < self.capacity and self.slots[idx] is item:
+            self._release(idx)
+            return True
+        return False
+
+    def _release(self, idx):
+        self.slots[idx] = None
+        self.count -= 1
+        slots = self.slots
+        while self.head < self.tail and slots[self.head % self.capacity] is None:
+            self.head += 1
+
+class Enemy(Entity):
+    __slots__ = ("img", "speed", "wiggle", "kind", "fire_timer", "formation", "bob_phase")
+
+    def reset(self, img, center, speed, wiggle, kind, fire_timer, bob_phase, formation=False):
+        Entity.reset(self, img, center)
+        self.img = img
+        self.speed = speed
+        self.wiggle = wiggle
+        self.kind = kind
+        self.fire_timer = fire_timer
+        self.formation = formation
+        self.bob_phase = bob_phase
+
+class Asteroid(Entity):
+    __slots__ = ("img", "speed", "rotation", "rot_speed")
+
+    def reset(self, img, center, speed, rot_speed):
+        Entity.reset(self, img, center)
+        self.img = img
+        self.speed = speed
+        self.rotation = 0.0
+        self.rot_speed = rot_speed
+
+class PowerUp(Entity):
+    __slots__ = ("img", "kind", "phase")
+
+    def reset(self, img, center, kind, phase):
+        Entity.reset(self, img, center)
+        self.img = img
+        self.kind = kind
+        self.phase = phase
+
+class Dropship(Entity):
+    __slots__ = ("frame", "timer", "mb_type")
+
+    def reset(self, img, center, mb_type):
+        Entity.reset(self, img, center)
+        self.frame = 0
+        self.timer = 0
+        self.mb_type = mb_type
+
+class MiniBoss(Entity):
+    __slots__ = ("normal_img", "damaged_img", "health", "max_health", "phase", "direction",
+                 "speed", "fire_timer", "fire_threshold", "pattern")
+
+    def reset(self, mb_type, center, health, direction, fire_timer):
+        Entity.reset(self, mb_type["normal"], center)
+        self.normal_img = mb_type["normal"]
+        self.damaged_img = mb_type["damaged"]
+        self.health = health
+        self.max_health = health
+        self.phase = 1
+        self.direction = direction
+        self.speed = mb_type["speed"]
+        self.fire_timer = fire_timer
+        self.fire_threshold = mb_type["fire_threshold_base"]
+        self.pattern = mb_type["pattern"]
+
+class Boss(Entity):
+    __slots__ = ("health", "max_health", "type_idx", "direction", "speed", "fire_timer",
+                 "phase", "vertical_phase", "special_timer", "invuln")
+
+    def reset(self, img, center, health, type_idx, speed):
+        Entity.reset(self, img, center)
+        self.health = health
+        self.max_health = health
+        self.type_idx = type_idx
+        self.direction = 1
+        self.speed = speed
+        self.fire_timer = 0
+        self.phase = 1
+        self.vertical_phase = 0.0
+        self.special_timer = 0
+        self.invuln = False
+
+# Enemy bullets: position, velocity, sprite index and lifetime live in flat
+# NumPy arrays (a window of live slots, oldest first) and are advanced,
+# culled and hit-tested with vectorized ops.
+class BulletEngine:
+    def __init__(self, sprites, capacity, bounds, rng=random):
+        self.sprites = sprites
+        self.capacity = capacity
+        self.bounds = bounds
+        self.rng = rng
+        # Live bullets are the window [start, start + count) of buffers twice the
+        # capacity, oldest first. Evicting the oldest just advances start; the window
+        # slides back to 0 only when it reaches the end, once per `capacity` spawns.
+        self.start = 0
+        self.count = 0
+        size = 2 * capacity
+        self.pos = np.zeros((size, 2), np.float32)
+        self.prev = np.zeros((size, 2), np.float32)
+        self.vel = np.zeros((size, 2), np.float32)
+        self.sprite = np.zeros(size, np.int16)
+        self.life = np.zeros(size, np.int32)
+        self.half = np.array([(s.get_width() / 2, s.get_height() / 2) for s in sprites], np.float32)
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def live(self):
+        return slice(self.start, self.start + self.count)
+
+    def spawn(self, xs, ys, vxs, vys, life=600):
+        k = len(xs)
+        if k == 0:
+            return
+        if k > self.capacity:
+            xs, ys, vxs, vys = xs[-self.capacity:], ys[-self.capacity:], vxs[-self.capacity:], vys[-self.capacity:]
+            k = self.capacity
+        overflow = self.count + k - self.capacity
+        if overflow > 0:
+            # Drop the oldest bullets to make room, like the old pop(0)
+            self.start += overflow
+            self.count -= overflow
+        if self.start + self.count + k > len(self.life):
+            live = self.live()
+            for arr in (self.pos, self.prev, self.vel, self.sprite, self.life):
+                arr[:self.count] = arr[live]
+            self.start = 0
+        begin = self.start + self.count
+        end = begin + k
+        self.pos[begin:end, 0] = xs
+        self.pos[begin:end, 1] = ys
+        self.prev[begin:end] = self.pos[begin:end]
+        self.vel[begin:end, 0] = vxs
+        self.vel[begin:end, 1] = vys
+        self.sprite[begin:end] = [self.rng.randrange(len(self.sprites)) for _ in range(k)]
+        self.life[begin:end] = life
+        self.count += k
+
+    def update(self):
+        if self.count == 0:
+            return
+        live = self.live()
+        pos = self.pos[live]
+        self.prev[live] = pos
+        pos += self.vel[live]
+        life = self.life[live]
+        life -= 1
+        width, height = self.bounds
+        alive = ((life > 0) & (pos[:, 0] > -40) & (pos[:, 0] < width + 40)
+                 & (pos[:, 1] > -80) & (pos[:, 1] < height + 40))
+        if not alive.all():
+            keep = np.flatnonzero(alive) + self.start
+            k = len(keep)
+            for arr in (self.pos, self.prev, self.vel, self.sprite, self.life):
+                arr[self.start:self.start + k] = arr[keep]
+            self.count = k
+
+    # Index of the first live bullet overlapping rect, relative to the oldest; -1 if none
+    def first_hit(self, rect):
+        if self.count == 0:
+            return -1
+        live = self.live()
+        half = self.half[self.sprite[live]]
+        pos = self.pos[live]
+        hits = ((np.abs(pos[:, 0] - rect.centerx) < half[:, 0] + rect.width / 2)
+                & (np.abs(pos[:, 1] - rect.centery) < half[:, 1] + rect.height / 2))
+        if not hits.any():
+            return -1
+        return int(np.argmax(hits))
+
+    # Retire in place: parked off-screen with no life left, so it can no longer hit or
+    # show, and the next update() drops it in its normal compaction
+    def remove(self, idx):
+        i = self.start + idx
+        self.pos[i] = self.prev[i] = (-1000.0, -1000.0)
+        self.life[i] = 0
+
+    # With a SpriteAtlas the bullets go out as area blits from its pages
+    def draw(self, screen, alpha=1.0, atlas=None):
+        if self.count == 0:
+            return
+        live = self.live()
+        sprite_ids = self.sprite[live]
+        prev = self.prev[live]
+        corners = (prev + (self.pos[live] - prev) * alpha - self.half[sprite_ids]).astype(np.int32).tolist()
+        if atlas:
+            regions = [atlas.region(s) for s in self.sprites]
+            screen.blits([(regions[s][0], c, regions[s][1]) for s, c in zip(sprite_ids.tolist(), corners)], doreturn=False)
+            return
+        sprites = self.sprites
+        screen.blits([(sprites[s], c) for s, c in zip(sprite_ids.tolist(), corners)], doreturn=False)
+
+    # Emitters. A pattern spec is a dict with a "kind" plus per-kind settings;
+    # `tick` is the emitter's own clock, used to rotate spirals and shift waves.
+    def emit(self, spec, x, y, target, tick):
+        kind = spec["kind"]
+        speed = spec.get("speed", 5.5)
+        if kind == "fan":
+            offsets = np.asarray(spec["offsets"], np.float32)
+            xs = np.clip(x + offsets, 30, self.bounds[0] - 30)
+            self.spawn(xs, np.full(len(xs), y, np.float32), np.zeros(len(xs), np.float32), np.full(len(xs), speed, np.float32))
+        elif kind == "radial":
+            count = spec["count"]
+            angles = np.arange(count, dtype=np.float32) * (math.tau / count) + tick * spec.get("turn", 0.0)
+            self._emit_angles(x, y, angles, speed)
+        elif kind == "aimed":
+            count = spec.get("count", 1)
+            base = math.atan2(target[1] - y, target[0] - x)
+            spread = spec.get("spread", 0.0)
+            angles = base + (np.arange(count, dtype=np.float32) - (count - 1) / 2) * spread
+            self._emit_angles(x, y, angles, speed)
+        elif kind == "spiral":
+            arms = spec.get("arms", 1)
+            angles = tick * spec["turn"] + np.arange(arms, dtype=np.float32) * (math.tau / arms)
+            self._emit_angles(x, y, angles, speed)
+        elif kind == "wave":
+            count = spec["count"]
+            lanes = np.linspace(-spec["width"] / 2, spec["width"] / 2, count, dtype=np.float32)
+            vys = speed + spec.get("amplitude", 1.5) * np.sin(lanes / spec["width"] * math.tau + tick * 0.05)
+            xs = np.clip(x + lanes, 30, self.bounds[0] - 30)
+            self.spawn(xs, np.full(count, y, np.float32), np.zeros(count, np.float32), vys)
+
+    def _emit_angles(self, x, y, angles, speed):
+        count = len(angles)
+        self.spawn(np.full(count, x, np.float32), np.full(count, y, np.float32),
+                   np.cos(angles) * speed, np.sin(angles) * speed)
+
+# Screen and timing
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 900
+FPS = 60
+
+# Gameplay runs at a fixed tick rate, independent of the render rate (FPS).
+# A slow frame runs at most MAX_SIM_STEPS catch-up ticks; beyond that the game slows down.
+SIM_RATE = 60
+SIM_DT = 1.0 / SIM_RATE
+MAX_SIM_STEPS = 5
+
+# Gameplay tuning
+PLAYER_SPEED = 5.5
+BOOST_MULTIPLIER = 1.9
+MAX_BOOST = 100.0
+BOOST_DRAIN_RATE = 25.0
+BOOST_RECHARGE_RATE = 20.0
+LOW_BOOST_THRESHOLD = 20.0
+MAX_EAGLE = 100.0
+EAGLE_RECHARGE_RATE = 8.0
+MAX_BOMB_CHARGES = 3
+BOMB_COOLDOWN_MS = 500
+BASE_FIRE_RATE_MS = 220
+MISSILE_SPEED = 14
+ENEMY_PROJECTILE_SPEED = 5.5
+MAX_ENEMY_PROJECTILES = 2048
+MAX_PLAYER_MISSILES = 256
+SHOOTER_PATTERN = {"kind": "fan", "offsets": [0], "speed": ENEMY_PROJECTILE_SPEED}
+STAGE_MILESTONE = 15000
+MUSIC_PREFETCH_AT = 0.8   # fraction of the way to the next stage at which its track starts decoding
+EVENT_DURATION = 1800
+
+# Render tuning
+ENEMY_PULSE_AMPLITUDE = 0.03
+MINI_PULSE_AMPLITUDE = 0.04
+ASTEROID_ROTATION_STEP = 5
+STAR_COUNT = 120
+STAGE_TINTS = ((0, 100, 0), (0, 0, 150), (150, 0, 150))   # by current_stage % 3
+STAGE_TINT_ALPHA = 40
+
+# Each achievement unlocks once its run counter reaches target. Counters: kills,
+# boss_kills and combo (best this run)
+ACHIEVEMENTS = [
+    {"id": "kills_100", "name": "CENTURION", "desc": "Destroy 100 enemies", "counter": "kills", "target": 100},
+    {"id": "kills_500", "name": "DESTROYER", "desc": "Destroy 500 enemies", "counter": "kills", "target": 500},
+    {"id": "kills_1000", "name": "APOCALYPSE", "desc": "Destroy 1,000 enemies", "counter": "kills", "target": 1000},
+    {"id": "boss_1", "name": "FIRST STRIKE", "desc": "Defeat your first boss", "counter": "boss_kills", "target": 1},
+    {"id": "boss_5", "name": "LEGENDARY PILOT", "desc": "Defeat 5 bosses", "counter": "boss_kills", "target": 5},
+    {"id": "combo_10", "name": "CHAIN MASTER", "desc": "Reach a 10x combo", "counter": "combo", "target": 10},
+    {"id": "combo_20", "name": "UNSTOPPABLE", "desc": "Reach a 20x combo", "counter": "combo", "target": 20},
+]
+
+# Sprites and the per-type boss / mini-boss tables.
+# Needs a display mode for convert_alpha; a 1x1 window on the dummy driver is enough.
+# With an AssetLoader the files are decoded on its workers and finished here in order;
+# with a SpriteCache, finished sprites whose source is unchanged come straight from disk.
+class Assets:
+    # Every sprite file, in load order: player, HUD and stage-one art come first so a
+    # loader decodes them ahead of the boss art that is only needed minutes into a run.
+    IMAGES = (
+        "eagle1_normal.png", "eagle1_boost.png", "eagle1_damaged.png", "missle.png",
+        "lives_icon.png", "powerup_rapid.png", "powerup_shield.png", "powerup_extra_life.png",
+        "powerup_extra_power_bomb.png", "trishot.png", "shield.png", "terminid.png",
+        "terminid1.png", "terminid2.png", "hunter.png", "hunter1.png", "hunter2.png",
+        "automaton.png", "automaton1.png", "automaton2.png", "illuminate.png",
+        "illuminate1.png", "illuminate2.png", "enemy_blast1.png", "enemy_blast2.png",
+        "enemy_blast3.png", "aster1.png", "aster2.png", "aster3.png", "aster4.png",
+        "aster5.png", "aster6.png", "boss_charger_normal.png", "boss_charger_damaged.png",
+        "boss_brood_normal.png", "boss_brood_damaged.png", "boss_summoner_normal.png",
+        "boss_summoner_damaged.png", "boss_fortress_normal.png", "boss_fortress_damaged.png",
+        "boss_normal.png", "boss_damaged.png", "boss11.png", "boss12.png", "boss21.png",
+        "boss22.png", "boss31.png", "boss32.png", "dropship.png", "dropship1.png",
+        "dropship2.png"
+    )
+
+    # Files that still need decoding: all of them, less those the cache fully covers
+    @classmethod
+    def stale_images(cls, cache=None):
+        return [f for f in cls.IMAGES if not (cache and cache.covers(f))]
+
+    def __init__(self, loader=None, cache=None):
+        load = load_image
+        if loader:
+            loader.prefetch(images=self.stale_images(cache))
+            load = loader.image
+
+        def sprite(filename, recipe, build):
+            return cache.sprite(filename, recipe, build) if cache else build()
+
+        def image(filename, scale=None):
+            return sprite(filename, f"scale {scale}", lambda: load(filename, scale))
+
+        self.player_normal = image("eagle1_normal.png", (60, 90))
+        self.player_boost = image("eagle1_boost.png", (60, 90))
+        self.player_damaged = image("eagle1_damaged.png", (60, 90))
+
+        self.missile_img = image("missle.png", (10, 30))
+
+        self.lives_icon = image("lives_icon.png", (25, 25))
+
+        powerup_files = {
+            "rapid": "powerup_rapid.png",
+            "shield": "powerup_shield.png",
+            "life": "powerup_extra_life.png",
+            "bomb": "powerup_extra_power_bomb.png",
+            "triple": "trishot.png"
+        }
+        raw_powerup_imgs = {}
+
+        def powerup_icon(kind, size):
+            def build():
+                if kind not in raw_powerup_imgs:
+                    raw_powerup_imgs[kind] = load(powerup_files[kind])
+                return make_circular(pygame.transform.scale(raw_powerup_imgs[kind], size))
+            return sprite(powerup_files[kind], f"circle {size}", build)
+
+        self.drop_powerup_imgs = {k: powerup_icon(k, (30, 30)) for k in powerup_files}
+        self.hud_powerup_imgs = {k: powerup_icon(k, (35, 35)) for k in powerup_files}
+
+        shield_size = (int(80 * 1.3), int(110 * 1.3))
+        self.shield_large = sprite("shield.png", f"smooth {shield_size}",
+                                   lambda: pygame.transform.smoothscale(load("shield.png", (80, 110)), shield_size))
+
+        self.terminid_imgs = [
+            image("terminid.png", (50, 70)),
+            image("terminid1.png", (50, 70)),
+            image("terminid2.png", (50, 70)),
+            image("hunter.png", (50, 70)),
+            image("hunter1.png", (50, 70)),
+            image("hunter2.png", (50, 70))
+        ]
+
+        self.automaton_imgs = [
+            image("automaton.png", (50, 70)),
+            image("automaton1.png", (50, 70)),
+            image("automaton2.png", (50, 70))
+        ]
+
+        self.illuminate_imgs = [
+            image("illuminate.png", (50, 70)),
+            image("illuminate1.png", (50, 70)),
+            image("illuminate2.png", (50, 70))
+        ]
+
+        self.enemy_blast_imgs = [
+            image("enemy_blast1.png", (15, 40)),
+            image("enemy_blast2.png", (15, 40)),
+            image("enemy_blast3.png", (15, 40))
+        ]
+
+        self.asteroid_imgs = [
+            image("aster1.png", (70, 70)),
+            image("aster2.png", (70, 70)),
+            image("aster3.png", (70, 70)),
+            image("aster4.png", (70, 70)),
+            image("aster5.png", (70, 70)),
+            image("aster6.png", (70, 70))
+        ]
+
+        BOSS_SCALE = (140, 210)
+        self.boss_types = [
+            {
+                "name": "CHARGER",
+                "normal": image("boss_charger_normal.png", BOSS_SCALE),
+                "damaged": image("boss_charger_damaged.png", BOSS_SCALE),
+                "hp_mult": 1.0,
+                "speed_mult": 1.0,
+                "patterns": {
+                    1: [{"kind": "fan", "interval": 96, "offsets": [-50, -25, 0, 25, 50]}],
+                    2: [{"kind": "fan", "interval": 86, "offsets": [-75, -50, -25, 0, 25, 50, 75]},
+                        {"kind": "aimed", "interval": 150, "count": 3, "spread": 0.2, "speed": 6.0}],
+                    3: [{"kind": "fan", "interval": 86, "offsets": [-75, -50, -25, 0, 25, 50, 75]},
+                        {"kind": "aimed", "interval": 120, "count": 5, "spread": 0.18, "speed": 6.5},
+                        {"kind": "radial", "interval": 210, "count": 14, "speed": 3.5}]
+                },
+                "special": None
+            },
+            {
+                "name": "BROOD",
+                "normal": image("boss_brood_normal.png", BOSS_SCALE),
+                "damaged": image("boss_brood_damaged.png", BOSS_SCALE),
+                "hp_mult": 1.05,
+                "speed_mult": 0.9,
+                "patterns": {
+                    1: [{"kind": "fan", "interval": 111, "offsets": [-50, -25, 0, 25, 50]}],
+                    2: [{"kind": "fan", "interval": 111, "offsets": [-50, -25, 0, 25, 50]},
+                        {"kind": "wave", "interval": 160, "count": 9, "width": 360, "speed": 3.8}],
+                    3: [{"kind": "wave", "interval": 120, "count": 11, "width": 420, "speed": 4.0},
+                        {"kind": "aimed", "interval": 90, "count": 3, "spread": 0.25, "speed": 6.0}]
+                },
+                "special": "spawn_minis"
+            },
+            {
+                "name": "SUMMONER",
+                "normal": image("boss_summoner_normal.png", BOSS_SCALE),
+                "damaged": image("boss_summoner_damaged.png", BOSS_SCALE),
+                "hp_mult": 1.1,
+                "speed_mult": 0.8,
+                "patterns": {
+                    1: [{"kind": "fan", "interval": 101, "offsets": [-50, -25, 0, 25, 50]}],
+                    2: [{"kind": "wave", "interval": 101, "count": 9, "width": 400, "speed": 4.0, "amplitude": 2.0}],
+                    3: [{"kind": "wave", "interval": 101, "count": 9, "width": 400, "speed": 4.0, "amplitude": 2.0},
+                        {"kind": "spiral", "interval": 8, "arms": 2, "turn": 0.35, "speed": 3.2}]
+                },
+                "special": "heavy_adds"
+            },
+            {
+                "name": "FORTRESS",
+                "normal": image("boss_fortress_normal.png", BOSS_SCALE),
+                "damaged": image("boss_fortress_damaged.png", BOSS_SCALE),
+                "hp_mult": 1.2,
+                "speed_mult": 0.7,
+                "patterns": {
+                    1: [{"kind": "fan", "interval": 81, "offsets": [-50, -25, 0, 25, 50]}],
+                    2: [{"kind": "fan", "interval": 81, "offsets": [-50, -25, 0, 25, 50]},
+                        {"kind": "radial", "interval": 180, "count": 16, "speed": 3.2, "turn": 0.1}],
+                    3: [{"kind": "spiral", "interval": 5, "arms": 3, "turn": 0.23, "speed": 3.4},
+                        {"kind": "radial", "interval": 150, "count": 20, "speed": 3.0, "turn": 0.1}]
+                },
+                "special": "invuln_phases"
+            }
+        ]
+
+        # Fallback
+        fallback_normal = image("boss_normal.png", BOSS_SCALE)
+        fallback_damaged = image("boss_damaged.png", BOSS_SCALE)
+        for bt in self.boss_types:
+            if bt["normal"].get_width() <= 1:
+                bt["normal"] = fallback_normal
+            if bt["damaged"].get_width() <= 1:
+                bt["damaged"] = fallback_damaged
+
+        self.mini_boss_types = [
+            {
+                "normal": image("boss11.png", (70, 105)),
+                "damaged": image("boss12.png", (70, 105)),
+                "health_base": 300,
+                "speed": 3.8,
+                "fire_threshold_base": 110,
+                "pattern": {"kind": "fan", "offsets": [-20, 0, 20], "speed": 5.5}
+            },
+            {
+                "normal": image("boss21.png", (75, 112)),
+                "damaged": image("boss22.png", (75, 112)),
+                "health_base": 400,
+                "speed": 3.4,
+                "fire_threshold_base": 100,
+                "pattern": {"kind": "fan", "offsets": [-40, -20, 0, 20, 40], "speed": 5.5}
+            },
+            {
+                "normal": image("boss31.png", (65, 97)),
+                "damaged": image("boss32.png", (65, 97)),
+                "health_base": 350,
+                "speed": 4.2,
+                "fire_threshold_base": 110,
+                "pattern": {"kind": "fan", "offsets": [-25, -10, 10, 25], "speed": 5.5}
+            }
+        ]
+
+        self.dropship_imgs = [
+            image("dropship.png", (100, 150)),
+            image("dropship1.png", (100, 150)),
+            image("dropship2.png", (100, 150))
+        ]
+
+    def stage_enemy_imgs(self, stage):
+        return self.terminid_imgs if stage == 0 else self.automaton_imgs if stage == 1 else self.illuminate_imgs
+
+# Player input for one simulation tick.
+# pack() gives the 3-byte replay form (axes quantized to 1/127, button bits); the live
+# game steps with the unpacked copy so a replay feeds the sim exactly the same values.
+class TickInput:
+    __slots__ = ("move_x", "move_y", "fire", "boost", "special")
+
+    SIZE = 3
+
+    def __init__(self, move_x=0.0, move_y=0.0, fire=False, boost=False, special=False):
+        self.move_x = move_x
+        self.move_y = move_y
+        self.fire = fire
+        self.boost = boost
+        self.special = special
+
+    def pack(self):
+        buttons = (1 if self.fire else 0) | (2 if self.boost else 0) | (4 if self.special else 0)
+        return struct.pack("<bbB", round(max(-1.0, min(1.0, self.move_x)) * 127),
+                           round(max(-1.0, min(1.0, self.move_y)) * 127), buttons)
+
+    @classmethod
+    def unpack(cls, data):
+        move_x, move_y, buttons = struct.unpack("<bbB", data)
+        return cls(move_x / 127, move_y / 127, bool(buttons & 1), bool(buttons & 2), bool(buttons & 4))
+
+# Achievements compiled into one ascending threshold list per counter.
+# Gameplay code bump()s a counter or reach()es a new high for it, and only that
+# counter's next pending threshold is compared, so an event costs the same however
+# many achievements exist. Counters are per run; ids already in `unlocked` are
+# skipped when a run starts, and new unlocks land in `events` as ("achievement", ach).
+class AchievementTracker:
+    def __init__(self, achievements, unlocked, events):
+        self.unlocked = unlocked
+        self.events = events
+        self.thresholds = {}
+        for ach in achievements:
+            self.thresholds.setdefault(ach["counter"], []).append(ach)
+        for entries in self.thresholds.values():
+            entries.sort(key=lambda ach: ach["target"])
+        self.reset()
+
+    def reset(self):
+        self.values = dict.fromkeys(self.thresholds, 0)
+        self.pending = dict.fromkeys(self.thresholds, 0)
+        self.next_target = {}
+        for counter in self.thresholds:
+            self.advance(counter)
+
+    def bump(self, counter, amount=1):
+        value = self.values.get(counter, 0) + amount
+        self.values[counter] = value
+        if value >= self.next_target.get(counter, math.inf):
+            self.advance(counter)
+
+    def reach(self, counter, value):
+        if value > self.values.get(counter, 0):
+            self.values[counter] = value
+            if value >= self.next_target.get(counter, math.inf):
+                self.advance(counter)
+
+    # Unlock every threshold the counter has passed and move on to the next one
+    def advance(self, counter):
+        entries = self.thresholds[counter]
+        value = self.values[counter]
+        i = self.pending[counter]
+        while i < len(entries) and (entries[i]["id"] in self.unlocked or entries[i]["target"] <= value):
+            ach = entries[i]
+            if ach["id"] not in self.unlocked:
+                self.unlocked.add(ach["id"])
+                self.events.append(("achievement", ach))
+            i += 1
+        self.pending[counter] = i
+        self.next_target[counter] = entries[i]["target"] if i < len(entries) else math.inf
+
+# Headless game core: all gameplay state plus the fixed-tick update.
+# step() never touches the display, mixer or event queue. Sounds it wants played
+# land in `sounds` as (name, chance) and game events in `events` as (name, payload);
+# both are refilled by every step() and are the driver's job to act on.
+# Gameplay randomness comes from per-subsystem streams seeded from one run seed, so
+# a seed plus the per-tick inputs reproduces a run exactly. Purely cosmetic rolls
+# (enemy bob phase, which sound variation plays) stay on the global `random`.
+class Simulation:
+    def __init__(self, assets, unlocked=None, seed=None):
+        self.assets = assets
+        # Achievement ids already earned; new unlocks are added here and reported as events
+        self.unlocked = unlocked if unlocked is not None else set()
+        self.bounds = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        self.missiles = EntityRing(MAX_PLAYER_MISSILES)
+        self.enemy_bullets = BulletEngine(assets.enemy_blast_imgs, MAX_ENEMY_PROJECTILES, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.enemies = []
+        self.asteroids = []
+        self.powerups = []
+        self.mini_bosses = []
+        self.dropships = []
+
+        # Recycled instances for the high-churn entity types
+        self.missile_pool = EntityPool(Missile)
+        self.enemy_pool = EntityPool(Enemy)
+        self.asteroid_pool = EntityPool(Asteroid)
+        self.powerup_pool = EntityPool(PowerUp)
+        # Lists compacted by sweep(), with the pool their dead go back to
+        self.swept = ((self.enemies, self.enemy_pool), (self.asteroids, self.asteroid_pool),
+                      (self.powerups, self.powerup_pool), (self.mini_bosses, None), (self.dropships, None))
+        self.pending_sweep = False
+
+        self.enemy_grid = SpatialHash()
+        self.asteroid_grid = SpatialHash()
+        self.mini_grid = SpatialHash()
+        self.powerup_grid = SpatialHash(cell_size=64)
+
+        self.sounds = []
+        self.events = []
+        self.achievements = AchievementTracker(ACHIEVEMENTS, self.unlocked, self.events)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.spawn_rng = random.Random(f"{self.seed}:spawn")
+        self.drops_rng = random.Random(f"{self.seed}:drops")
+        self.ai_rng = random.Random(f"{self.seed}:ai")
+        self.events_rng = random.Random(f"{self.seed}:events")
+        self.enemy_bullets.rng = random.Random(f"{self.seed}:bullets")
+
+        self.tick = 0
+        self.time_ms = 0.0
+        self.game_over = False
+        # Wall-clock cost of the last step's spawn, movement/AI and collision phases (ms)
+        self.spawn_ms = 0.0
+        self.move_ms = 0.0
+        self.collision_ms = 0.0
+
+        self.player_rect = self.assets.player_normal.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
+        self.prev_player_pos = self.player_rect.topleft
+        self.lives = 3
+        self.invincibility_frames = 0
+        self.score = 0
+        self.boosting = False
+        self.boost_meter = MAX_BOOST
+        self.eagle_meter = MAX_EAGLE
+        self.rapid_timer = 0.0
+        self.triple_timer = 0.0
+        self.shield_active = False
+        self.bomb_charges = 0
+        self.last_bomb_time = -math.inf
+        self.last_fire_time = -math.inf
+
+        self.next_boss_threshold = 20000
+        self.boss_cooldown = 0
+        self.boss = None
+
+        self.missile_pool.release_all(self.missiles)
+        self.enemy_pool.release_all(self.enemies)
+        self.asteroid_pool.release_all(self.asteroids)
+        self.powerup_pool.release_all(self.powerups)
+        self.missiles.clear()
+        self.enemy_bullets.clear()
+        self.enemies.clear()
+        self.asteroids.clear()
+        self.powerups.clear()
+        self.mini_bosses.clear()
+        self.dropships.clear()
+
+        self.current_stage = 0
+        self.stage_transition_timer = 0
+        self.current_event = None
+        self.event_timer = 0
+        self.last_event_score = 0
+        self.event_check_timer = 0
+
+        self.enemy_spawn_timer = 0
+        self.asteroid_spawn_timer = 0
+        self.formation_timer = 0
+        self.spawn_pause_timer = 0
+        self.mini_cooldown = 0
+        self.mini_spawn_timer = 0
+        self.mini_warning_timer = 0
+        self.boss_warning_timer = 0
+
+        self.combo_count = 0
+        self.combo_timer = 0.0
+        self.total_kills = 0
+        self.boss_kills = 0
+        self.mini_boss_kills = 0
+        self.achievements.reset()
+
+        self.sounds.clear()
+        self.events.clear()
+
+    # Deferred removal: despawn() only marks the entity dead, sweep() then compacts
+    # every list in one order-preserving pass and returns the dead to their pools.
+    # step() sweeps after each phase that can kill, so no phase sees a dead entity
+    # left over from an earlier one; within a phase the spatial grids skip them.
+    def despawn(self, entity):
+        entity.alive = False
+        self.pending_sweep = True
+
+    def sweep(self):
+        if not self.pending_sweep:
+            return
+        self.pending_sweep = False
+        for entities, pool in self.swept:
+            dead = [e for e in entities if not e.alive]
+            if dead:
+                entities[:] = [e for e in entities if e.alive]
+                if pool:
+                    pool.release_all(dead)
+
+    def pool_stats(self):
+        return {"missiles": self.missile_pool.stats(), "enemies": self.enemy_pool.stats(),
+                "asteroids": self.asteroid_pool.stats(), "powerups": self.powerup_pool.stats()}
+
+    def report_pools(self):
+        for name, st in self.pool_stats().items():
+            logging.info(f"Pool {name}: high-water {st['high_water']}, {st['free']} free, hit rate {st['hit_rate']:.1%}")
+
+    def play(self, name, chance=1.0):
+        self.sounds.append((name, chance))
+
+    # CRC over the gameplay state; two runs that agree here stepped identically
+    def checksum(self):
+        crc = zlib.crc32(struct.pack("<qqqqqqqdd", self.tick, self.score, self.lives, self.player_rect.x,
+                                     self.player_rect.y, self.bomb_charges, self.total_kills,
+                                     self.boost_meter, self.eagle_meter))
+        for group in (self.missiles, self.enemies, self.asteroids, self.powerups, self.mini_bosses, self.dropships):
+            for entity in group:
+                crc = zlib.crc32(struct.pack("<dd", entity.x, entity.y), crc)
+        if self.boss:
+            crc = zlib.crc32(struct.pack("<ddq", self.boss.x, self.boss.y, self.boss.health), crc)
+        bullets = self.enemy_bullets
+        return zlib.crc32(bullets.pos[bullets.live()].tobytes(), crc)
+
+    def add_score(self, base_points):
+        multiplier = min(4.0, 1.0 + self.combo_count * 0.25)
         points = int(base_points * multiplier)
-        score += points
+        self.score += points
         return points
 
-    def trigger_combo():
-        nonlocal combo_count, combo_timer
-        combo_count += 1
-        combo_timer = 300.0
-
-    def check_achievements():
-        nonlocal achievement_popup
-        for ach in ACHIEVEMENTS:
-            if ach["id"] not in unlocked_achievements:
-                unlocked = False
-                if ach["id"].startswith("kills_"):
-                    target = int(ach["id"].split("_")[1])
-                    if total_kills >= target:
-                        unlocked = True
-                elif ach["id"].startswith("boss_"):
-                    target = int(ach["id"].split("_")[1])
-                    if boss_kills >= target:
-                        unlocked = True
-                elif ach["id"].startswith("combo_"):
-                    target = int(ach["id"].split("_")[1])
-                    if combo_count >= target:
-                        unlocked = True
-                if unlocked:
-                    unlocked_achievements.add(ach["id"])
-                    save_achievements()
-                    achievement_popup = {
-                        "name": ach["name"],
-                        "desc": ach["desc"],
-                        "timer": 360,
-                        "alpha": 0
-                    }
+    def trigger_combo(self):
+        self.combo_count += 1
+        self.combo_timer = 300.0
+        self.achievements.reach("combo", self.combo_count)
 
-    def spawn_formation(formation_type=None):
+    def count_kill(self):
+        self.total_kills += 1
+        self.achievements.bump("kills")
+
+    def spawn_powerup(self, center_pos, force_drop=False, event_bonus=False, stage_bonus=False):
+        drop_chance = 0.2
+        if self.combo_count > 5:
+            drop_chance += 0.2
+        if self.combo_count > 10:
+            drop_chance += 0.3
+        if self.combo_count > 15:
+            drop_chance = 1.0
+        if event_bonus:
+            drop_chance = min(1.0, drop_chance + 0.3)
+        if stage_bonus:
+            drop_chance = min(1.0, drop_chance + 0.15)
+        if force_drop or self.drops_rng.random() < drop_chance:
+            types = ["rapid", "shield", "triple", "bomb", "life"]
+            ptype = self.drops_rng.choice(types)
+            phase = self.drops_rng.random() * math.tau
+            self.powerups.append(self.powerup_pool.acquire(self.assets.drop_powerup_imgs[ptype], center_pos, ptype, phase))
+
+    # Regular kill drop: event and stage 3 bonuses apply
+    def drop_powerup(self, center_pos):
+        self.spawn_powerup(center_pos, event_bonus=(self.current_event is not None), stage_bonus=(self.current_stage == 2))
+
+    def spawn_formation(self, formation_type=None):
         if formation_type is None:
-            formation_type = random.choice(["line", "arrow", "walls", "diamond", "cross"])
-        
+            formation_type = self.spawn_rng.choice(["line", "arrow", "walls", "diamond", "cross"])
+
+        enemies = self.enemies
         base_y = -50
-        speed = 3.2 + current_stage * 0.6
-        img_list = terminid_imgs if current_stage == 0 else automaton_imgs if current_stage == 1 else illuminate_imgs
-        
+        speed = 3.2 + self.current_stage * 0.6
+        img_list = self.assets.stage_enemy_imgs(self.current_stage)
+
         center_x = SCREEN_WIDTH // 2
 
         if formation_type == "line":
-            count = 7 + current_stage * 2
+            count = 7 + self.current_stage * 2
             spacing = 55
             start_x = center_x - (count * spacing // 2)
             for i in range(count):
                 x = start_x + i * spacing
                 if x < 60 or x > SCREEN_WIDTH - 60:
                     continue
-                img = random.choice(img_list)
-                rect = img.get_rect(center=(x, base_y))
-                enemies.append({"rect": rect, "img": img, "speed": speed, "wiggle": 0, "type": "shooter", "fire_timer": i * 8, "formation": True, "bob_phase": random.random() * math.tau})
+                img = self.spawn_rng.choice(img_list)
+                enemies.append(self.enemy_pool.acquire(img, (x, base_y), speed, 0, "shooter", i * 8, random.random() * math.tau, formation=True))
+
+        elif formation_type == "arrow":
+            # Pointed downward arrow centered
+            positions = [
+                (0, 0), (-60, 60), (60, 60),
+                (-120, 120), (120, 120),
+                (-60, 180), (60, 180), (0, 240)
+            ]
+            for dx, dy in positions:
+                x = center_x + dx
+                y = base_y + dy
+                if x < 60 or x > SCREEN_WIDTH - 60:
+                    continue
+                img = self.spawn_rng.choice(img_list)
+                enemies.append(self.enemy_pool.acquire(img, (x, y), speed + 0.8, 0, "grunt", 0, random.random() * math.tau))
+
+        elif formation_type == "walls":
+            # Two walls coming in from sides toward center
+            count = 6 + self.current_stage
+            for side in [-1, 1]:
+                start_x = center_x + side * 200
+                for i in range(count):
+                    x = start_x + side * i * 40
+                    y = base_y + i * 60
+                    img = self.spawn_rng.choice(img_list)
+                    enemies.append(self.enemy_pool.acquire(img, (x, y), speed, side * -2.0, "shooter" if i % 2 == 0 else "fast", i * 12, random.random() * math.tau))
+
+        elif formation_type == "diamond":
+            positions = [(0,0), (-100,80), (100,80), (0,160), (-100,240), (100,240)]
+            for dx, dy in positions:
+                x = center_x + dx
+                y = base_y + dy
+                if x < 60 or x > SCREEN_WIDTH - 60:
+                    continue
+                img = self.spawn_rng.choice(img_list)
+                enemies.append(self.enemy_pool.acquire(img, (x, y), speed + 0.5, 0, "shooter" if dx == 0 else "grunt", 0, random.random() * math.tau))
+
+        elif formation_type == "cross":
+            # Horizontal and vertical cross centered
+            for i in range(-3, 4):
+                if i == 0: continue
+                # Horizontal
+                x = center_x + i * 70
+                y = base_y + 100
+                img = self.spawn_rng.choice(img_list)
+                enemies.append(self.enemy_pool.acquire(img, (x, y), speed, 0, "shooter", abs(i)*10, random.random() * math.tau))
+                # Vertical
+                x = center_x
+                y = base_y + 100 + i * 70
+                enemies.append(self.enemy_pool.acquire(img, (x, y), speed + 1.0, 0, "fast", 0, random.random() * math.tau))
+
+    def spawn_mini_boss(self, mb_type, center):
+        health = mb_type["health_base"] + int(self.score / 5000) * 200
+        self.mini_bosses.append(MiniBoss(mb_type, center, health,
+                                         1 if self.ai_rng.random() < 0.5 else -1,
+                                         self.ai_rng.randint(0, mb_type["fire_threshold_base"])))
+
+    def step(self, inputs):
+        self.sounds.clear()
+        self.events.clear()
+        self.tick += 1
+        self.time_ms += SIM_DT * 1000.0
+
+        for group in (self.missiles, self.enemies, self.asteroids, self.powerups, self.mini_bosses, self.dropships):
+            for entity in group:
+                entity.px = entity.x
+                entity.py = entity.y
+        if self.boss:
+            self.boss.px = self.boss.x
+            self.boss.py = self.boss.y
+        self.prev_player_pos = self.player_rect.topleft
+
+        clock = time.perf_counter
+        t0 = clock()
+        self.update_player(inputs)
+        self.sweep()
+        t1 = clock()
+        self.update_director()
+        t2 = clock()
+        self.update_boss()
+        t3 = clock()
+        self.update_spawns()
+        t4 = clock()
+        self.update_enemies()
+        self.update_mini_bosses()
+        self.move_projectiles()
+        self.sweep()
+        t5 = clock()
+        self.resolve_collisions()
+        self.sweep()
+        t6 = clock()
+        self.spawn_ms = (t2 - t1 + t4 - t3) * 1000.0
+        self.move_ms = (t1 - t0 + t3 - t2 + t5 - t4) * 1000.0
+        self.collision_ms = (t6 - t5) * 1000.0
+
+        if self.combo_timer > 0:
+            self.combo_timer -= 1
+        else:
+            self.combo_count = 0
+
+    # Movement, meters, specials and firing
+    def update_player(self, inputs):
+        dt = SIM_DT
+        current_time = self.time_ms
+        move_x = inputs.move_x
+        move_y = inputs.move_y
+        if move_x != 0 or move_y != 0:
+            mag = math.hypot(move_x, move_y)
+            if mag > 0:
+                move_x /= mag
+                move_y /= mag
+
+        self.boosting = inputs.boost and self.boost_meter > 0
+        if self.boosting:
+            self.boost_meter -= BOOST_DRAIN_RATE * dt
+            if self.boost_meter < 0:
+                self.boost_meter = 0
+        elif self.boost_meter < MAX_BOOST:
+            self.boost_meter += BOOST_RECHARGE_RATE * dt
+            if self.boost_meter > MAX_BOOST:
+                self.boost_meter = MAX_BOOST
+
+        if self.rapid_timer > 0:
+            self.rapid_timer -= dt
+        if self.triple_timer > 0:
+            self.triple_timer -= dt
+
+        if inputs.special:
+            if self.eagle_meter >= MAX_EAGLE:
+                self.play("eagle_strike")
+                for enemy in self.enemies:
+                    self.trigger_combo()
+                    self.count_kill()
+                    self.add_score(200)
+                    self.play("explosion", 0.6)
+                self.enemy_pool.release_all(self.enemies)
+                self.enemies.clear()
+                for mini in self.mini_bosses:
+                    mini.health -= 600
+                    self.play("explosion")
+                    if mini.health <= 0:
+                        self.despawn(mini)
+                        self.mini_boss_kills += 1
+                        self.trigger_combo()
+                        self.add_score(1200)
+                        self.mini_cooldown = 6000
+                        self.spawn_pause_timer = 480
+                        for _ in range(4):
+                            self.spawn_powerup((self.drops_rng.randint(mini.rect.left, mini.rect.right),
+                                                self.drops_rng.randint(mini.rect.top, mini.rect.bottom)), force_drop=True)
+                if self.boss:
+                    self.boss.health -= 800
+                    self.play("explosion")
+                self.eagle_meter = 0
+            elif self.bomb_charges > 0 and current_time - self.last_bomb_time > BOMB_COOLDOWN_MS:
+                self.last_bomb_time = current_time
+                self.bomb_charges -= 1
+                for enemy in self.enemies:
+                    self.trigger_combo()
+                    self.count_kill()
+                    self.add_score(100)
+                    self.play("explosion", 0.5)
+                self.enemy_pool.release_all(self.enemies)
+                self.asteroid_pool.release_all(self.asteroids)
+                self.enemies.clear()
+                self.asteroids.clear()
+                self.enemy_bullets.clear()
+                for mini in self.mini_bosses:
+                    mini.health -= 400
+                    self.play("explosion")
+                    if mini.health <= 0:
+                        self.despawn(mini)
+                        self.mini_boss_kills += 1
+                        self.trigger_combo()
+                        self.add_score(1200)
+                        self.mini_cooldown = 6000
+                        self.spawn_pause_timer = 480
+                if self.boss:
+                    self.boss.health -= 450
+                    self.play("explosion")
+
+        if self.eagle_meter < MAX_EAGLE:
+            self.eagle_meter += EAGLE_RECHARGE_RATE * dt
+            if self.eagle_meter > MAX_EAGLE:
+                self.eagle_meter = MAX_EAGLE
+
+        speed = PLAYER_SPEED * (BOOST_MULTIPLIER if self.boosting else 1)
+        self.player_rect.x += move_x * speed
+        self.player_rect.y += move_y * speed
+        self.player_rect.clamp_ip(self.bounds)
+
+        if self.invincibility_frames > 0:
+            self.invincibility_frames -= 1
+
+        effective_fire_rate = BASE_FIRE_RATE_MS // 2 if self.rapid_timer > 0 else BASE_FIRE_RATE_MS
+        num_shots = 3 if self.triple_timer > 0 else 1
+        spread = 18 if num_shots == 3 else 0
+
+        if inputs.fire and current_time - self.last_fire_time > effective_fire_rate:
+            self.last_fire_time = current_time
+            for i in range(num_shots):
+                offset_x = (i - num_shots // 2) * spread
+                start_x = self.player_rect.centerx + offset_x
+                start_y = self.player_rect.centery - 40
+                evicted = self.missiles.append(self.missile_pool.acquire(self.assets.missile_img, (start_x, start_y), offset_x / 4, -MISSILE_SPEED))
+                if evicted:
+                    self.missile_pool.release(evicted)
+            self.play("shoot")
+
+    # Stages, timed events and boss arrival
+    def update_director(self):
+        if self.stage_transition_timer > 0:
+            self.stage_transition_timer -= 1
+        elif self.score // STAGE_MILESTONE > self.current_stage:
+            self.current_stage = self.score // STAGE_MILESTONE
+            self.stage_transition_timer = 120
+            self.spawn_pause_timer = 300
+            self.events.append(("stage", self.current_stage))
+
+        if self.current_event:
+            self.event_timer -= 1
+            if self.event_timer <= 0:
+                self.current_event = None
+
+        if self.boss is None and len(self.mini_bosses) == 0 and self.current_event is None:
+            self.event_check_timer += 1
+            score_milestone = (self.score // 10000) * 10000
+            if score_milestone > self.last_event_score or self.event_check_timer > 5400:
+                if self.events_rng.random() < 0.7:
+                    self.current_event = self.events_rng.choice(["breach", "patrol", "supply"])
+                    self.event_timer = EVENT_DURATION
+                    self.last_event_score = score_milestone
+                    self.event_check_timer = self.events_rng.randint(-2400, 0)
+
+        if self.boss is None and self.score >= self.next_boss_threshold and self.boss_cooldown <= 0:
+            variant_idx = self.boss_kills % 4
+            bt = self.assets.boss_types[variant_idx]
+            base_health = 2500 + min(8, self.score // 15000) * 350
+            health = int(base_health * bt["hp_mult"])
+            self.boss = Boss(bt["normal"], (SCREEN_WIDTH // 2, 180), health, variant_idx, 2.5 * bt["speed_mult"])
+            self.boss_warning_timer = 180
+            self.spawn_pause_timer = 300
+
+        self.boss_warning_timer = max(0, self.boss_warning_timer - 1)
+        self.mini_warning_timer = max(0, self.mini_warning_timer - 1)
+        self.boss_cooldown = max(0, self.boss_cooldown - 1)
+        self.spawn_pause_timer = max(0, self.spawn_pause_timer - 1)
+
+    def update_boss(self):
+        boss = self.boss
+        if not boss:
+            return
+        bt = self.assets.boss_types[boss.type_idx]
+        if boss.health < boss.max_health * 0.5 and boss.phase == 1:
+            boss.phase = 2
+        if boss.health < boss.max_health * 0.25 and boss.phase == 2:
+            boss.phase = 3
+
+        boss.x += boss.direction * boss.speed
+        if boss.x < 100 or boss.x + boss.width > SCREEN_WIDTH - 100:
+            boss.direction *= -1
+        boss.x = max(100, min(SCREEN_WIDTH - 100 - boss.width, boss.x))
+
+        boss.vertical_phase += 0.015
+        boss.y = 180 + math.sin(boss.vertical_phase) * 40
+
+        boss.invuln = False
+        if bt["special"] == "invuln_phases" and boss.phase >= 2:
+            if boss.special_timer % 300 < 120:
+                boss.invuln = True
+            boss.special_timer += 1
+
+        if not boss.invuln:
+            boss.fire_timer += 1
+            for spec in bt["patterns"][boss.phase]:
+                if boss.fire_timer % spec["interval"] == 0:
+                    origin_y = boss.rect.bottom if spec["kind"] == "fan" else boss.rect.bottom - 30
+                    self.enemy_bullets.emit(spec, boss.rect.centerx, origin_y, self.player_rect.center, boss.fire_timer)
+
+        if bt["special"] == "spawn_minis" and boss.special_timer % 1200 == 0 and len(self.mini_bosses) < 3:
+            num_spawn = 1 if len(self.mini_bosses) >= 2 else self.spawn_rng.randint(1, 2)
+            for _ in range(num_spawn):
+                mb_type = self.spawn_rng.choice(self.assets.mini_boss_types)
+                x_pos = self.spawn_rng.randint(100, SCREEN_WIDTH - 100)
+                self.spawn_mini_boss(mb_type, (x_pos, boss.rect.bottom + 60))
+        boss.special_timer += 1
+
+    # Formations, stray enemies, asteroids and mini-boss dropships
+    def update_spawns(self):
+        current_stage = self.current_stage
+        current_event = self.current_event
+        spawn_multiplier = 3.0 if current_event == "breach" else 1.25 if current_event == "supply" else 1.0
+        spawn_rate_enemy = max(40, 100 - current_stage * 8) // int(spawn_multiplier)
+
+        self.formation_timer += 1
+        formation_interval = max(350, 750 - current_stage * 70)
+        if self.formation_timer > formation_interval:
+            self.formation_timer = 0
+            self.spawn_formation()
+
+        if self.spawn_pause_timer == 0:
+            self.enemy_spawn_timer += 1
+            if self.enemy_spawn_timer > spawn_rate_enemy:
+                if current_event == "patrol" or current_stage == 1:
+                    self.spawn_formation("line")
+                else:
+                    img = self.spawn_rng.choice(self.assets.stage_enemy_imgs(current_stage))
+                    enemy_type = self.spawn_rng.choices(["grunt", "fast", "shooter"], weights=[0.5, 0.3, 0.2])[0]
+                    wiggle = self.spawn_rng.uniform(-1.5, 1.5)
+                    enemy_center = (self.spawn_rng.randint(80, SCREEN_WIDTH - 80), -50)
+                    speed_base = {"grunt": self.spawn_rng.uniform(3.2, 4.8), "fast": self.spawn_rng.uniform(5.5, 7.5), "shooter": self.spawn_rng.uniform(3.8, 5.5)}[enemy_type]
+                    speed = speed_base * (1.15 if current_stage >= 2 else 1.0)
+                    self.enemies.append(self.enemy_pool.acquire(img, enemy_center, speed, wiggle, enemy_type, 0, random.random() * math.tau))
+                    if enemy_type == "shooter":
+                        boost = 1.5 if current_event == "patrol" else 1.0
+                        fr = int(120 / boost)
+                        self.enemies[-1].fire_timer = self.spawn_rng.randint(0, fr - 1)
+                self.enemy_spawn_timer = 0
+
+        ast_pause = current_event in ["breach", "supply"]
+        if not ast_pause:
+            self.asteroid_spawn_timer += 1
+            if self.asteroid_spawn_timer > 90:
+                ast_img = self.spawn_rng.choice(self.assets.asteroid_imgs)
+                ast_center = (self.spawn_rng.randint(80, SCREEN_WIDTH - 80), -80)
+                self.asteroids.append(self.asteroid_pool.acquire(ast_img, ast_center, self.spawn_rng.uniform(2.5, 5.0), self.spawn_rng.uniform(-6, 6)))
+                self.asteroid_spawn_timer = 0
+
+        if self.mini_cooldown > 0:
+            self.mini_cooldown -= 1
+
+        self.mini_spawn_timer += 1
+        boss = self.boss
+        if self.mini_spawn_timer > 1800 and len(self.dropships) == 0 and len(self.mini_bosses) < 1 and self.mini_cooldown <= 0 and (boss is None or boss.health < boss.max_health * 0.5):
+            if self.spawn_rng.random() < 0.05:
+                mb_type = self.spawn_rng.choice(self.assets.mini_boss_types)
+                x_pos = self.spawn_rng.randint(120, SCREEN_WIDTH - 120)
+                self.dropships.append(Dropship(self.assets.dropship_imgs[0], (x_pos, -150), mb_type))
+                self.mini_warning_timer = 150
+                self.mini_spawn_timer = 0
+                self.mini_cooldown = 4800
+
+    def update_enemies(self):
+        patrol_fire_boost = 1.5 if self.current_event == "patrol" else 1.0
+        fire_rate = int(120 / patrol_fire_boost)
+        for enemy in self.enemies:
+            if enemy.kind == "shooter":
+                enemy.fire_timer += 1
+                if enemy.fire_timer > fire_rate and enemy.rect.bottom > 0:
+                    self.enemy_bullets.emit(SHOOTER_PATTERN, enemy.rect.centerx, enemy.rect.centery, None, 0)
+                    enemy.fire_timer = 0
+
+        for enemy in self.enemies:
+            if enemy.formation and enemy.y > 200:
+                enemy.wiggle = self.ai_rng.uniform(-1.2, 1.2)
+                enemy.formation = False
+
+            enemy.y += enemy.speed
+            enemy.x += enemy.wiggle * 3
+            enemy.x = max(20, min(SCREEN_WIDTH - enemy.width - 20, enemy.x))
+
+    def update_mini_bosses(self):
+        dropship_frames = len(self.assets.dropship_imgs)
+        for ds in self.dropships:
+            ds.y += 5
+            ds.timer += 1
+            if ds.timer >= 10:
+                ds.timer = 0
+                ds.frame = (ds.frame + 1) % dropship_frames
+            if ds.y > 200:
+                self.spawn_mini_boss(ds.mb_type, (ds.rect.centerx, ds.rect.bottom + 10))
+                self.despawn(ds)
+
+        for mini in self.mini_bosses:
+            mini.x += mini.direction * mini.speed
+            if mini.x <= 80 or mini.x + mini.width >= SCREEN_WIDTH - 80:
+                mini.direction *= -1
+                mini.y += 30
+            mini.x = max(80, min(SCREEN_WIDTH - 80 - mini.width, mini.x))
+
+            mini.y += 3.0
+
+            if mini.health <= mini.max_health * 0.5 and mini.phase == 1:
+                mini.phase = 2
+                mini.speed *= 1.5
+                mini.fire_threshold *= 0.8
+
+            mini.fire_timer += 1
+            current_thresh = mini.fire_threshold if mini.phase == 1 else mini.fire_threshold * 0.7
+            if mini.fire_timer > current_thresh and mini.rect.bottom > 0:
+                self.enemy_bullets.emit(mini.pattern, mini.rect.centerx, mini.rect.bottom + 10, None, 0)
+                mini.fire_timer = 0
+
+            if mini.y > SCREEN_HEIGHT:
+                self.despawn(mini)
+
+    def move_projectiles(self):
+        for m in self.missiles:
+            m.x += m.dx
+            m.y += m.dy
+            if m.y + m.height < 0 or m.y > SCREEN_HEIGHT or m.x + m.width < 0 or m.x > SCREEN_WIDTH:
+                self.missiles.remove(m)
+                self.missile_pool.release(m)
+
+        self.enemy_bullets.update()
+
+        for ast in self.asteroids:
+            ast.y += ast.speed
+            ast.rotation += ast.rot_speed
+            if ast.y > SCREEN_HEIGHT:
+                self.despawn(ast)
+
+        for p in self.powerups:
+            p.y += 2.5
+            p.x += math.sin(self.time_ms / 200 + p.phase) * 3
+            if p.y > SCREEN_HEIGHT or p.x + p.width < -100 or p.x > SCREEN_WIDTH + 100:
+                self.despawn(p)
+
+    def kill_enemy(self, enemy):
+        self.despawn(enemy)
+        self.enemy_grid.remove(enemy)
+        self.trigger_combo()
+        self.count_kill()
+        self.add_score(100)
+        self.drop_powerup(enemy.rect.center)
+        self.play("explosion", 0.3)
+
+    def resolve_collisions(self):
+        enemy_grid = self.enemy_grid
+        asteroid_grid = self.asteroid_grid
+        mini_grid = self.mini_grid
+        boss = self.boss
+        enemy_grid.rebuild(self.enemies)
+        asteroid_grid.rebuild(self.asteroids)
+        mini_grid.rebuild(self.mini_bosses)
+
+        missiles_to_remove = []
+        for m in self.missiles:
+            enemy = enemy_grid.first_rect(m.rect)
+            if enemy:
+                missiles_to_remove.append(m)
+                self.kill_enemy(enemy)
+                continue
+
+            ast = asteroid_grid.first_rect(m.rect)
+            if ast:
+                missiles_to_remove.append(m)
+                self.despawn(ast)
+                asteroid_grid.remove(ast)
+                self.add_score(50)
+                self.drop_powerup(ast.rect.center)
+                self.play("explosion", 0.3)
+                continue
+
+            if boss and m.rect.colliderect(boss.rect):
+                missiles_to_remove.append(m)
+                boss.health -= 20
+                self.play("explosion", 0.6)
+                for enemy in enemy_grid.query_radius(m.rect.center, 100):
+                    self.kill_enemy(enemy)
+
+            mini = mini_grid.first_rect(m.rect)
+            if mini:
+                missiles_to_remove.append(m)
+                mini.health -= 30
+                self.play("explosion", 0.7)
+                for enemy in enemy_grid.query_radius(m.rect.center, 80):
+                    self.kill_enemy(enemy)
+                if mini.health <= 0:
+                    self.despawn(mini)
+                    mini_grid.remove(mini)
+                    self.mini_boss_kills += 1
+                    self.trigger_combo()
+                    self.add_score(1200)
+                    self.mini_cooldown = 6000
+                    self.spawn_pause_timer = 480
+                    self.play("explosion")
+                    for _ in range(4):
+                        self.spawn_powerup((self.drops_rng.randint(mini.rect.left, mini.rect.right),
+                                            self.drops_rng.randint(mini.rect.top, mini.rect.bottom)), force_drop=True)
+
+        for m in missiles_to_remove:
+            if self.missiles.remove(m):
+                self.missile_pool.release(m)
+
+        player_rect = self.player_rect
+        self.powerup_grid.rebuild(self.powerups)
+        for p in self.powerup_grid.query_rect(player_rect):
+            self.despawn(p)
+            self.add_score(100)
+            self.play("pickup")
+            ptype = p.kind
+            if ptype == "rapid":
+                self.rapid_timer = max(self.rapid_timer, 12.0)
+            elif ptype == "triple":
+                self.triple_timer = max(self.triple_timer, 15.0)
+            elif ptype == "shield":
+                self.shield_active = True
+            elif ptype == "bomb":
+                self.bomb_charges = min(MAX_BOMB_CHARGES, self.bomb_charges + 1)
+            elif ptype == "life":
+                self.lives = min(5, self.lives + 1)
+
+        if self.invincibility_frames == 0:
+            damage_taken = False
+            hit_idx = self.enemy_bullets.first_hit(player_rect)
+            if hit_idx >= 0:
+                self.enemy_bullets.remove(hit_idx)
+                damage_taken = True
+
+            if not damage_taken:
+                enemy = enemy_grid.first_rect(player_rect)
+                if enemy:
+                    self.despawn(enemy)
+                    self.drop_powerup(enemy.rect.center)
+                    damage_taken = True
+
+            if not damage_taken:
+                ast = asteroid_grid.first_rect(player_rect)
+                if ast:
+                    self.despawn(ast)
+                    self.drop_powerup(ast.rect.center)
+                    damage_taken = True
+
+            if not damage_taken and boss and player_rect.colliderect(boss.rect):
+                damage_taken = True
+
+            if not damage_taken and mini_grid.first_rect(player_rect):
+                damage_taken = True
+
+            if damage_taken:
+                if self.shield_active:
+                    self.shield_active = False
+                else:
+                    self.lives -= 1
+                    self.invincibility_frames = 120
+                    player_rect.centerx = SCREEN_WIDTH // 2
+                    self.combo_count = 0
+                self.play("hit")
+
+            if self.lives <= 0 and not self.game_over:
+                self.game_over = True
+                self.events.append(("game_over", self.score))
+
+        if boss and boss.health <= 0:
+            for _ in range(5):
+                rx = self.drops_rng.randint(boss.rect.left + 30, boss.rect.right - 30)
+                ry = self.drops_rng.randint(boss.rect.top + 50, boss.rect.bottom - 50)
+                self.spawn_powerup((rx, ry), force_drop=True)
+            self.add_score(2000)
+            self.boss_kills += 1
+            self.achievements.bump("boss_kills")
+            self.combo_count += 15
+            self.achievements.reach("combo", self.combo_count)
+            self.combo_timer = 300
+            self.mini_cooldown = 6000
+            self.spawn_pause_timer = 600
+            self.play("explosion")
+            self.boss = None
+            self.next_boss_threshold = self.score + 35000 + self.boss_kills * 15000
+            self.boss_cooldown = 2400
+
+# Simulation on a throwaway window, for soak tests and tooling.
+# Falls back to the SDL dummy video driver unless one is already configured.
+def headless_simulation(unlocked=None):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    return Simulation(Assets(), unlocked)
+
+# Replay files: header (magic, version, seed, tick rate), then one record per tick on
+# which the input changed: varint tick delta + TickInput.pack() bytes. A zero delta ends
+# the stream and is followed by the total tick count (varint) and the final checksum (u32).
+# A file cut short by a crash still plays back up to its last complete record.
+REPLAY_MAGIC = b"ESRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = "<4sBQH"
+REPLAY_DIR = resource_path("replays")
+REPLAY_KEEP = 10
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+# Streams a run's inputs to disk as it is played
+class ReplayRecorder:
+    def __init__(self, path, seed):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(struct.pack(REPLAY_HEADER, REPLAY_MAGIC, REPLAY_VERSION, seed, SIM_RATE))
+        self.last_tick = 0
+        self.last_input = TickInput().pack()
+        self.ticks = 0
+        self.records = 0
+
+    def record(self, tick, packed):
+        self.ticks = tick
+        if packed == self.last_input:
+            return
+        out = bytearray()
+        write_varint(out, tick - self.last_tick)
+        out += packed
+        self.file.write(out)
+        self.last_tick = tick
+        self.last_input = packed
+        self.records += 1
+
+    def finish(self, checksum):
+        out = bytearray()
+        write_varint(out, 0)
+        write_varint(out, self.ticks)
+        out += struct.pack("<I", checksum)
+        self.file.write(out)
+        self.file.close()
+        logging.info(f"Replay saved: {self.path} ({self.ticks} ticks, {self.records} input changes, "
+                     f"{os.path.getsize(self.path)} bytes)")
+
+def start_replay(seed):
+    try:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        names = sorted(n for n in os.listdir(REPLAY_DIR) if n.endswith(".esr"))
+        for name in names[:max(0, len(names) - REPLAY_KEEP + 1)]:
+            os.remove(os.path.join(REPLAY_DIR, name))
+        path = os.path.join(REPLAY_DIR, time.strftime("replay_%Y%m%d_%H%M%S.esr"))
+        return ReplayRecorder(path, seed)
+    except OSError as e:
+        logging.warning(f"Replay recording disabled: {e}")
+        return None
+
+# Returns (seed, [(tick, packed input)], total ticks, final checksum or None)
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, rate = struct.unpack_from(REPLAY_HEADER, data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION or rate != SIM_RATE:
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay at {SIM_RATE} Hz")
+    pos = struct.calcsize(REPLAY_HEADER)
+    changes = []
+    tick = 0
+    total = checksum = None
+    try:
+        while pos < len(data):
+            delta, pos = read_varint(data, pos)
+            if delta == 0:
+                total, pos = read_varint(data, pos)
+                checksum = struct.unpack_from("<I", data, pos)[0]
+                break
+            if pos + TickInput.SIZE > len(data):
+                break
+            tick += delta
+            changes.append((tick, data[pos:pos + TickInput.SIZE]))
+            pos += TickInput.SIZE
+    except (IndexError, struct.error):
+        checksum = None
+    if total is None:
+        total = tick
+    return seed, changes, total, checksum
+
+# Re-simulate a replay as fast as possible; returns (ticks, checksum, recorded checksum)
+def run_replay(sim, path):
+    seed, changes, total, expected = load_replay(path)
+    sim.reset(seed)
+    inputs = TickInput()
+    changes.append((total + 1, None))
+    idx = 0
+    for tick in range(1, total + 1):
+        if changes[idx][0] == tick:
+            inputs = TickInput.unpack(changes[idx][1])
+            idx += 1
+        sim.step(inputs)
+    return total, sim.checksum(), expected
+
+def verify_replay(path):
+    sim = headless_simulation()
+    start = time.perf_counter()
+    ticks, checksum, expected = run_replay(sim, path)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"{path}: {ticks} ticks in {elapsed:.2f}s ({ticks / elapsed / SIM_RATE:.0f}x real time), "
+          f"score {sim.score}, checksum {checksum:08x}")
+    if expected is None:
+        print("replay has no final checksum (recording was cut short)")
+        return 0
+    if checksum != expected:
+        print(f"MISMATCH: recorded checksum {expected:08x}")
+        return 1
+    print("checksum matches")
+    return 0
+
+# Draws a Simulation. Owns everything that only matters on screen:
+# fonts, the pre-baked sprite caches and the starfield.
+# Dirty-rectangle presentation (--dirty-rects). The frame is still composed in full on
+# the screen surface; layers mark the regions they changed and present() pushes only
+# those plus last frame's (so moved content gets erased) with display.update. A frame
+# marked full, or whose dirty area passes the threshold, is flipped whole instead.
+class DirtyRects:
+    LAYERS = ("background", "world", "hud", "ui", "overlay")
+
+    def __init__(self, size, threshold=0.35):
+        self.screen_area = size[0] * size[1]
+        self.limit = threshold * self.screen_area
+        self.layers = {name: [] for name in self.LAYERS}
+        self.previous = []
+        self.full = True
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.last_fraction = 1.0
+
+    def invalidate(self):
+        self.full = True
+
+    def mark(self, layer, rect):
+        self.layers[layer].append(rect)
+
+    def present(self):
+        current = []
+        for rects in self.layers.values():
+            current.extend(rects)
+            rects.clear()
+        dirty = self.previous + current
+        area = sum(r.w * r.h for r in dirty)
+        if self.full or area > self.limit:
+            pygame.display.flip()
+            self.full_frames += 1
+            self.last_fraction = 1.0
+        else:
+            if dirty:
+                pygame.display.update(dirty)
+            self.partial_frames += 1
+            self.last_fraction = area / self.screen_area
+        self.previous = current
+        self.full = False
+
+    def report(self):
+        total = self.full_frames + self.partial_frames
+        if total:
+            logging.info(f"Dirty rects: {self.partial_frames}/{total} frames presented partially")
+
+# Pixel offsets pygame.draw.circle covers for a given radius, read back once so the
+# vectorized starfield stamps exactly the shapes the per-star circles used to draw
+def circle_stamp(radius):
+    size = 2 * radius + 3
+    surf = pygame.Surface((size, size))
+    pygame.draw.circle(surf, (255, 255, 255), (radius + 1, radius + 1), radius)
+    xs, ys = np.nonzero(pygame.surfarray.array2d(surf))
+    return xs - (radius + 1), ys - (radius + 1)
+
+# One channel of src blitted at alpha over dst, with pygame's blend rounding
+def blend_channel(dst, src, alpha):
+    return dst + (((src - dst) * alpha + src) >> 8)
+
+class Renderer:
+    def __init__(self, screen, assets, atlas_path=None):
+        self.screen = screen
+        self.assets = assets
+        self.dirty = None
+
+        # Gameplay sprites and their pulse / rotation frames all live on SpriteAtlas pages
+        # and are drawn as area blits. The pulse cache and asteroid atlas hold subsurfaces
+        # of those pages. With atlas_path the packed pages are reused across launches.
+        self.pulse_cache = PulseCache()
+        self.asteroid_atlas = RotationAtlas(ASTEROID_ROTATION_STEP)
+        sources = self.atlas_sources(assets)
+        signature = self.atlas_signature(sources)
+        self.atlas = SpriteAtlas.load(atlas_path, signature) if atlas_path else None
+        if self.atlas is None:
+            self.atlas = self.pack_atlas(sources)
+            if atlas_path:
+                self.atlas.save(atlas_path, signature)
+        self.atlas.report()
+        for name, img, pulse, rotate in sources:
+            self.atlas.alias(img, name)
+            if pulse and f"{name} pulse 0" in self.atlas.handles:
+                self.pulse_cache.bake(img, pulse, [self.atlas.sprite(f"{name} pulse {i}")
+                                                   for i in range(self.pulse_cache.steps)])
+            if rotate:
+                self.asteroid_atlas.bake(img, [self.atlas.sprite(f"{name} turn {i}")
+                                               for i in range(self.asteroid_atlas.count)])
+        self.pulse_cache.report()
+        self.asteroid_atlas.report()
+
+        self.surfaces = SurfacePool()
+        self.surfaces.bake_alpha(assets.shield_large, 100, 240)
+
+        # Starfield as parallel arrays, advanced in one vectorized step and stamped into
+        # the screen through surfarray. The stage tint and flash are folded into the fill
+        # colour and the per-star colours, so there is no full-screen blend per frame.
+        self.star_rng = np.random.default_rng()
+        self.star_x = self.star_rng.integers(0, SCREEN_WIDTH + 1, STAR_COUNT)
+        self.star_y = self.star_rng.integers(0, SCREEN_HEIGHT + 1, STAR_COUNT).astype(float)
+        self.star_speed = self.star_rng.uniform(0.8, 3.5, STAR_COUNT)
+        star_size = self.star_rng.choice([1, 2], STAR_COUNT)
+        self.star_intensity = 180 + (75 * (self.star_speed / 3.5)).astype(int)
+        self.star_groups = []
+        for radius in (1, 2):
+            dx, dy = circle_stamp(radius)
+            self.star_groups.append((np.flatnonzero(star_size == radius), dx, dy))
+        self.star_colors = {}
+
+        self.font_small = pygame.font.SysFont("arial", 12, bold=True)
+        self.font_hud = pygame.font.SysFont("arial", 16, bold=True)
+        self.font_score = pygame.font.SysFont("arial", 20, bold=True)
+        self.font_gameover = pygame.font.SysFont("arial", 50, bold=True)
+        self.font_menu_button = pygame.font.SysFont("arial", 36, bold=True)
+        self.font_title = pygame.font.SysFont("arial", 42, bold=True)
+        self.font_large = pygame.font.SysFont("arial", 60, bold=True)
+
+        self.text_small = TextCache(self.font_small)
+        self.text_hud = TextCache(self.font_hud)
+        self.text_score = TextCache(self.font_score)
+        self.text_gameover = TextCache(self.font_gameover)
+        self.text_title = TextCache(self.font_title)
+        self.text_large = TextCache(self.font_large)
+
+    # (name, surface, pulse amplitude or 0, rotates) for every gameplay sprite
+    @staticmethod
+    def atlas_sources(assets):
+        sources = []
+        for attr in ("player_normal", "player_boost", "player_damaged", "missile_img", "lives_icon"):
+            sources.append((attr, getattr(assets, attr), 0.0, False))
+        for i, img in enumerate(assets.terminid_imgs + assets.automaton_imgs + assets.illuminate_imgs):
+            sources.append((f"enemy {i}", img, ENEMY_PULSE_AMPLITUDE, False))
+        for i, mb_type in enumerate(assets.mini_boss_types):
+            sources.append((f"mini {i} normal", mb_type["normal"], MINI_PULSE_AMPLITUDE, False))
+            sources.append((f"mini {i} damaged", mb_type["damaged"], MINI_PULSE_AMPLITUDE, False))
+        for i, bt in enumerate(assets.boss_types):
+            sources.append((f"boss {i} normal", bt["normal"], 0.0, False))
+            sources.append((f"boss {i} damaged", bt["damaged"], 0.0, False))
+        for i, img in enumerate(assets.asteroid_imgs):
+            sources.append((f"asteroid {i}", img, 0.0, True))
+        for i, img in enumerate(assets.enemy_blast_imgs):
+            sources.append((f"blast {i}", img, 0.0, False))
+        for i, img in enumerate(assets.dropship_imgs):
+            sources.append((f"dropship {i}", img, 0.0, False))
+        for kind, img in assets.drop_powerup_imgs.items():
+            sources.append((f"drop {kind}", img, 0.0, False))
+        for kind, img in assets.hud_powerup_imgs.items():
+            sources.append((f"hud {kind}", img, 0.0, False))
+        return sources
+
+    def atlas_signature(self, sources):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((SPRITE_ATLAS_VERSION, self.pulse_cache.steps, ASTEROID_ROTATION_STEP)).encode())
+        for name, img, pulse, rotate in sources:
+            digest.update(repr((name, img.get_size(), pulse, rotate)).encode())
+            digest.update(pygame.image.tobytes(img, "RGBA"))
+        return digest.digest()
+
+    def pack_atlas(self, sources):
+        atlas = SpriteAtlas()
+        pulses = PulseCache(self.pulse_cache.steps)
+        turns = RotationAtlas(ASTEROID_ROTATION_STEP)
+        for name, img, pulse, rotate in sources:
+            atlas.add(name, img)
+            if pulse:
+                pulses.bake(img, pulse)
+                for i, frame in enumerate(pulses.frames.get(img, (0, 0, []))[2]):
+                    atlas.add(f"{name} pulse {i}", frame)
+            if rotate:
+                for i, (frame, _, _) in enumerate(turns.bake(img)):
+                    atlas.add(f"{name} turn {i}", frame)
+        atlas.pack()
+        return atlas
+
+    def update_stars(self, frame_ticks):
+        star_y = self.star_y
+        star_y += self.star_speed * frame_ticks
+        wrapped = star_y > SCREEN_HEIGHT
+        if wrapped.any():
+            star_y[wrapped] = -10
+            self.star_x[wrapped] = self.star_rng.integers(0, SCREEN_WIDTH + 1, int(wrapped.sum()))
+
+    # Mapped pixel values of every star under one stage tint
+    def tinted_star_colors(self, tint_idx):
+        colors = self.star_colors.get(tint_idx)
+        if colors is None:
+            tint = STAGE_TINTS[tint_idx]
+            colors = np.array([self.screen.map_rgb([blend_channel(v, c, STAGE_TINT_ALPHA) for c in tint])
+                               for v in self.star_intensity.tolist()], dtype=np.uint32)
+            self.star_colors[tint_idx] = colors
+        return colors
+
+    def draw_background(self, sim):
+        screen = self.screen
+        dirty = self.dirty
+        tint_idx = sim.current_stage % 3
+        tint = STAGE_TINTS[tint_idx]
+
+        # Stage flash: white at fading surface alpha over black, i.e. a grey base before the tint
+        base = 0
+        if sim.stage_transition_timer > 0:
+            if dirty:
+                dirty.invalidate()
+            base = 255 * int(255 * (sim.stage_transition_timer / 120)) >> 8
+        screen.fill([blend_channel(base, c, STAGE_TINT_ALPHA) for c in tint])
+
+        colors = self.tinted_star_colors(tint_idx)
+        star_x = self.star_x
+        star_y = self.star_y.astype(np.intp)
+        pixels = pygame.surfarray.pixels2d(screen)
+        for idx, dx, dy in self.star_groups:
+            px = (star_x[idx, None] + dx).ravel()
+            py = (star_y[idx, None] + dy).ravel()
+            inside = (px >= 0) & (px < SCREEN_WIDTH) & (py >= 0) & (py < SCREEN_HEIGHT)
+            pixels[px[inside], py[inside]] = np.repeat(colors[idx], len(dx))[inside]
+        del pixels
+
+        if dirty:
+            for idx, dx, dy in self.star_groups:
+                w = int(dx.max() - dx.min()) + 1
+                h = int(dy.max() - dy.min()) + 1
+                for x, y in zip((star_x[idx] + dx.min()).tolist(), (star_y[idx] + dy.min()).tolist()):
+                    dirty.mark("background", pygame.Rect(x, y, w, h))
+
+    # interp: fraction of a tick since the last step, for position interpolation
+    def draw_world(self, sim, interp, current_time, anim_timer, show_boss_bar):
+        screen = self.screen
+        assets = self.assets
+        text_hud = self.text_hud
+        dirty = self.dirty
+        region = self.atlas.region
+
+        for ds in sim.dropships:
+            page, area = region(assets.dropship_imgs[ds.frame])
+            screen.blit(page, ds.draw_pos(interp), area)
+
+        page, area = region(assets.missile_img)
+        for m in sim.missiles:
+            screen.blit(page, m.draw_pos(interp), area)
+
+        sim.enemy_bullets.draw(screen, interp, self.atlas)
+
+        for enemy in sim.enemies:
+            phase = enemy.bob_phase
+            offset_y = int(math.sin(current_time / 300 + phase) * 5)
+            pulse = 1.0 + ENEMY_PULSE_AMPLITUDE * math.sin(anim_timer / 8 + phase)
+            page, area = region(self.pulse_cache.frame(enemy.img, pulse))
+            w, h = area.size if area else page.get_size()
+            ex, ey = enemy.draw_pos(interp)
+            cx = ex + enemy.width // 2
+            cy = ey + enemy.height // 2
+            rect = screen.blit(page, (cx - w // 2, cy + offset_y - h // 2), area)
+            if dirty:
+                dirty.mark("world", rect)
+
+        for ast in sim.asteroids:
+            rotated, off_x, off_y = self.asteroid_atlas.frame(ast.img, ast.rotation)
+            page, area = region(rotated)
+            ax, ay = ast.draw_pos(interp)
+            screen.blit(page, (ax + ast.width // 2 + off_x, ay + ast.height // 2 + off_y), area)
+
+        for p in sim.powerups:
+            page, area = region(p.img)
+            screen.blit(page, p.draw_pos(interp), area)
+
+        mini_pulse = 1.0 + MINI_PULSE_AMPLITUDE * math.sin(anim_timer / 10)
+        for mini in sim.mini_bosses:
+            img = mini.damaged_img if mini.phase == 2 else mini.normal_img
+            page, area = region(self.pulse_cache.frame(img, mini_pulse))
+            w, h = area.size if area else page.get_size()
+            mx, my = mini.draw_pos(interp)
+            mini_cx = mx + mini.width // 2
+            rect = screen.blit(page, (mini_cx - w // 2, my + mini.height // 2 - h // 2), area)
+            if dirty:
+                dirty.mark("world", rect)
+            bar_width = 120
+            bar_x = mini_cx - bar_width // 2
+            bar_y = my - 40
+            pygame.draw.rect(screen, (50, 0, 0), (bar_x, bar_y, bar_width, 14))
+            pygame.draw.rect(screen, (200, 0, 0), (bar_x, bar_y, bar_width, 14), 2)
+            fill = int((mini.health / mini.max_health) * bar_width)
+            pygame.draw.rect(screen, (255, 50, 50), (bar_x + 2, bar_y + 2, fill - 4, 10))
+            label = text_hud.surface("MINI-BOSS", (255, 255, 0))
+            screen.blit(label, (mini_cx - label.get_width() // 2, bar_y - 25))
+
+        boss = sim.boss
+        if boss:
+            bt = assets.boss_types[boss.type_idx]
+            base_img = bt["damaged"] if boss.phase >= 2 else bt["normal"]
+            bx, by = boss.draw_pos(interp)
+            boss_rect = base_img.get_rect(center=(bx + boss.width // 2, by + boss.height // 2))
+            page, area = region(base_img)
+            screen.blit(page, boss_rect, area)
+            if boss.invuln:
+                screen.blit(self.surfaces.filled(boss_rect.size, (100, 100, 255, 80), pygame.SRCALPHA), boss_rect)
+            boss_label = text_hud.surface(bt["name"], (255, 255, 0))
+            screen.blit(boss_label, (SCREEN_WIDTH // 2 - boss_label.get_width() // 2, 20))
+
+        base_img = assets.player_normal
+        if sim.boosting:
+            base_img = assets.player_boost
+        elif sim.lives <= 1 or sim.invincibility_frames > 0:
+            base_img = assets.player_damaged
+        player_rect = sim.player_rect
+        prev_player_pos = sim.prev_player_pos
+        player_draw_rect = player_rect.copy()
+        player_draw_rect.topleft = (int(prev_player_pos[0] + (player_rect.x - prev_player_pos[0]) * interp),
+                                    int(prev_player_pos[1] + (player_rect.y - prev_player_pos[1]) * interp))
+        page, area = region(base_img)
+        screen.blit(page, player_draw_rect, area)
+
+        if sim.shield_active:
+            pulse = (math.sin(current_time / 180.0) + 1.0) / 2.0
+            glow_radius = int(55 + 12 * pulse)
+            glow_alpha = int(30 + 50 * pulse)
+            glow_rect = pygame.draw.circle(screen, (80, 180, 255, glow_alpha), player_draw_rect.center, glow_radius, width=10)
+
+            shield_img = self.surfaces.faded(assets.shield_large, int(100 + 140 * pulse))
+            shield_rect = shield_img.get_rect(center=player_draw_rect.center)
+            screen.blit(shield_img, shield_rect)
+            if dirty:
+                dirty.mark("world", glow_rect.union(shield_rect))
+
+        if boss and show_boss_bar:
+            bar_x = SCREEN_WIDTH // 2 - 160
+            bar_y = 60
+            bar_width = 320
+            pygame.draw.rect(screen, (100, 0, 0), (bar_x, bar_y, bar_width, 30))
+            pygame.draw.rect(screen, (200, 0, 0), (bar_x, bar_y, bar_width, 30), 4)
+            fill = max(0, int((boss.health / boss.max_health) * bar_width))
+            pygame.draw.rect(screen, (255, 0, 0), (bar_x + 4, bar_y + 4, fill - 8, 22))
+
+    def draw_hud(self, sim, high_score, input_mode, fps):
+        screen = self.screen
+        hud_powerup_imgs = self.assets.hud_powerup_imgs
+        region = self.atlas.region
+        text_small = self.text_small
+        text_hud = self.text_hud
+        text_score = self.text_score
+        lives = sim.lives
+
+        hud_x = 20
+        hud_y = 70
+
+        icon_spacing = 30
+        page, area = region(self.assets.lives_icon)
+        for i in range(lives):
+            screen.blit(page, (hud_x + i * icon_spacing, hud_y), area)
+        lives_color = (0, 255, 255) if lives > 1 else (255, 50, 50)
+        text_hud.draw_label(screen, "x ", str(lives), lives_color, (hud_x + lives * icon_spacing + 5, hud_y + 5))
+
+        hud_y += 35
+        text_score.draw_label(screen, "Score: ", str(sim.score), (255, 255, 255), (hud_x, hud_y))
+
+        hud_y += 30
+        text_hud.draw_label(screen, "High Score: ", str(high_score), (255, 255, 100), (hud_x, hud_y))
+
+        hud_y += 35
+        screen.blit(text_small.surface(f"Input: {input_mode}", (200, 200, 200)), (hud_x, hud_y))
+
+        hud_y += 20
+        fps_w = text_small.draw_label(screen, "FPS: ", str(int(fps)), (100, 255, 100), (hud_x, hud_y))
+        if self.dirty:
+            self.dirty.mark("hud", pygame.Rect(hud_x, hud_y, fps_w, text_small.height))
+
+        hud_y += 35
+        meter_x = hud_x
+        meter_w = 150
+        meter_h = 15
+        boost_meter = sim.boost_meter
+        pygame.draw.rect(screen, (30, 30, 30), (meter_x, hud_y, meter_w, meter_h))
+        pygame.draw.rect(screen, (200, 200, 200), (meter_x, hud_y, meter_w, meter_h), 2)
+        boost_fill = int((boost_meter / MAX_BOOST) * meter_w)
+        boost_color = (0, 255, 255) if boost_meter > LOW_BOOST_THRESHOLD * 2 else (50, 100, 255) if boost_meter > LOW_BOOST_THRESHOLD else (255, 50, 50)
+        pygame.draw.rect(screen, boost_color, (meter_x + 2, hud_y + 2, boost_fill - 4, meter_h - 4))
+        screen.blit(text_small.surface("BOOST", (255, 255, 255)), (meter_x, hud_y - 20))
+
+        eagle_meter = sim.eagle_meter
+        eagle_y = hud_y + 30
+        pygame.draw.rect(screen, (30, 30, 30), (meter_x, eagle_y, meter_w, meter_h))
+        pygame.draw.rect(screen, (200, 200, 200), (meter_x, eagle_y, meter_w, meter_h), 2)
+        eagle_fill = int((eagle_meter / MAX_EAGLE) * meter_w)
+        eagle_color = (0, 255, 255) if eagle_meter == MAX_EAGLE else (100, 100, 255)
+        pygame.draw.rect(screen, eagle_color, (meter_x + 2, eagle_y + 2, eagle_fill - 4, meter_h - 4))
+        screen.blit(text_small.surface("EAGLE / BOMB", (255, 255, 255)), (meter_x, eagle_y - 20))
+
+        if eagle_meter == MAX_EAGLE:
+            screen.blit(text_small.surface("EAGLE READY!", (0, 255, 0)), (meter_x + meter_w + 10, eagle_y))
+        elif sim.bomb_charges > 0:
+            text_small.draw_label(screen, "BOMB x", str(sim.bomb_charges), (255, 100, 0), (meter_x + meter_w + 10, eagle_y))
+
+        powerup_y = eagle_y + 50
+        screen.blit(text_small.surface("POWER-UPS:", (255, 255, 0)), (meter_x, powerup_y - 25))
+
+        icon_x = meter_x
+        icon_size = 35
+        icon_spacing = 50
+
+        if sim.rapid_timer > 0:
+            page, area = region(hud_powerup_imgs["rapid"])
+            screen.blit(page, (icon_x, powerup_y), area)
+            text_small.draw(screen, f"{int(sim.rapid_timer)}s", (0, 255, 255), (icon_x + 5, powerup_y + icon_size + 5))
+            icon_x += icon_spacing
+
+        if sim.triple_timer > 0:
+            page, area = region(hud_powerup_imgs["triple"])
+            screen.blit(page, (icon_x, powerup_y), area)
+            text_small.draw(screen, f"{int(sim.triple_timer)}s", (255, 255, 0), (icon_x + 5, powerup_y + icon_size + 5))
+            icon_x += icon_spacing
+
+        if sim.shield_active:
+            page, area = region(hud_powerup_imgs["shield"])
+            screen.blit(page, (icon_x, powerup_y), area)
+            screen.blit(text_small.surface("ACTIVE", (0, 255, 255)), (icon_x + 5, powerup_y + icon_size + 5))
+            icon_x += icon_spacing
+
+        if sim.bomb_charges > 0:
+            page, area = region(hud_powerup_imgs["bomb"])
+            for c in range(sim.bomb_charges):
+                screen.blit(page, (icon_x + c * (icon_size + 10), powerup_y), area)
+
+        if sim.combo_count > 1:
+            multiplier = min(4.0, 1.0 + sim.combo_count * 0.25)
+            combo_text = f"COMBO x{sim.combo_count} ({multiplier:.1f}x)"
+            text_score.draw(screen, combo_text, (255, 255, 100), (SCREEN_WIDTH // 2 - text_score.width(combo_text) // 2, 30))
+
+# Per-frame phase timings behind the F3 overlay. Timing is always on: a few
+# perf_counter calls per frame written into a ring buffer. The panel, graph and text
+# are only built while the overlay is visible.
+class FrameProfiler:
+    PHASES = ("input", "spawn", "movement", "collision", "audio", "render", "flip")
+    INPUT, SPAWN, MOVEMENT, COLLISION, AUDIO, RENDER, FLIP = range(7)
+    COLORS = [(120, 120, 255), (255, 160, 60), (80, 220, 120), (255, 80, 80),
+              (220, 120, 255), (80, 200, 255), (200, 200, 200)]
+    GRAPH_MS = 33.3
+
+    def __init__(self, history=240):
+        self.visible = False
+        self.history = history
+        self.samples = np.zeros((history, len(self.PHASES)), np.float32)
+        self.index = 0
+        self.frames = 0
+        self.current = [0.0] * len(self.PHASES)
+        self.mark = time.perf_counter()
+        self.panel = pygame.Surface((260, 290), pygame.SRCALPHA)
+
+    def toggle(self):
+        self.visible = not self.visible
+        logging.debug("Profiler overlay %s", "shown" if self.visible else "hidden")
+
+    def begin_frame(self):
+        current = self.current
+        for i in range(len(current)):
+            current[i] = 0.0
+        self.mark = time.perf_counter()
+
+    # Charge the time since the last mark to `phase` (index into PHASES)
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += (now - self.mark) * 1000.0
+        self.mark = now
+
+    # Charge a simulation step: its own spawn / collision timers, the rest as movement
+    def lap_sim(self, sim):
+        now = time.perf_counter()
+        elapsed = (now - self.mark) * 1000.0
+        self.current[self.SPAWN] += sim.spawn_ms
+        self.current[self.COLLISION] += sim.collision_ms
+        self.current[self.MOVEMENT] += max(0.0, elapsed - sim.spawn_ms - sim.collision_ms)
+        self.mark = now
+
+    def end_frame(self):
+        self.samples[self.index] = self.current
+        self.index = (self.index + 1) % self.history
+        self.frames += 1
+
+    def draw(self, screen, text, sim):
+        panel = self.panel
+        panel.fill((0, 0, 0, 180))
+        count = min(self.frames, self.history)
+        if count == 0:
+            return None
+        ordered = np.roll(self.samples, -self.index, axis=0)[self.history - count:]
+        totals = ordered.sum(axis=1)
+        recent = ordered[-60:].mean(axis=0)
+
+        y = 6
+        text.draw(panel, f"frame {totals[-1]:5.2f} ms  avg {totals[-60:].mean():5.2f}  max {totals.max():5.2f}",
+                  (255, 255, 255), (6, y))
+        y += 18
+        for i, name in enumerate(self.PHASES):
+            pygame.draw.rect(panel, self.COLORS[i], (6, y + 3, 8, 8))
+            text.draw(panel, f"{name:<10} {recent[i]:6.2f} ms  peak {ordered[:, i].max():6.2f}", (220, 220, 220), (20, y))
+            y += 15
+
+        # Stacked bar of the 60-frame phase averages, scaled to the graph range
+        y += 4
+        x = 6
+        bar_w = panel.get_width() - 12
+        for i in range(len(self.PHASES)):
+            w = int(recent[i] / self.GRAPH_MS * bar_w)
+            if w > 0:
+                pygame.draw.rect(panel, self.COLORS[i], (x, y, w, 8))
+                x += w
+        y += 14
+
+        # Rolling frame-time graph with 60 / 30 FPS reference lines
+        graph_h = 80
+        graph_w = panel.get_width() - 12
+        pygame.draw.rect(panel, (40, 40, 40, 200), (6, y, graph_w, graph_h))
+        for ref, color in ((1000.0 / 60, (80, 160, 80)), (1000.0 / 30, (160, 80, 80))):
+            ry = y + graph_h - int(min(ref, self.GRAPH_MS) / self.GRAPH_MS * graph_h)
+            pygame.draw.line(panel, color, (6, ry), (6 + graph_w, ry))
+        if count > 1:
+            step = graph_w / (self.history - 1)
+            x0 = 6 + graph_w - (count - 1) * step
+            points = [(x0 + i * step, y + graph_h - min(float(t), self.GRAPH_MS) / self.GRAPH_MS * graph_h)
+                      for i, t in enumerate(totals)]
+            pygame.draw.lines(panel, (255, 255, 255), False, points)
+        y += graph_h + 6
+
+        counts = (("enemies", len(sim.enemies)), ("enemy_projectiles", sim.enemy_bullets.count),
+                  ("missiles", len(sim.missiles)), ("asteroids", len(sim.asteroids)),
+                  ("powerups", len(sim.powerups)), ("mini_bosses", len(sim.mini_bosses)))
+        for i, (name, value) in enumerate(counts):
+            text.draw(panel, f"{name} {value}", (255, 255, 150), (6 + (i % 2) * 130, y + (i // 2) * 15))
+
+        return screen.blit(panel, (SCREEN_WIDTH - panel.get_width() - 10, SCREEN_HEIGHT - panel.get_height() - 10))
+
+def main(dirty_rects=False):
+    global leaderboard, high_score, persistence
+
+    start_logging()
+
+    input_text = ""
+    startup = StartupTimer()
+    persistence = PersistenceWorker()
+
+    try:
+        pygame.init()
+        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+        logging.info("Pygame and mixer initialized successfully")
+    except Exception as e:
+        logging.critical(f"Pygame init failed: {e}\n{traceback.format_exc()}")
+        sys.exit(1)
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Eagle Strike")
+
+    clock = pygame.time.Clock()
+
+    music_volume = 0.5
+    sfx_volume = 0.7
+    startup.phase("init")
+
+    # Channels 0-1 carry music and are reserved so Sound.play() never takes them
+    pygame.mixer.set_num_channels(10)
+    pygame.mixer.set_reserved(2)
+    music = MusicManager([f"background_music{i}.wav" for i in range(1, 11)], (0, 1), music_volume)
+
+    # The menu only needs music, fonts and the starfield, so the music starts decoding
+    # before any sprite and comes in over the loading screen.
+    music.play()
+    startup.phase("music")
+
+    loading_font = pygame.font.SysFont("arial", 36, bold=True)
+    loading_drawn = 0.0
+    startup.phase("fonts")
+
+    # Progress callback for the loader: redraws at most once per display frame and
+    # keeps the window responsive while the workers decode.
+    def draw_loading(done, total, filename):
+        nonlocal loading_drawn
+        now = time.perf_counter()
+        if done < total and now - loading_drawn < 1 / FPS:
+            return
+        loading_drawn = now
+        music.update()
+        if pygame.event.peek(pygame.QUIT):
+            loader.shutdown()
+            music.shutdown()
+            logging.info(f"Quit during loading ({done}/{total})")
+            pygame.quit()
+            sys.exit(0)
+        pygame.event.pump()
+        screen.fill((0, 0, 0))
+        label = loading_font.render(f"LOADING  {done * 100 // max(1, total)}%", True, (255, 255, 255))
+        screen.blit(label, label.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40)))
+        bar = pygame.Rect(0, 0, 400, 24)
+        bar.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10)
+        pygame.draw.rect(screen, (255, 255, 0), (bar.x, bar.y, bar.width * done // max(1, total), bar.height))
+        pygame.draw.rect(screen, (255, 255, 255), bar, 2)
+        pygame.display.flip()
+
+    pickup_files = [f"power_up{i}.wav" for i in range(1, 7)]
+    sprite_cache = SpriteCache()
+    loader = AssetLoader(progress=draw_loading)
+    loader.prefetch(images=Assets.stale_images(sprite_cache),
+                    sounds=["Player_shoot1.wav", "Player_shoot2.wav", "Player_hit.wav", "Player_hit2.wav",
+                            "explosion1.wav", "explosion2.wav", "boost.wav", "Eagle_strike_activation.wav"]
+                    + pickup_files)
+    draw_loading(0, loader.total, None)
+
+    assets = Assets(loader, sprite_cache)
+    startup.phase("sprites")
+    sprite_cache.report(startup.phases[-1][1] * 1000)
+    sprite_cache.save(startup.phases[-1][1] * 1000)
+    sprite_cache.close()
+
+    shoot_sounds = [loader.sound("Player_shoot1.wav"), loader.sound("Player_shoot2.wav")]
+    shoot_sounds = [s for s in shoot_sounds if s is not None]
+
+    hit_sounds = [loader.sound("Player_hit.wav"), loader.sound("Player_hit2.wav")]
+    hit_sounds = [s for s in hit_sounds if s is not None]
+
+    explosion_sounds = [loader.sound("explosion1.wav"), loader.sound("explosion2.wav")]
+    explosion_sounds = [s for s in explosion_sounds if s is not None]
+
+    boost_sound = loader.sound("boost.wav")
+
+    eagle_strike_sound = loader.sound("Eagle_strike_activation.wav")
+
+    pickup_sounds = []
+    for filename in pickup_files:
+        s = loader.sound(filename)
+        if s:
+            pickup_sounds.append(s)
+
+    for s in all_sfx:
+        if s:
+            s.set_volume(sfx_volume)
+    loader.shutdown()
+    startup.phase("sounds")
+
+    sim = Simulation(assets, unlocked_achievements)
+    renderer = Renderer(screen, assets, SPRITE_ATLAS_FILE)
+    surfaces = renderer.surfaces
+    profiler = FrameProfiler()
+    dirty = None
+    if dirty_rects:
+        dirty = DirtyRects((SCREEN_WIDTH, SCREEN_HEIGHT))
+        renderer.dirty = dirty
+        logging.info("Dirty-rect rendering enabled")
+    ui_signature = None
+    startup.phase("renderer")
+
+    FIRE_DEADZONE = 0.3
+
+    joystick = None
+    def init_joystick():
+        nonlocal joystick
+        if pygame.joystick.get_count() > 0:
+            try:
+                joystick = pygame.joystick.Joystick(0)
+                joystick.init()
+                logging.info(f"Controller connected: {joystick.get_name()}")
+                return True
+            except pygame.error as e:
+                logging.warning(f"Joystick init failed: {e}")
+                joystick = None
+                return False
+        return False
+
+    init_joystick() or logging.info("No controller detected - keyboard mode")
+
+    font_hud = renderer.font_hud
+    font_menu_button = renderer.font_menu_button
+    text_small = renderer.text_small
+    text_hud = renderer.text_hud
+    text_score = renderer.text_score
+    text_gameover = renderer.text_gameover
+    text_title = renderer.text_title
+    text_large = renderer.text_large
+
+    # Boost is a held loop on its own channel; every other effect goes through the scheduler.
+    # name -> (priority, voice limit, variations)
+    boost_channel = pygame.mixer.Channel(2)
+    sfx = SfxScheduler(range(3, 10), {
+        "eagle_strike": (3, 1, [eagle_strike_sound] if eagle_strike_sound else []),
+        "hit": (3, 1, hit_sounds),
+        "explosion": (2, 2, explosion_sounds),
+        "pickup": (2, 2, pickup_sounds),
+        "shoot": (1, 1, shoot_sounds),
+    })
+
+    current_state = "menu"
+    previous_state = "menu"
+    selected_index = 0
+
+    button_width = 320
+    button_height = 80
+    center_x = SCREEN_WIDTH // 2 - button_width // 2
+    small_w = 60
+    small_h = 60
+
+    CONTROLLER_SELECT = 0
+    CONTROLLER_CANCEL = 1
+    CONTROLLER_PAUSE = 9
+
+    menu_stick_delay = 0
+    MENU_STICK_REPEAT = 10
+
+    def change_music_volume(delta):
+        nonlocal music_volume
+        music_volume = round(max(0.0, min(1.0, music_volume + delta)), 1)
+        music.set_volume(music_volume)
 
-        elif formation_type == "arrow":
-            # Pointed downward arrow centered
-            positions = [
-                (0, 0), (-60, 60), (60, 60),
-                (-120, 120), (120, 120),
-                (-60, 180), (60, 180), (0, 240)
-            ]
-            for dx, dy in positions:
-                x = center_x + dx
-                y = base_y + dy
-                if x < 60 or x > SCREEN_WIDTH - 60:
-                    continue
-                img = random.choice(img_list)
-                rect = img.get_rect(center=(x, y))
-                enemies.append({"rect": rect, "img": img, "speed": speed + 0.8, "wiggle": 0, "type": "grunt", "fire_timer": 0, "bob_phase": random.random() * math.tau})
+    def change_sfx_volume(delta):
+        nonlocal sfx_volume
+        sfx_volume = round(max(0.0, min(1.0, sfx_volume + delta)), 1)
+        for s in all_sfx:
+            if s:
+                s.set_volume(sfx_volume)
 
-        elif formation_type == "walls":
-            # Two walls coming in from sides toward center
-            count = 6 + current_stage
-            for side in [-1, 1]:
-                start_x = center_x + side * 200
-                for i in range(count):
-                    x = start_x + side * i * 40
-                    y = base_y + i * 60
-                    img = random.choice(img_list)
-                    rect = img.get_rect(center=(x, y))
-                    enemies.append({"rect": rect, "img": img, "speed": speed, "wiggle": side * -2.0, "type": "shooter" if i % 2 == 0 else "fast", "fire_timer": i * 12, "bob_phase": random.random() * math.tau})
+    achievement_popup = None
+    replay = None
 
-        elif formation_type == "diamond":
-            positions = [(0,0), (-100,80), (100,80), (0,160), (-100,240), (100,240)]
-            for dx, dy in positions:
-                x = center_x + dx
-                y = base_y + dy
-                if x < 60 or x > SCREEN_WIDTH - 60:
-                    continue
-                img = random.choice(img_list)
-                rect = img.get_rect(center=(x, y))
-                enemies.append({"rect": rect, "img": img, "speed": speed + 0.5, "wiggle": 0, "type": "shooter" if dx == 0 else "grunt", "fire_timer": 0, "bob_phase": random.random() * math.tau})
+    def finish_replay():
+        nonlocal replay
+        if replay:
+            try:
+                replay.finish(sim.checksum())
+            except OSError as e:
+                logging.warning(f"Failed to finish replay {replay.path}: {e}")
+            replay = None
 
-        elif formation_type == "cross":
-            # Horizontal and vertical cross centered
-            for i in range(-3, 4):
-                if i == 0: continue
-                # Horizontal
-                x = center_x + i * 70
-                y = base_y + 100
-                img = random.choice(img_list)
-                rect = img.get_rect(center=(x, y))
-                enemies.append({"rect": rect, "img": img, "speed": speed, "wiggle": 0, "type": "shooter", "fire_timer": abs(i)*10, "bob_phase": random.random() * math.tau})
-                # Vertical
-                x = center_x
-                y = base_y + 100 + i * 70
-                rect = img.get_rect(center=(x, y))
-                enemies.append({"rect": rect, "img": img, "speed": speed + 1.0, "wiggle": 0, "type": "fast", "fire_timer": 0, "bob_phase": random.random() * math.tau})
-
-    def reset_game_variables():
-        nonlocal player_rect, lives, score, boost_meter, eagle_meter, rapid_timer, triple_timer
-        nonlocal shield_active, bomb_charges, boss, next_boss_threshold, invincibility_frames, boosting
-        nonlocal current_event, event_timer, last_event_score
-        nonlocal current_stage, stage_transition_timer
-        nonlocal mini_cooldown, boss_cooldown, spawn_pause_timer, formation_timer
-        player_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-        lives = 3
-        score = 0
-        boost_meter = max_boost
-        eagle_meter = max_eagle
-        rapid_timer = triple_timer = 0.0
-        shield_active = False
-        bomb_charges = 0
-        boss = None
-        next_boss_threshold = 20000
-        invincibility_frames = 0
-        boosting = False
-        boss_cooldown = 0
-        spawn_pause_timer = 0
-        formation_timer = 0
-        missiles.clear()
-        enemy_projectiles.clear()
-        enemies.clear()
-        asteroids.clear()
-        powerups.clear()
-        mini_bosses.clear()
-        dropships.clear()
-        current_event = None
-        event_timer = 0
-        last_event_score = 0
-        current_stage = 0
-        stage_transition_timer = 0
-        mini_cooldown = 0
-        nonlocal mini_spawn_timer, mini_warning_timer, boss_warning_timer, enemy_spawn_timer
-        mini_spawn_timer = mini_warning_timer = boss_warning_timer = enemy_spawn_timer = 0
-        
-        nonlocal combo_count, combo_timer, total_kills, boss_kills, mini_boss_kills, achievement_popup
-        combo_count = 0
-        combo_timer = 0.0
-        total_kills = 0
-        boss_kills = 0
-        mini_boss_kills = 0
-        achievement_popup = None
-        
+    def stop_channels():
         boost_channel.stop()
-        shoot_channel.stop()
-        explosion_channel.stop()
-        hit_channel.stop()
-    
+        sfx.stop()
+
     def start_new_game():
-        nonlocal current_state
-        reset_game_variables()
-        pygame.mixer.music.play(-1)
+        nonlocal current_state, achievement_popup, replay
+        finish_replay()
+        sim.reset()
+        replay = start_replay(sim.seed)
+        achievement_popup = None
+        stop_channels()
+        music.play()
         current_state = "playing"
-    
+
     def open_settings(state):
         nonlocal current_state, previous_state, selected_index
         previous_state = state
         current_state = "settings"
         selected_index = 0
-    
+
     def back_from_settings():
         nonlocal current_state, selected_index
         current_state = previous_state
         selected_index = 0
-    
+
     def open_leaderboard(state):
         nonlocal current_state, previous_state, selected_index
         previous_state = state
         current_state = "leaderboard"
         selected_index = 0
-    
+
     def back_from_leaderboard():
         nonlocal current_state
         current_state = previous_state
-    
+
     def resume_game():
         nonlocal current_state
         current_state = "playing"
-    
+
     def return_to_main_menu():
         nonlocal current_state
-        pygame.mixer.music.stop()
+        finish_replay()
+        music.stop()
         current_state = "menu"
-    
+
     def quit_game():
         nonlocal running
         running = False
-    
+
+    # Poll controller / keyboard into one tick's worth of input
+    def poll_input():
+        nonlocal joystick
+        if joystick is None:
+            init_joystick()
+
+        inputs = TickInput()
+        if joystick:
+            try:
+                raw_move_x = joystick.get_axis(0)
+                raw_move_y = joystick.get_axis(1)
+                if abs(raw_move_x) > 0.18:
+                    inputs.move_x = raw_move_x
+                if abs(raw_move_y) > 0.18:
+                    inputs.move_y = raw_move_y
+
+                r2 = joystick.get_axis(5)
+                if r2 > FIRE_DEADZONE:
+                    inputs.fire = True
+
+                l2 = joystick.get_axis(4)
+                if l2 > FIRE_DEADZONE:
+                    inputs.special = True
+
+                if joystick.get_button(0):
+                    inputs.boost = True
+            except:
+                joystick = None
+
+        keys = pygame.key.get_pressed()
+        if not joystick:
+            if keys[pygame.K_a] or keys[pygame.K_LEFT]: inputs.move_x -= 1
+            if keys[pygame.K_d] or keys[pygame.K_RIGHT]: inputs.move_x += 1
+            if keys[pygame.K_w] or keys[pygame.K_UP]: inputs.move_y -= 1
+            if keys[pygame.K_s] or keys[pygame.K_DOWN]: inputs.move_y += 1
+            if keys[pygame.K_SPACE]: inputs.fire = True
+            if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]: inputs.boost = True
+            if keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]: inputs.special = True
+        return inputs
+
+    # Queue what the last simulation step asked for; sfx.flush() plays it once per frame
+    def play_sim_sounds():
+        for name, chance in sim.sounds:
+            sfx.request(name, chance)
+
     main_menu_buttons = [
         Button(pygame.Rect(center_x, 250, button_width, button_height), "START GAME", start_new_game, font_menu_button),
         Button(pygame.Rect(center_x, 370, button_width, button_height), "SETTINGS", lambda: open_settings("menu"), font_menu_button),
         Button(pygame.Rect(center_x, 490, button_width, button_height), "LEADERBOARD", lambda: open_leaderboard("menu"), font_menu_button),
         Button(pygame.Rect(center_x, 610, button_width, button_height), "QUIT", quit_game, font_menu_button),
     ]
-    
+
     settings_buttons = [
         Button(pygame.Rect(SCREEN_WIDTH // 2 - 200, 280, small_w, small_h), "-", lambda: change_music_volume(-0.1), font_hud),
         Button(pygame.Rect(SCREEN_WIDTH // 2 + 140, 280, small_w, small_h), "+", lambda: change_music_volume(0.1), font_hud),
@@ -746,41 +3544,38 @@ def main():
         Button(pygame.Rect(SCREEN_WIDTH // 2 + 140, 400, small_w, small_h), "+", lambda: change_sfx_volume(0.1), font_hud),
         Button(pygame.Rect(center_x, 580, button_width, button_height), "BACK", back_from_settings, font_menu_button),
     ]
-    
+
     pause_buttons = [
         Button(pygame.Rect(center_x, 250, button_width, button_height), "RESUME", resume_game, font_menu_button),
         Button(pygame.Rect(center_x, 380, button_width, button_height), "SETTINGS", lambda: open_settings("pause"), font_menu_button),
         Button(pygame.Rect(center_x, 510, button_width, button_height), "MAIN MENU", return_to_main_menu, font_menu_button),
         Button(pygame.Rect(center_x, 640, button_width, button_height), "QUIT", quit_game, font_menu_button),
     ]
-    
+
     game_over_buttons = [
         Button(pygame.Rect(center_x, 410, button_width, button_height), "RESTART", start_new_game, font_menu_button),
         Button(pygame.Rect(center_x, 520, button_width, button_height), "LEADERBOARD", lambda: open_leaderboard("game_over"), font_menu_button),
         Button(pygame.Rect(center_x, 630, button_width, button_height), "MAIN MENU", return_to_main_menu, font_menu_button),
         Button(pygame.Rect(center_x, 740, button_width, button_height), "QUIT", quit_game, font_menu_button),
     ]
-    
+
     leaderboard_buttons = [
         Button(pygame.Rect(center_x, 750, button_width, button_height), "BACK", back_from_leaderboard, font_menu_button),
     ]
-    
-    boosting = False
-    
-    anim_timer = 0
-    
+
+    anim_timer = 0.0
+    accumulator = 0.0
+
     running = True
     while running:
-        dt = clock.tick(FPS) / 1000.0
-        current_time = pygame.time.get_ticks()
-        anim_timer += 1
-        
-        for star in stars:
-            star['y'] += star['speed']
-            if star['y'] > SCREEN_HEIGHT:
-                star['y'] = -10
-                star['x'] = random.randint(0, SCREEN_WIDTH)
-        
+        frame_dt = clock.tick(FPS) / 1000.0
+        frame_ticks = frame_dt * SIM_RATE
+        anim_timer += frame_ticks
+        profiler.begin_frame()
+
+        renderer.update_stars(frame_ticks)
+        profiler.lap(profiler.RENDER)
+
         if current_state == "menu":
             buttons = main_menu_buttons
         elif current_state == "settings":
@@ -793,14 +3588,20 @@ def main():
             buttons = leaderboard_buttons
         else:
             buttons = []
-        
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+
+            if dirty and event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                dirty.invalidate()
+
             if event.type == pygame.JOYBUTTONDOWN:
-                logging.info(f"Controller button pressed: {event.button}")
-            
+                logging.debug("Controller button pressed: %d", event.button)
+
             if current_state in ["menu", "settings", "pause", "game_over", "leaderboard"]:
                 if event.type == pygame.JOYBUTTONDOWN:
                     if event.button == CONTROLLER_SELECT:
@@ -812,11 +3613,11 @@ def main():
                             resume_game()
                         elif current_state == "leaderboard":
                             back_from_leaderboard()
-            
+
             if event.type == pygame.JOYBUTTONDOWN and event.button == CONTROLLER_PAUSE and current_state == "playing":
                 current_state = "pause"
                 selected_index = 0
-            
+
             if current_state in ["menu", "settings", "pause", "game_over", "leaderboard"]:
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     for i, button in enumerate(buttons):
@@ -832,12 +3633,12 @@ def main():
                     elif event.key in (pygame.K_SPACE, pygame.K_RETURN):
                         if buttons:
                             buttons[selected_index].action()
-            
+
             if current_state == "enter_initials":
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN:
                         if len(input_text) == 3:
-                            leaderboard.append({"name": input_text.upper(), "score": score})
+                            leaderboard.append({"name": input_text.upper(), "score": sim.score})
                             leaderboard.sort(key=lambda x: x["score"], reverse=True)
                             leaderboard = leaderboard[:10]
                             save_leaderboard()
@@ -849,16 +3650,16 @@ def main():
                         current_state = "game_over"
                     elif len(input_text) < 3 and event.unicode.isalpha():
                         input_text += event.unicode.upper()
-            
+
             if current_state == "playing" and event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 current_state = "pause"
                 selected_index = 0
-        
+
         if current_state in ["menu", "settings", "pause", "game_over", "leaderboard"] and joystick:
             try:
                 stick_y = joystick.get_axis(1)
                 if menu_stick_delay > 0:
-                    menu_stick_delay -= 1
+                    menu_stick_delay -= frame_ticks
                 elif abs(stick_y) > 0.3:
                     if stick_y < -0.3:
                         selected_index = (selected_index - 1) % len(buttons)
@@ -868,946 +3669,194 @@ def main():
                         menu_stick_delay = MENU_STICK_REPEAT
             except:
                 pass
-        
+
         if current_state == "playing":
-            if joystick is None:
-                init_joystick()
-            
-            move_x = move_y = 0.0
-            fire_input = False
-            boost_held = False
-            special_input = False
-            
-            if joystick:
-                try:
-                    raw_move_x = joystick.get_axis(0)
-                    raw_move_y = joystick.get_axis(1)
-                    if abs(raw_move_x) > 0.18:
-                        move_x = raw_move_x
-                    if abs(raw_move_y) > 0.18:
-                        move_y = raw_move_y
-                    
-                    r2 = joystick.get_axis(5)
-                    if r2 > FIRE_DEADZONE:
-                        fire_input = True
-                    
-                    l2 = joystick.get_axis(4)
-                    if l2 > FIRE_DEADZONE:
-                        special_input = True
-                    
-                    if joystick.get_button(0):
-                        boost_held = True
-                except:
-                    joystick = None
-            
-            keys = pygame.key.get_pressed()
-            if not joystick:
-                if keys[pygame.K_a] or keys[pygame.K_LEFT]: move_x -= 1
-                if keys[pygame.K_d] or keys[pygame.K_RIGHT]: move_x += 1
-                if keys[pygame.K_w] or keys[pygame.K_UP]: move_y -= 1
-                if keys[pygame.K_s] or keys[pygame.K_DOWN]: move_y += 1
-                if keys[pygame.K_SPACE]: fire_input = True
-                if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]: boost_held = True
-                if keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]: special_input = True
-            
-            if move_x != 0 or move_y != 0:
-                mag = math.hypot(move_x, move_y)
-                if mag > 0:
-                    move_x /= mag
-                    move_y /= mag
-            
-            boosting = boost_held and boost_meter > 0
-            if boosting:
-                boost_meter -= boost_drain_rate * dt
-                if boost_meter < 0:
-                    boost_meter = 0
-                if boost_sound and not boost_channel.get_busy():
-                    boost_channel.play(boost_sound, loops=-1)
-            else:
-                boost_channel.stop()
-                if boost_meter < max_boost:
-                    boost_meter += boost_recharge_rate * dt
-                    if boost_meter > max_boost:
-                        boost_meter = max_boost
-            
-            if rapid_timer > 0:
-                rapid_timer -= dt
-            if triple_timer > 0:
-                triple_timer -= dt
-            
-            if special_input:
-                if eagle_meter >= max_eagle:
-                    if eagle_strike_sound:
-                        eagle_strike_sound.play()
-                    for enemy in enemies[:]:
-                        enemies.remove(enemy)
-                        trigger_combo()
-                        total_kills += 1
-                        add_score(200)
-                        if explosion_sounds and random.random() < 0.6:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                    for mini in mini_bosses[:]:
-                        mini["health"] -= 600
-                        if explosion_sounds:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                        if mini["health"] <= 0:
-                            mini_bosses.remove(mini)
-                            mini_boss_kills += 1
-                            trigger_combo()
-                            add_score(1200)
-                            mini_cooldown = 6000
-                            spawn_pause_timer = 480
-                            check_achievements()
-                            for _ in range(4):
-                                spawn_powerup((random.randint(mini["rect"].left, mini["rect"].right),
-                                              random.randint(mini["rect"].top, mini["rect"].bottom)), force_drop=True)
-                    if boss:
-                        boss["health"] -= 800
-                        if explosion_sounds:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                    eagle_meter = 0
-                elif bomb_charges > 0 and current_time - last_bomb_time > BOMB_COOLDOWN_MS:
-                    last_bomb_time = current_time
-                    bomb_charges -= 1
-                    for enemy in enemies[:]:
-                        enemies.remove(enemy)
-                        trigger_combo()
-                        total_kills += 1
-                        add_score(100)
-                        if explosion_sounds and random.random() < 0.5:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                    asteroids.clear()
-                    enemy_projectiles.clear()
-                    for mini in mini_bosses[:]:
-                        mini["health"] -= 400
-                        if explosion_sounds:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                        if mini["health"] <= 0:
-                            mini_bosses.remove(mini)
-                            mini_boss_kills += 1
-                            trigger_combo()
-                            add_score(1200)
-                            mini_cooldown = 6000
-                            spawn_pause_timer = 480
-                            check_achievements()
-                    if boss:
-                        boss["health"] -= 450
-                        if explosion_sounds:
-                            explosion_channel.play(random.choice(explosion_sounds))
-            
-            if eagle_meter < max_eagle:
-                eagle_meter += eagle_recharge_rate * dt
-                if eagle_meter > max_eagle:
-                    eagle_meter = max_eagle
-            
-            speed = player_speed * (BOOST_MULTIPLIER if boosting else 1)
-            player_rect.x += move_x * speed
-            player_rect.y += move_y * speed
-            player_rect.clamp_ip(screen.get_rect())
-            
-            if invincibility_frames > 0:
-                invincibility_frames -= 1
-            
-            effective_fire_rate = BASE_FIRE_RATE_MS // 2 if rapid_timer > 0 else BASE_FIRE_RATE_MS
-            num_shots = 3 if triple_timer > 0 else 1
-            spread = 18 if num_shots == 3 else 0
-            
-            if fire_input and current_time - last_fire_time > effective_fire_rate:
-                last_fire_time = current_time
-                for i in range(num_shots):
-                    offset_x = (i - num_shots // 2) * spread
-                    start_x = player_rect.centerx + offset_x
-                    start_y = player_rect.centery - 40
-                    missile_rect = missile_img.get_rect(center=(start_x, start_y))
-                    missiles.append({
-                        "rect": missile_rect,
-                        "dx": offset_x / 4,
-                        "dy": -MISSILE_SPEED
-                    })
-                if shoot_sounds:
-                    shoot_channel.play(random.choice(shoot_sounds))
-            
-            if stage_transition_timer > 0:
-                stage_transition_timer -= 1
-            elif score // STAGE_MILESTONE > current_stage:
-                current_stage = score // STAGE_MILESTONE
-                stage_transition_timer = 120
-                cycle_music()
-                spawn_pause_timer = 300
-            
-            if current_event:
-                event_timer -= 1
-                if event_timer <= 0:
-                    current_event = None
-            
-            if boss is None and len(mini_bosses) == 0 and current_event is None:
-                event_check_timer += 1
-                score_milestone = (score // 10000) * 10000
-                if score_milestone > last_event_score or event_check_timer > 5400:
-                    if random.random() < 0.7:
-                        current_event = random.choice(["breach", "patrol", "supply"])
-                        event_timer = event_duration
-                        last_event_score = score_milestone
-                        event_check_timer = random.randint(-2400, 0)
-            
-            if boss is None and score >= next_boss_threshold and boss_cooldown <= 0:
-                variant_idx = boss_kills % 4
-                bt = boss_types[variant_idx]
-                boss_rect = bt["normal"].get_rect(center=(SCREEN_WIDTH // 2, 180))
-                base_health = 2500 + min(8, score // 15000) * 350
-                health = int(base_health * bt["hp_mult"])
-                boss = {
-                    "rect": boss_rect,
-                    "health": health,
-                    "max_health": health,
-                    "type_idx": variant_idx,
-                    "direction": 1,
-                    "speed": 2.5 * bt["speed_mult"],
-                    "fire_timer": 0,
-                    "phase": 1,
-                    "vertical_phase": 0.0,
-                    "special_timer": 0,
-                    "invuln": False
-                }
-                boss_warning_timer = 180
-                spawn_pause_timer = 300
-            
-            boss_warning_timer = max(0, boss_warning_timer - 1)
-            mini_warning_timer = max(0, mini_warning_timer - 1)
-            boss_cooldown = max(0, boss_cooldown - 1)
-            spawn_pause_timer = max(0, spawn_pause_timer - 1)
-            
-            if boss:
-                bt = boss_types[boss["type_idx"]]
-                if boss["health"] < boss["max_health"] * 0.5 and boss["phase"] == 1:
-                    boss["phase"] = 2
-                if boss["health"] < boss["max_health"] * 0.25 and boss["phase"] == 2:
-                    boss["phase"] = 3
-                
-                boss["rect"].x += boss["direction"] * boss["speed"]
-                boss_width = boss["rect"].width
-                if boss["rect"].left < 100 or boss["rect"].right > SCREEN_WIDTH - 100:
-                    boss["direction"] *= -1
-                boss["rect"].x = max(100, min(SCREEN_WIDTH - 100 - boss_width, boss["rect"].x))
-                
-                boss["vertical_phase"] += 0.015
-                boss["rect"].y = 180 + math.sin(boss["vertical_phase"]) * 40
-                
-                boss["fire_timer"] += 1
-                fire_threshold = 90
-                offsets = [-50, -25, 0, 25, 50]
-                
-                if bt["fire_pattern"] == "wide_spread":
-                    offsets = [-75, -50, -25, 0, 25, 50, 75] if boss["phase"] >= 2 else offsets
-                    fire_threshold = 85 if boss["phase"] >= 2 else 95
-                elif bt["fire_pattern"] == "swarm_call":
-                    fire_threshold = 110
-                elif bt["fire_pattern"] == "add_waves":
-                    fire_threshold = 100
-                elif bt["fire_pattern"] == "shield_beams":
-                    fire_threshold = 80
-                
-                boss["invuln"] = False
-                if bt["special"] == "invuln_phases" and boss["phase"] >= 2:
-                    if boss["special_timer"] % 300 < 120:
-                        boss["invuln"] = True
-                    boss["special_timer"] += 1
-                
-                if boss["fire_timer"] > fire_threshold and not boss["invuln"]:
-                    for offset in offsets:
-                        center_x = boss["rect"].centerx + offset
-                        center_x = max(30, min(SCREEN_WIDTH - 30, center_x))
-                        blast_img = random.choice(enemy_blast_imgs)
-                        blast_rect = blast_img.get_rect(center=(center_x, boss["rect"].bottom))
-                        if len(enemy_projectiles) >= MAX_ENEMY_PROJECTILES:
-                            enemy_projectiles.pop(0)
-                        enemy_projectiles.append({"rect": blast_rect, "img": blast_img})
-                    boss["fire_timer"] = 0
-                
-                if bt["special"] == "spawn_minis" and boss["special_timer"] % 1200 == 0 and len(mini_bosses) < 3:
-                    num_spawn = 1 if len(mini_bosses) >= 2 else random.randint(1, 2)
-                    for _ in range(num_spawn):
-                        mb_type = random.choice(mini_boss_types)
-                        x_pos = random.randint(100, SCREEN_WIDTH - 100)
-                        mb_rect = mb_type["normal"].get_rect(center=(x_pos, boss["rect"].bottom + 60))
-                        health = mb_type["health_base"] + int(score / 5000) * 200
-                        mini_bosses.append({
-                            "rect": mb_rect,
-                            "normal_img": mb_type["normal"],
-                            "damaged_img": mb_type["damaged"],
-                            "health": health,
-                            "max_health": health,
-                            "phase": 1,
-                            "direction": 1 if random.random() < 0.5 else -1,
-                            "speed": mb_type["speed"],
-                            "fire_timer": random.randint(0, mb_type["fire_threshold_base"]),
-                            "fire_threshold": mb_type["fire_threshold_base"],
-                            "offsets": mb_type["offsets"]
-                        })
-                boss["special_timer"] += 1
-            
-            spawn_multiplier = 3.0 if current_event == "breach" else 1.25 if current_event == "supply" else 1.0
-            spawn_rate_enemy = max(40, 100 - current_stage * 8) // int(spawn_multiplier)
-            
-            formation_timer += 1
-            formation_interval = max(350, 750 - current_stage * 70)
-            if formation_timer > formation_interval:
-                formation_timer = 0
-                spawn_formation()
-            
-            if spawn_pause_timer == 0:
-                enemy_spawn_timer += 1
-                if enemy_spawn_timer > spawn_rate_enemy:
-                    if current_event == "patrol" or current_stage == 1:
-                        spawn_formation("line")
-                    else:
-                        img_list = terminid_imgs if current_stage == 0 else automaton_imgs if current_stage == 1 else illuminate_imgs
-                        img = random.choice(img_list)
-                        enemy_type = random.choices(["grunt", "fast", "shooter"], weights=[0.5, 0.3, 0.2])[0]
-                        wiggle = random.uniform(-1.5, 1.5)
-                        enemy_rect = img.get_rect(center=(random.randint(80, SCREEN_WIDTH - 80), -50))
-                        speed_base = {"grunt": random.uniform(3.2, 4.8), "fast": random.uniform(5.5, 7.5), "shooter": random.uniform(3.8, 5.5)}[enemy_type]
-                        speed = speed_base * (1.15 if current_stage >= 2 else 1.0)
-                        enemies.append({"rect": enemy_rect, "img": img, "speed": speed, "wiggle": wiggle, "type": enemy_type, "fire_timer": 0, "bob_phase": random.random() * math.tau})
-                        if enemy_type == "shooter":
-                            boost = 1.5 if current_event == "patrol" else 1.0
-                            fr = int(120 / boost)
-                            enemies[-1]["fire_timer"] = random.randint(0, fr - 1)
-                    enemy_spawn_timer = 0
-            
-            ast_pause = current_event in ["breach", "supply"]
-            if not ast_pause:
-                asteroid_spawn_timer += 1
-                if asteroid_spawn_timer > 90:
-                    ast_img = random.choice(asteroid_imgs)
-                    ast_rect = ast_img.get_rect(center=(random.randint(80, SCREEN_WIDTH - 80), -80))
-                    asteroids.append({"rect": ast_rect, "img": ast_img, "speed": random.uniform(2.5, 5.0), "rotation": 0, "rot_speed": random.uniform(-6, 6)})
-                    asteroid_spawn_timer = 0
-            
-            patrol_fire_boost = 1.5 if current_event == "patrol" else 1.0
-            for enemy in enemies:
-                if enemy["type"] == "shooter":
-                    fire_rate = int(120 / patrol_fire_boost)
-                    enemy["fire_timer"] += 1
-                    if enemy["fire_timer"] > fire_rate and enemy["rect"].bottom > 0:
-                        blast_img = random.choice(enemy_blast_imgs)
-                        center_x = enemy["rect"].centerx
-                        center_x = max(30, min(SCREEN_WIDTH - 30, center_x))
-                        blast_rect = blast_img.get_rect(center=(center_x, enemy["rect"].centery))
-                        if len(enemy_projectiles) >= MAX_ENEMY_PROJECTILES:
-                            enemy_projectiles.pop(0)
-                        enemy_projectiles.append({"rect": blast_rect, "img": blast_img})
-                        enemy["fire_timer"] = 0
-            
-            for enemy in enemies:
-                if enemy.get("formation", False) and enemy["rect"].y > 200:
-                    enemy["wiggle"] = random.uniform(-1.2, 1.2)
-                    enemy["formation"] = False
-                
-                enemy["rect"].y += enemy["speed"]
-                enemy["rect"].x += enemy["wiggle"] * 3
-                enemy["rect"].x = max(20, min(SCREEN_WIDTH - enemy["rect"].width - 20, enemy["rect"].x))
-            
-            if mini_cooldown > 0:
-                mini_cooldown -= 1
-            
-            mini_spawn_timer += 1
-            if mini_spawn_timer > 1800 and len(dropships) == 0 and len(mini_bosses) < 1 and mini_cooldown <= 0 and (boss is None or boss["health"] < boss["max_health"] * 0.5):
-                if random.random() < 0.05:
-                    mb_type = random.choice(mini_boss_types)
-                    x_pos = random.randint(120, SCREEN_WIDTH - 120)
-                    ds_rect = dropship_imgs[0].get_rect(center=(x_pos, -150))
-                    dropships.append({
-                        "rect": ds_rect,
-                        "frame": 0,
-                        "timer": 0,
-                        "mb_type": mb_type
-                    })
-                    mini_warning_timer = 150
-                    mini_spawn_timer = 0
-                    mini_cooldown = 4800
-            
-            for ds in dropships[:]:
-                ds["rect"].y += 5
-                ds["timer"] += 1
-                if ds["timer"] >= 10:
-                    ds["timer"] = 0
-                    ds["frame"] = (ds["frame"] + 1) % len(dropship_imgs)
-                if ds["rect"].top > 200:
-                    mb_type = ds["mb_type"]
-                    mb_rect = mb_type["normal"].get_rect(center=(ds["rect"].centerx, ds["rect"].bottom + 10))
-                    health = mb_type["health_base"] + int(score / 5000) * 200
-                    mini_bosses.append({
-                        "rect": mb_rect,
-                        "normal_img": mb_type["normal"],
-                        "damaged_img": mb_type["damaged"],
-                        "health": health,
-                        "max_health": health,
-                        "phase": 1,
-                        "direction": 1 if random.random() < 0.5 else -1,
-                        "speed": mb_type["speed"],
-                        "fire_timer": random.randint(0, mb_type["fire_threshold_base"]),
-                        "fire_threshold": mb_type["fire_threshold_base"],
-                        "offsets": mb_type["offsets"]
-                    })
-                    dropships.remove(ds)
-            
-            for mini in mini_bosses[:]:
-                mini["rect"].x += mini["direction"] * mini["speed"]
-                mini_width = mini["rect"].width
-                if mini["rect"].left <= 80 or mini["rect"].right >= SCREEN_WIDTH - 80:
-                    mini["direction"] *= -1
-                    mini["rect"].y += 30
-                mini["rect"].x = max(80, min(SCREEN_WIDTH - 80 - mini_width, mini["rect"].x))
-                
-                mini["rect"].y += 3.0
-                
-                if mini["health"] <= mini["max_health"] * 0.5 and mini["phase"] == 1:
-                    mini["phase"] = 2
-                    mini["speed"] *= 1.5
-                    mini["fire_threshold"] *= 0.8
-                
-                mini["fire_timer"] += 1
-                current_thresh = mini["fire_threshold"] if mini["phase"] == 1 else mini["fire_threshold"] * 0.7
-                if mini["fire_timer"] > current_thresh and mini["rect"].bottom > 0:
-                    for offset in mini["offsets"]:
-                        center_x = mini["rect"].centerx + offset
-                        center_x = max(30, min(SCREEN_WIDTH - 30, center_x))
-                        blast_img = random.choice(enemy_blast_imgs)
-                        blast_rect = blast_img.get_rect(center=(center_x, mini["rect"].bottom + 10))
-                        if len(enemy_projectiles) >= MAX_ENEMY_PROJECTILES:
-                            enemy_projectiles.pop(0)
-                        enemy_projectiles.append({"rect": blast_rect, "img": blast_img})
-                    mini["fire_timer"] = 0
-                
-                if mini["rect"].top > SCREEN_HEIGHT:
-                    mini_bosses.remove(mini)
-            
-            for m in missiles[:]:
-                m["rect"].x += m["dx"]
-                m["rect"].y += m["dy"]
-                if m["rect"].bottom < 0 or m["rect"].top > SCREEN_HEIGHT or m["rect"].right < 0 or m["rect"].left > SCREEN_WIDTH:
-                    missiles.remove(m)
-            
-            for proj in enemy_projectiles[:]:
-                proj["rect"].y += ENEMY_PROJECTILE_SPEED
-                if proj["rect"].top > SCREEN_HEIGHT:
-                    enemy_projectiles.remove(proj)
-            
-            for ast in asteroids[:]:
-                ast["rect"].y += ast["speed"]
-                ast["rotation"] += ast["rot_speed"]
-                if ast["rect"].top > SCREEN_HEIGHT:
-                    asteroids.remove(ast)
-            
-            for p in powerups[:]:
-                p["rect"].y += 2.5
-                p["rect"].x += math.sin(current_time / 200 + p["phase"]) * 3
-                if p["rect"].top > SCREEN_HEIGHT or p["rect"].right < -100 or p["rect"].left > SCREEN_WIDTH + 100:
-                    powerups.remove(p)
-            
-            missiles_to_remove = []
-            for m in missiles:
-                hit = False
-                
-                for enemy in enemies[:]:
-                    if m["rect"].colliderect(enemy["rect"]):
-                        missiles_to_remove.append(m)
-                        enemies.remove(enemy)
-                        trigger_combo()
-                        total_kills += 1
-                        add_score(100)
-                        spawn_powerup(enemy["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                        if explosion_sounds and random.random() < 0.3:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                        hit = True
-                        check_achievements()
-                        break
-                if hit:
-                    continue
-                
-                for ast in asteroids[:]:
-                    if m["rect"].colliderect(ast["rect"]):
-                        missiles_to_remove.append(m)
-                        asteroids.remove(ast)
-                        add_score(50)
-                        spawn_powerup(ast["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                        if explosion_sounds and random.random() < 0.3:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                        hit = True
-                        break
-                if hit:
-                    continue
-                
-                if boss and m["rect"].colliderect(boss["rect"]):
-                    missiles_to_remove.append(m)
-                    boss["health"] -= 20
-                    if explosion_sounds and random.random() < 0.6:
-                        explosion_channel.play(random.choice(explosion_sounds))
-                    splash_center = m["rect"].center
-                    splash_radius = 100
-                    for enemy in enemies[:]:
-                        if math.dist(splash_center, enemy["rect"].center) < splash_radius:
-                            enemies.remove(enemy)
-                            trigger_combo()
-                            total_kills += 1
-                            add_score(100)
-                            spawn_powerup(enemy["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                            if explosion_sounds and random.random() < 0.3:
-                                explosion_channel.play(random.choice(explosion_sounds))
-                            check_achievements()
-                    hit = True
-                
-                for mini in mini_bosses[:]:
-                    if m["rect"].colliderect(mini["rect"]):
-                        missiles_to_remove.append(m)
-                        mini["health"] -= 30
-                        if explosion_sounds and random.random() < 0.7:
-                            explosion_channel.play(random.choice(explosion_sounds))
-                        splash_center = m["rect"].center
-                        splash_radius = 80
-                        for enemy in enemies[:]:
-                            if math.dist(splash_center, enemy["rect"].center) < splash_radius:
-                                enemies.remove(enemy)
-                                trigger_combo()
-                                total_kills += 1
-                                add_score(100)
-                                spawn_powerup(enemy["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                                if explosion_sounds and random.random() < 0.3:
-                                    explosion_channel.play(random.choice(explosion_sounds))
-                                check_achievements()
-                        if mini["health"] <= 0:
-                            mini_bosses.remove(mini)
-                            mini_boss_kills += 1
-                            trigger_combo()
-                            add_score(1200)
-                            mini_cooldown = 6000
-                            spawn_pause_timer = 480
-                            if explosion_sounds:
-                                explosion_channel.play(random.choice(explosion_sounds))
-                            check_achievements()
-                            for _ in range(4):
-                                spawn_powerup((random.randint(mini["rect"].left, mini["rect"].right),
-                                              random.randint(mini["rect"].top, mini["rect"].bottom)), force_drop=True)
-                        hit = True
-                        break
-                if hit:
-                    continue
-            
-            for m in missiles_to_remove:
-                if m in missiles:
-                    missiles.remove(m)
-            
-            for p in powerups[:]:
-                if player_rect.colliderect(p["rect"]):
-                    powerups.remove(p)
-                    add_score(100)
-                    if pickup_sounds:
-                        random.choice(pickup_sounds).play()
-                    ptype = p["type"]
-                    if ptype == "rapid":
-                        rapid_timer = max(rapid_timer, 12.0)
-                    elif ptype == "triple":
-                        triple_timer = max(triple_timer, 15.0)
-                    elif ptype == "shield":
-                        shield_active = True
-                    elif ptype == "bomb":
-                        bomb_charges = min(max_bomb_charges, bomb_charges + 1)
-                    elif ptype == "life":
-                        lives = min(5, lives + 1)
-            
-            if invincibility_frames == 0:
-                damage_taken = False
-                for proj in enemy_projectiles[:]:
-                    if player_rect.colliderect(proj["rect"]):
-                        enemy_projectiles.remove(proj)
-                        damage_taken = True
-                        break
-                
-                if not damage_taken:
-                    for enemy in enemies[:]:
-                        if player_rect.colliderect(enemy["rect"]):
-                            enemies.remove(enemy)
-                            spawn_powerup(enemy["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                            damage_taken = True
-                            break
-                
-                if not damage_taken:
-                    for ast in asteroids[:]:
-                        if player_rect.colliderect(ast["rect"]):
-                            asteroids.remove(ast)
-                            spawn_powerup(ast["rect"].center, event_bonus=(current_event is not None), stage_bonus=(current_stage == 2))
-                            damage_taken = True
-                            break
-                
-                if not damage_taken and boss and player_rect.colliderect(boss["rect"]):
-                    damage_taken = True
-                
-                if not damage_taken:
-                    for mini in mini_bosses:
-                        if player_rect.colliderect(mini["rect"]):
-                            damage_taken = True
-                            break
-                
-                if damage_taken:
-                    if shield_active:
-                        shield_active = False
-                        if hit_sounds:
-                            hit_channel.play(random.choice(hit_sounds))
-                    else:
-                        lives -= 1
-                        invincibility_frames = 120
-                        player_rect.centerx = SCREEN_WIDTH // 2
-                        combo_count = 0
-                        if hit_sounds:
-                            hit_channel.play(random.choice(hit_sounds))
-                
-                if lives <= 0:
-                    boost_channel.stop()
-                    shoot_channel.stop()
-                    explosion_channel.stop()
-                    hit_channel.stop()
-                    
-                    min_score = leaderboard[-1]["score"] if len(leaderboard) > 0 else 0
-                    qualifies = len(leaderboard) < 10 or score > min_score
-                    if qualifies:
-                        input_text = ""
-                        current_state = "enter_initials"
-                    else:
-                        current_state = "game_over"
-                    selected_index = 0
-            
-            if boss and boss["health"] <= 0:
-                for _ in range(5):
-                    rx = random.randint(boss["rect"].left + 30, boss["rect"].right - 30)
-                    ry = random.randint(boss["rect"].top + 50, boss["rect"].bottom - 50)
-                    spawn_powerup((rx, ry), force_drop=True)
-                add_score(2000)
-                boss_kills += 1
-                combo_count += 15
-                combo_timer = 300
-                mini_cooldown = 6000
-                spawn_pause_timer = 600
-                if explosion_sounds:
-                    explosion_channel.play(random.choice(explosion_sounds))
-                boss = None
-                next_boss_threshold = score + 35000 + boss_kills * 15000
-                boss_cooldown = 2400
-                check_achievements()
-        
-        if combo_timer > 0:
-            combo_timer -= 1
+            accumulator += min(frame_dt, MAX_SIM_STEPS * SIM_DT)
         else:
-            combo_count = 0
-        
-        screen.fill((0, 0, 0))
-        
-        if stage_transition_timer > 0:
-            alpha = int(255 * (stage_transition_timer / 120))
-            flash = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            flash.fill((255, 255, 255))
-            flash.set_alpha(alpha)
-            screen.blit(flash, (0, 0))
-        
-        for star in stars:
-            sx = int(star['x'])
-            sy = int(star['y'])
-            intensity = 180 + int(75 * (star['speed'] / 3.5))
-            pygame.draw.circle(screen, (intensity, intensity, intensity), (sx, sy), star['size'])
-        
-        tint_overlay.fill((0, 0, 0, 0))
-        if current_stage % 3 == 0:
-            tint_overlay.fill((0, 100, 0, 40))
-        elif current_stage % 3 == 1:
-            tint_overlay.fill((0, 0, 150, 40))
-        elif current_stage % 3 == 2:
-            tint_overlay.fill((150, 0, 150, 40))
-        screen.blit(tint_overlay, (0, 0))
-        
-        if current_state in ["playing", "pause"]:
-            for ds in dropships:
-                screen.blit(dropship_imgs[ds["frame"]], ds["rect"])
-            
-            for m in missiles:
-                screen.blit(missile_img, m["rect"])
-            
-            for proj in enemy_projectiles:
-                screen.blit(proj["img"], proj["rect"])
-            
-            for enemy in enemies:
-                phase = enemy.get("bob_phase", 0)
-                offset_y = math.sin(current_time / 300 + phase) * 5
-                blit_rect = enemy["rect"].copy()
-                blit_rect.y += offset_y
-                pulse = 1.0 + 0.03 * math.sin(anim_timer / 8 + phase)
-                scaled_img = pygame.transform.smoothscale(enemy["img"], (int(enemy["img"].get_width() * pulse), int(enemy["img"].get_height() * pulse)))
-                scaled_rect = scaled_img.get_rect(center=blit_rect.center)
-                screen.blit(scaled_img, scaled_rect)
-            
-            for ast in asteroids:
-                rotated = pygame.transform.rotate(ast["img"], ast["rotation"])
-                rot_rect = rotated.get_rect(center=ast["rect"].center)
-                screen.blit(rotated, rot_rect)
-            
-            for p in powerups:
-                screen.blit(p["img"], p["rect"])
-            
-            for mini in mini_bosses:
-                img = mini["damaged_img"] if mini["phase"] == 2 else mini["normal_img"]
-                pulse = 1.0 + 0.04 * math.sin(anim_timer / 10)
-                scaled_img = pygame.transform.smoothscale(img, (int(img.get_width() * pulse), int(img.get_height() * pulse)))
-                scaled_rect = scaled_img.get_rect(center=mini["rect"].center)
-                screen.blit(scaled_img, scaled_rect)
-                bar_width = 120
-                bar_x = mini["rect"].centerx - bar_width // 2
-                bar_y = mini["rect"].top - 40
-                pygame.draw.rect(screen, (50, 0, 0), (bar_x, bar_y, bar_width, 14))
-                pygame.draw.rect(screen, (200, 0, 0), (bar_x, bar_y, bar_width, 14), 2)
-                fill = int((mini["health"] / mini["max_health"]) * bar_width)
-                pygame.draw.rect(screen, (255, 50, 50), (bar_x + 2, bar_y + 2, fill - 4, 10))
-                label = font_hud.render("MINI-BOSS", True, (255, 255, 0))
-                screen.blit(label, (mini["rect"].centerx - label.get_width() // 2, bar_y - 25))
-            
-            if boss:
-                bt = boss_types[boss["type_idx"]]
-                base_img = bt["damaged"] if boss["phase"] >= 2 else bt["normal"]
-                boss_rect = base_img.get_rect(center=boss["rect"].center)
-                screen.blit(base_img, boss_rect)
-                if boss.get("invuln", False):
-                    shield_surf = pygame.Surface(boss_rect.size, pygame.SRCALPHA)
-                    shield_surf.fill((100, 100, 255, 80))
-                    screen.blit(shield_surf, boss_rect)
-                boss_label = font_hud.render(bt["name"], True, (255, 255, 0))
-                screen.blit(boss_label, (SCREEN_WIDTH // 2 - boss_label.get_width() // 2, 20))
-            
-            base_img = player_normal
-            if boosting:
-                base_img = player_boost
-            elif lives <= 1 or invincibility_frames > 0:
-                base_img = player_damaged
-            screen.blit(base_img, player_rect)
-            
-            if shield_active:
-                pulse = (math.sin(current_time / 180.0) + 1.0) / 2.0
-                glow_radius = int(55 + 12 * pulse)
-                glow_alpha = int(30 + 50 * pulse)
-                pygame.draw.circle(screen, (80, 180, 255, glow_alpha), player_rect.center, glow_radius, width=10)
-                
-                alpha = int(100 + 140 * pulse)
-                shield_copy = shield_large.copy()
-                shield_copy.set_alpha(alpha)
-                shield_rect = shield_copy.get_rect(center=player_rect.center)
-                screen.blit(shield_copy, shield_rect)
-            
-            if boss and current_state == "playing":
-                bar_x = SCREEN_WIDTH // 2 - 160
-                bar_y = 60
-                bar_width = 320
-                pygame.draw.rect(screen, (100, 0, 0), (bar_x, bar_y, bar_width, 30))
-                pygame.draw.rect(screen, (200, 0, 0), (bar_x, bar_y, bar_width, 30), 4)
-                fill = max(0, int((boss["health"] / boss["max_health"]) * bar_width))
-                pygame.draw.rect(screen, (255, 0, 0), (bar_x + 4, bar_y + 4, fill - 8, 22))
-        
+            accumulator = 0.0
+
+        profiler.lap(profiler.INPUT)
+
+        sim_steps = 0
+        while current_state == "playing" and accumulator >= SIM_DT and sim_steps < MAX_SIM_STEPS:
+            accumulator -= SIM_DT
+            sim_steps += 1
+            packed = poll_input().pack()
+            profiler.lap(profiler.INPUT)
+            sim.step(TickInput.unpack(packed))
+            profiler.lap_sim(sim)
+            if replay:
+                replay.record(sim.tick, packed)
+            play_sim_sounds()
+
+            for name, payload in sim.events:
+                if name == "stage":
+                    music.advance()
+                elif name == "achievement":
+                    save_achievements()
+                    achievement_popup = {
+                        "name": payload["name"],
+                        "desc": payload["desc"],
+                        "timer": 360,
+                        "alpha": 0
+                    }
+
+            if sim.game_over:
+                finish_replay()
+                stop_channels()
+                min_score = leaderboard[-1]["score"] if len(leaderboard) > 0 else 0
+                qualifies = len(leaderboard) < 10 or sim.score > min_score
+                if qualifies:
+                    input_text = ""
+                    current_state = "enter_initials"
+                else:
+                    current_state = "game_over"
+                selected_index = 0
+            profiler.lap(profiler.AUDIO)
+
+        if current_state == "playing" and sim.boosting:
+            if boost_sound and not boost_channel.get_busy():
+                boost_channel.play(boost_sound, loops=-1)
+        else:
+            boost_channel.stop()
+        sfx.flush()
+        if current_state == "playing" and sim.score % STAGE_MILESTONE >= STAGE_MILESTONE * MUSIC_PREFETCH_AT:
+            music.prefetch()
+        music.update()
+        profiler.lap(profiler.AUDIO)
+
+        # Fraction of a tick since the last simulation step, for render interpolation
+        interp = accumulator / SIM_DT
+        current_time = pygame.time.get_ticks()
+
+        if dirty:
+            # Gameplay moves everywhere; elsewhere any UI change repaints the whole frame once
+            # and steady frames only push what the layers mark (stars, paused-world animation,
+            # the FPS counter, the initials cursor, the profiler panel). The hovered button
+            # counts as UI state because Button.draw highlights it from the mouse position.
+            mouse_pos = pygame.mouse.get_pos()
+            hovered = next((i for i, button in enumerate(buttons) if button.rect.collidepoint(mouse_pos)), None)
+            signature = (current_state, selected_index, music_volume, sfx_volume, input_text,
+                         len(leaderboard), len(unlocked_achievements), joystick is None,
+                         profiler.visible, achievement_popup is None, hovered)
+            if current_state == "playing" or signature != ui_signature:
+                dirty.invalidate()
+            ui_signature = signature
+
+        renderer.draw_background(sim)
+
         if current_state in ["playing", "pause"]:
-            hud_x = 20
-            hud_y = 70
-            
-            icon_spacing = 30
-            for i in range(lives):
-                screen.blit(lives_icon, (hud_x + i * icon_spacing, hud_y))
-            lives_color = (0, 255, 255) if lives > 1 else (255, 50, 50)
-            lives_surf = font_hud.render(f"x {lives}", True, lives_color)
-            screen.blit(lives_surf, (hud_x + lives * icon_spacing + 5, hud_y + 5))
-            
-            hud_y += 35
-            score_surf = font_score.render(f"Score: {score}", True, (255, 255, 255))
-            screen.blit(score_surf, (hud_x, hud_y))
-            
-            hud_y += 30
-            high_surf = font_hud.render(f"High Score: {high_score}", True, (255, 255, 100))
-            screen.blit(high_surf, (hud_x, hud_y))
-            
-            hud_y += 35
-            mode_surf = font_small.render(f"Input: {'Controller' if joystick else 'Keyboard'}", True, (200, 200, 200))
-            screen.blit(mode_surf, (hud_x, hud_y))
-            
-            hud_y += 20
-            fps_surf = font_small.render(f"FPS: {int(clock.get_fps())}", True, (100, 255, 100))
-            screen.blit(fps_surf, (hud_x, hud_y))
-            
-            hud_y += 35
-            meter_x = hud_x
-            meter_w = 150
-            meter_h = 15
-            pygame.draw.rect(screen, (30, 30, 30), (meter_x, hud_y, meter_w, meter_h))
-            pygame.draw.rect(screen, (200, 200, 200), (meter_x, hud_y, meter_w, meter_h), 2)
-            boost_fill = int((boost_meter / max_boost) * meter_w)
-            boost_color = (0, 255, 255) if boost_meter > low_boost_threshold * 2 else (50, 100, 255) if boost_meter > low_boost_threshold else (255, 50, 50)
-            pygame.draw.rect(screen, boost_color, (meter_x + 2, hud_y + 2, boost_fill - 4, meter_h - 4))
-            boost_label = font_small.render("BOOST", True, (255, 255, 255))
-            screen.blit(boost_label, (meter_x, hud_y - 20))
-            
-            eagle_y = hud_y + 30
-            pygame.draw.rect(screen, (30, 30, 30), (meter_x, eagle_y, meter_w, meter_h))
-            pygame.draw.rect(screen, (200, 200, 200), (meter_x, eagle_y, meter_w, meter_h), 2)
-            eagle_fill = int((eagle_meter / max_eagle) * meter_w)
-            eagle_color = (0, 255, 255) if eagle_meter == max_eagle else (100, 100, 255)
-            pygame.draw.rect(screen, eagle_color, (meter_x + 2, eagle_y + 2, eagle_fill - 4, meter_h - 4))
-            eagle_label = font_small.render("EAGLE / BOMB", True, (255, 255, 255))
-            screen.blit(eagle_label, (meter_x, eagle_y - 20))
-            
-            if eagle_meter == max_eagle:
-                ready_text = font_small.render("EAGLE READY!", True, (0, 255, 0))
-                screen.blit(ready_text, (meter_x + meter_w + 10, eagle_y))
-            elif bomb_charges > 0:
-                bomb_text = font_small.render(f"BOMB x{bomb_charges}", True, (255, 100, 0))
-                screen.blit(bomb_text, (meter_x + meter_w + 10, eagle_y))
-            
-            powerup_y = eagle_y + 50
-            powerup_label = font_small.render("POWER-UPS:", True, (255, 255, 0))
-            screen.blit(powerup_label, (meter_x, powerup_y - 25))
-            
-            icon_x = meter_x
-            icon_size = 35
-            icon_spacing = 50
-            
-            if rapid_timer > 0:
-                screen.blit(hud_powerup_imgs["rapid"], (icon_x, powerup_y))
-                t_text = font_small.render(f"{int(rapid_timer)}s", True, (0, 255, 255))
-                screen.blit(t_text, (icon_x + 5, powerup_y + icon_size + 5))
-                icon_x += icon_spacing
-            
-            if triple_timer > 0:
-                screen.blit(hud_powerup_imgs["triple"], (icon_x, powerup_y))
-                t_text = font_small.render(f"{int(triple_timer)}s", True, (255, 255, 0))
-                screen.blit(t_text, (icon_x + 5, powerup_y + icon_size + 5))
-                icon_x += icon_spacing
-            
-            if shield_active:
-                screen.blit(hud_powerup_imgs["shield"], (icon_x, powerup_y))
-                active_text = font_small.render("ACTIVE", True, (0, 255, 255))
-                screen.blit(active_text, (icon_x + 5, powerup_y + icon_size + 5))
-                icon_x += icon_spacing
-            
-            if bomb_charges > 0:
-                for c in range(bomb_charges):
-                    screen.blit(hud_powerup_imgs["bomb"], (icon_x + c * (icon_size + 10), powerup_y))
-            
-            if combo_count > 1:
-                multiplier = min(4.0, 1.0 + combo_count * 0.25)
-                combo_text = f"COMBO x{combo_count} ({multiplier:.1f}x)"
-                combo_surf = font_score.render(combo_text, True, (255, 255, 100))
-                screen.blit(combo_surf, (SCREEN_WIDTH // 2 - combo_surf.get_width() // 2, 30))
-            
+            renderer.draw_world(sim, interp, current_time, anim_timer, current_state == "playing")
+            renderer.draw_hud(sim, high_score, "Controller" if joystick else "Keyboard", clock.get_fps())
+
             if achievement_popup:
-                achievement_popup["timer"] -= 1
-                
+                achievement_popup["timer"] -= frame_ticks
+
                 if achievement_popup["timer"] <= 0:
                     achievement_popup = None
                 else:
                     if achievement_popup["timer"] > 180:
-                        achievement_popup["alpha"] = min(255, achievement_popup["alpha"] + 20)
+                        achievement_popup["alpha"] = min(255, achievement_popup["alpha"] + 20 * frame_ticks)
                     else:
-                        achievement_popup["alpha"] = max(0, achievement_popup["alpha"] - 15)
-                    
-                    name_surf = font_large.render(achievement_popup["name"], True, (255, 215, 0))
-                    desc_surf = font_hud.render(achievement_popup["desc"], True, (255, 255, 255))
-                    name_surf.set_alpha(achievement_popup["alpha"])
-                    desc_surf.set_alpha(achievement_popup["alpha"])
-                    
+                        achievement_popup["alpha"] = max(0, achievement_popup["alpha"] - 15 * frame_ticks)
+
+                    name_surf = text_large.surface(achievement_popup["name"], (255, 215, 0))
+                    desc_surf = text_hud.surface(achievement_popup["desc"], (255, 255, 255))
+                    name_surf.set_alpha(int(achievement_popup["alpha"]))
+                    desc_surf.set_alpha(int(achievement_popup["alpha"]))
+
                     popup_x = SCREEN_WIDTH - name_surf.get_width() - 30
                     popup_y = 100
-                    screen.blit(name_surf, (popup_x, popup_y))
-                    screen.blit(desc_surf, (popup_x, popup_y + name_surf.get_height() + 10))
-        
+                    name_rect = screen.blit(name_surf, (popup_x, popup_y))
+                    desc_rect = screen.blit(desc_surf, (popup_x, popup_y + name_surf.get_height() + 10))
+                    if dirty:
+                        dirty.mark("overlay", name_rect.union(desc_rect))
+                    # The surfaces are shared through the text cache, so drop the fade alpha again
+                    name_surf.set_alpha(None)
+                    desc_surf.set_alpha(None)
+
         if current_state == "menu":
-            title = font_title.render("EAGLE STRIKE", True, (255, 215, 0))
+            title = text_title.surface("EAGLE STRIKE", (255, 215, 0))
             screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
             for i, button in enumerate(main_menu_buttons):
                 button.draw(screen, i == selected_index)
         
         elif current_state == "settings":
-            title = font_title.render("SETTINGS", True, (255, 255, 255))
+            title = text_title.surface("SETTINGS", (255, 255, 255))
             screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
-            music_text = font_hud.render(f"Music Volume: {int(music_volume * 100)}%", True, (255, 255, 255))
+            music_text = text_hud.surface(f"Music Volume: {int(music_volume * 100)}%", (255, 255, 255))
             screen.blit(music_text, (SCREEN_WIDTH // 2 - music_text.get_width() // 2, 295))
-            sfx_text = font_hud.render(f"SFX Volume: {int(sfx_volume * 100)}%", True, (255, 255, 255))
+            sfx_text = text_hud.surface(f"SFX Volume: {int(sfx_volume * 100)}%", (255, 255, 255))
             screen.blit(sfx_text, (SCREEN_WIDTH // 2 - sfx_text.get_width() // 2, 415))
             for i, button in enumerate(settings_buttons):
                 button.draw(screen, i == selected_index)
         
         elif current_state == "pause":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            screen.blit(overlay, (0, 0))
-            paused_text = font_large.render("PAUSED", True, (0, 255, 255))
+            screen.blit(surfaces.filled((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 150), pygame.SRCALPHA), (0, 0))
+            paused_text = text_large.surface("PAUSED", (0, 255, 255))
             screen.blit(paused_text, (SCREEN_WIDTH // 2 - paused_text.get_width() // 2, 100))
             for i, button in enumerate(pause_buttons):
                 button.draw(screen, i == selected_index)
         
         elif current_state == "game_over":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 200))
-            screen.blit(overlay, (0, 0))
-            go_text = font_gameover.render("GAME OVER", True, (255, 50, 50))
+            screen.blit(surfaces.filled((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 200), pygame.SRCALPHA), (0, 0))
+            go_text = text_gameover.surface("GAME OVER", (255, 50, 50))
             screen.blit(go_text, (SCREEN_WIDTH // 2 - go_text.get_width() // 2, 150))
-            final_text = font_score.render(f"Final Score: {score}", True, (255, 255, 255))
+            final_text = text_score.surface(f"Final Score: {sim.score}", (255, 255, 255))
             screen.blit(final_text, (SCREEN_WIDTH // 2 - final_text.get_width() // 2, 260))
-            high_text = font_score.render(f"High Score: {high_score}", True, (255, 255, 100))
+            high_text = text_score.surface(f"High Score: {high_score}", (255, 255, 100))
             screen.blit(high_text, (SCREEN_WIDTH // 2 - high_text.get_width() // 2, 320))
             for i, button in enumerate(game_over_buttons):
                 button.draw(screen, i == selected_index)
         
         elif current_state == "enter_initials":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 160))
-            screen.blit(overlay, (0, 0))
+            screen.blit(surfaces.filled((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 160), pygame.SRCALPHA), (0, 0))
             
-            new_hs_text = font_title.render("NEW HIGH SCORE!", True, (255, 215, 0))
+            new_hs_text = text_title.surface("NEW HIGH SCORE!", (255, 215, 0))
             new_hs_rect = new_hs_text.get_rect(center=(SCREEN_WIDTH // 2, 200))
             screen.blit(new_hs_text, new_hs_rect)
             
-            score_text = font_large.render(f"Your Score: {score}", True, (255, 255, 255))
+            score_text = text_large.surface(f"Your Score: {sim.score}", (255, 255, 255))
             score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 300))
             screen.blit(score_text, score_rect)
             
-            prompt_text = font_hud.render("Enter your initials (3 letters):", True, (255, 255, 255))
+            prompt_text = text_hud.surface("Enter your initials (3 letters):", (255, 255, 255))
             prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH // 2, 400))
             screen.blit(prompt_text, prompt_rect)
             
-            initials_surf = font_gameover.render(input_text.upper() + ("_" if len(input_text) < 3 else ""), True, (0, 255, 255))
+            initials_surf = text_gameover.surface(input_text.upper() + ("_" if len(input_text) < 3 else ""), (0, 255, 255))
             initials_rect = initials_surf.get_rect(center=(SCREEN_WIDTH // 2, 500))
             screen.blit(initials_surf, initials_rect)
             
             blink = (current_time // 400) % 2 == 0
             if len(input_text) < 3 and blink:
-                cursor_surf = font_gameover.render("|", True, (0, 255, 255))
+                cursor_surf = text_gameover.surface("|", (0, 255, 255))
                 cursor_rect = cursor_surf.get_rect(midleft=(initials_rect.right + 10, initials_rect.centery))
                 screen.blit(cursor_surf, cursor_rect)
+                if dirty:
+                    dirty.mark("ui", cursor_rect)
             
-            instr_text = font_small.render("A-Z letters only • Backspace delete • Enter confirm • Esc cancel", True, (200, 200, 200))
+            instr_text = text_small.surface("A-Z letters only • Backspace delete • Enter confirm • Esc cancel", (200, 200, 200))
             instr_rect = instr_text.get_rect(center=(SCREEN_WIDTH // 2, 650))
             screen.blit(instr_text, instr_rect)
         
         elif current_state == "leaderboard":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 120))
-            screen.blit(overlay, (0, 0))
+            screen.blit(surfaces.filled((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 120), pygame.SRCALPHA), (0, 0))
             
-            title = font_title.render("LEADERBOARD", True, (255, 215, 0))
+            title = text_title.surface("LEADERBOARD", (255, 215, 0))
             screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 60))
             
             start_y = 140
             for i in range(5):
                 if i < len(leaderboard):
                     entry = leaderboard[i]
-                    rank_text = font_hud.render(f"{i+1:2}.", True, (255, 255, 100))
-                    name_text = font_hud.render(entry["name"], True, (0, 255, 255))
-                    score_text = font_hud.render(f"{entry['score']:8}", True, (255, 255, 255))
+                    rank_text = text_hud.surface(f"{i+1:2}.", (255, 255, 100))
+                    name_text = text_hud.surface(entry["name"], (0, 255, 255))
+                    score_text = text_hud.surface(f"{entry['score']:8}", (255, 255, 255))
                 else:
-                    rank_text = font_hud.render(f"{i+1:2}.", True, (100, 100, 100))
-                    name_text = font_hud.render("---", True, (100, 100, 100))
-                    score_text = font_hud.render("-----", True, (100, 100, 100))
+                    rank_text = text_hud.surface(f"{i+1:2}.", (100, 100, 100))
+                    name_text = text_hud.surface("---", (100, 100, 100))
+                    score_text = text_hud.surface("-----", (100, 100, 100))
                 
                 screen.blit(rank_text, (150, start_y + i * 50))
                 screen.blit(name_text, (250, start_y + i * 50))
@@ -1815,12 +3864,12 @@ def main():
             
             ach_y = start_y + 240
             unlocked_count = len([a for a in ACHIEVEMENTS if a["id"] in unlocked_achievements])
-            ach_header = font_hud.render(f"YOUR ACHIEVEMENTS: {unlocked_count}/{len(ACHIEVEMENTS)} UNLOCKED", True, (255, 215, 0))
+            ach_header = text_hud.surface(f"YOUR ACHIEVEMENTS: {unlocked_count}/{len(ACHIEVEMENTS)} UNLOCKED", (255, 215, 0))
             screen.blit(ach_header, (SCREEN_WIDTH // 2 - ach_header.get_width() // 2, ach_y))
             ach_y += 40
             
             if unlocked_count == 0:
-                no_ach = font_hud.render("No achievements yet — keep playing!", True, (150, 150, 150))
+                no_ach = text_hud.surface("No achievements yet — keep playing!", (150, 150, 150))
                 screen.blit(no_ach, (SCREEN_WIDTH // 2 - no_ach.get_width() // 2, ach_y))
             else:
                 for ach in ACHIEVEMENTS:
@@ -1830,8 +3879,8 @@ def main():
                     else:
                         color = (100, 100, 100)
                         prefix = "  "
-                    ach_text = font_hud.render(prefix + ach["name"], True, color)
-                    desc_text = font_small.render(ach["desc"], True, color)
+                    ach_text = text_hud.surface(prefix + ach["name"], color)
+                    desc_text = text_small.surface(ach["desc"], color)
                     screen.blit(ach_text, (150, ach_y))
                     screen.blit(desc_text, (170, ach_y + 15))
                     ach_y += 45
@@ -1839,8 +3888,33 @@ def main():
             for i, button in enumerate(leaderboard_buttons):
                 button.draw(screen, i == selected_index)
         
-        pygame.display.flip()
-    
+        if profiler.visible:
+            panel_rect = profiler.draw(screen, text_small, sim)
+            if dirty and panel_rect:
+                dirty.mark("overlay", panel_rect)
+        profiler.lap(profiler.RENDER)
+
+        if dirty:
+            dirty.present()
+        else:
+            pygame.display.flip()
+        profiler.lap(profiler.FLIP)
+        profiler.end_frame()
+
+        if startup:
+            startup.phase("first frame")
+            startup.report()
+            startup = None
+    
+    finish_replay()
+    if dirty:
+        dirty.report()
+    surfaces.report()
+    sim.report_pools()
+    music.report()
+    music.shutdown()
+    sfx.report()
+    persistence.close()
     logging.info("Game closed cleanly")
     pygame.quit()
 
@@ -1848,8 +3922,15 @@ load_leaderboard()
 load_achievements()
 
 if __name__ == "__main__":
+    # python eagle_strike.py --replay replays/<file>.esr : headless re-simulation + checksum check
+    if len(sys.argv) > 2 and sys.argv[1] == "--replay":
+        sys.exit(verify_replay(sys.argv[2]))
+    # --dirty-rects: push only changed screen regions (menus, pause, leaderboard)
     try:
-        main()
+        main(dirty_rects="--dirty-rects" in sys.argv)
     except Exception as e:
         logging.critical(f"Fatal error: {e}\n{traceback.format_exc()}")
+        if persistence:
+            persistence.close()
+        stop_logging(dump_recent=True)
         pygame.quit()
\ No newline at end of file